@@ -1,10 +1,24 @@
 from __future__ import annotations
 
+import os
+import threading
+import time
 from pathlib import Path
 from typing import Any
 
-from .config import ROOT_DIR
-from .story_store import StoryStoreError, json_path_to_story_rel, list_story_json_files, load_story
+from .config import CATALOG_RESCAN_SECONDS, ROOT_DIR
+from .story_store import (
+    STORE_CHANGE_STORY,
+    STORY_EXCLUDED_TOP_LEVEL_DIRS,
+    StoryStoreError,
+    add_store_listener,
+    is_own_store_change,
+    json_path_to_story_rel,
+    list_story_json_files,
+    load_story,
+    store_change_stamp,
+    story_rel_to_json_path,
+)
 
 
 def _normalize_rel_path(path_rel: str) -> str:
@@ -53,34 +67,31 @@ def _asset_exists(asset_rel_path: str) -> bool:
     return target.exists() and target.is_file()
 
 
-def _resolve_slot_thumbnail(slot: dict[str, Any] | None, source_prefix: str) -> tuple[str, str]:
+def _slot_thumbnail_candidates(slot: dict[str, Any] | None, source_prefix: str) -> list[tuple[str, str]]:
     if not isinstance(slot, dict):
-        return "", ""
+        return []
 
     alternatives = [item for item in slot.get("alternatives", []) if isinstance(item, dict)]
     if not alternatives:
-        return "", ""
+        return []
 
+    candidates: list[tuple[str, str]] = []
     active_id = str(slot.get("active_id", "")).strip()
     if active_id:
         active_candidate = next((item for item in alternatives if str(item.get("id", "")).strip() == active_id), None)
         if active_candidate:
             rel_path = _normalize_asset_rel_path(str(active_candidate.get("asset_rel_path", "")))
-            if _asset_exists(rel_path):
-                return rel_path, f"{source_prefix}_active"
+            candidates.append((rel_path, f"{source_prefix}_active"))
 
     for candidate in alternatives:
         rel_path = _normalize_asset_rel_path(str(candidate.get("asset_rel_path", "")))
-        if _asset_exists(rel_path):
-            return rel_path, f"{source_prefix}_fallback"
-
-    return "", ""
+        candidates.append((rel_path, f"{source_prefix}_fallback"))
+    return candidates
 
 
-def _resolve_story_thumbnail(story_payload: dict[str, Any]) -> tuple[str, str]:
-    cover_rel, cover_source = _resolve_slot_thumbnail(story_payload.get("cover"), "cover")
-    if cover_rel:
-        return cover_rel, cover_source
+def _story_thumbnail_candidates(story_payload: dict[str, Any]) -> list[tuple[str, str]]:
+    # Orden de preferencia: portada (activa y resto) y despues la principal de cada pagina.
+    candidates = _slot_thumbnail_candidates(story_payload.get("cover"), "cover")
 
     pages = [item for item in story_payload.get("pages", []) if isinstance(item, dict)]
     pages.sort(key=lambda item: int(item.get("page_number", 0)))
@@ -88,10 +99,14 @@ def _resolve_story_thumbnail(story_payload: dict[str, Any]) -> tuple[str, str]:
         images = page.get("images", {})
         if not isinstance(images, dict):
             continue
-        rel_path, source = _resolve_slot_thumbnail(images.get("main"), "main")
-        if rel_path:
-            return rel_path, source
+        candidates.extend(_slot_thumbnail_candidates(images.get("main"), "main"))
+    return candidates
 
+
+def _pick_thumbnail(candidates: list[tuple[str, str]]) -> tuple[str, str]:
+    for rel_path, source in candidates:
+        if _asset_exists(rel_path):
+            return rel_path, source
     return "", "placeholder"
 
 
@@ -124,7 +139,35 @@ def _story_counts(story_payload: dict[str, Any]) -> tuple[int, int, int]:
     return pages_count, slots_count, alternatives_count
 
 
-def _build_catalog() -> dict[str, Any]:
+def _build_story_summary(
+    story_rel_path: str,
+    story_payload: dict[str, Any],
+    thumb_candidates: list[tuple[str, str]],
+) -> dict[str, Any]:
+    story_id = str(story_payload.get("story_id", "")).strip() or Path(story_rel_path).name
+    title = str(story_payload.get("title", "")).strip() or f"Cuento {story_id}"
+    status = str(story_payload.get("status", "draft")).strip() or "draft"
+    book_rel_path = _normalize_rel_path(str(story_payload.get("book_rel_path", "")))
+
+    pages_count, slots_count, alternatives_count = _story_counts(story_payload)
+    thumb_rel_path, thumb_source = _pick_thumbnail(thumb_candidates)
+
+    return {
+        "story_rel_path": story_rel_path,
+        "story_id": story_id,
+        "title": title,
+        "status": status,
+        "book_rel_path": book_rel_path,
+        "pages": pages_count,
+        "slots": slots_count,
+        "alternatives": alternatives_count,
+        "thumb_rel_path": thumb_rel_path,
+        "thumb_source": thumb_source,
+        "thumb_exists": bool(thumb_rel_path),
+    }
+
+
+def _assemble_catalog(summaries: dict[str, dict[str, Any] | None]) -> dict[str, Any]:
     nodes: dict[str, dict[str, Any]] = {}
     stories: dict[str, dict[str, Any]] = {}
 
@@ -134,38 +177,17 @@ def _build_catalog() -> dict[str, Any]:
     slots_total = 0
     alternatives_total = 0
 
-    for story_file in list_story_json_files():
-        try:
-            story_rel_path = json_path_to_story_rel(story_file)
-            story_payload = load_story(story_rel_path)
-        except (FileNotFoundError, StoryStoreError, ValueError):
+    for story_rel_path in sorted(summaries):
+        summary = summaries[story_rel_path]
+        if summary is None:
             continue
 
-        story_id = str(story_payload.get("story_id", "")).strip() or Path(story_rel_path).name
-        title = str(story_payload.get("title", "")).strip() or f"Cuento {story_id}"
-        status = str(story_payload.get("status", "draft")).strip() or "draft"
-        book_rel_path = _normalize_rel_path(str(story_payload.get("book_rel_path", "")))
-
-        pages_count, slots_count, alternatives_count = _story_counts(story_payload)
-        pages_total += pages_count
-        slots_total += slots_count
-        alternatives_total += alternatives_count
-        thumb_rel_path, thumb_source = _resolve_story_thumbnail(story_payload)
-
-        stories[story_rel_path] = {
-            "story_rel_path": story_rel_path,
-            "story_id": story_id,
-            "title": title,
-            "status": status,
-            "book_rel_path": book_rel_path,
-            "pages": pages_count,
-            "slots": slots_count,
-            "alternatives": alternatives_count,
-            "thumb_rel_path": thumb_rel_path,
-            "thumb_source": thumb_source,
-            "thumb_exists": bool(thumb_rel_path),
-        }
+        pages_total += int(summary["pages"])
+        slots_total += int(summary["slots"])
+        alternatives_total += int(summary["alternatives"])
+        stories[story_rel_path] = summary
 
+        book_rel_path = summary["book_rel_path"]
         if book_rel_path:
             current = ""
             for part in [item for item in book_rel_path.split("/") if item]:
@@ -177,7 +199,7 @@ def _build_catalog() -> dict[str, Any]:
 
         story_node = _ensure_node(nodes, story_rel_path)
         story_node["is_story_leaf"] = True
-        story_node["name"] = story_id
+        story_node["name"] = summary["story_id"]
 
     counts = {
         "nodes": len(nodes),
@@ -194,14 +216,175 @@ def _build_catalog() -> dict[str, Any]:
     }
 
 
+def _thumbnail_dir_stamps(candidates: list[tuple[str, str]]) -> tuple[tuple[str, int | None], ...]:
+    # Crear o borrar una imagen cambia el mtime de su carpeta: basta con vigilar esas carpetas.
+    stamps: list[tuple[str, int | None]] = []
+    for directory in sorted({(ROOT_DIR / rel_path).parent.as_posix() for rel_path, _source in candidates if rel_path}):
+        try:
+            stamps.append((directory, os.stat(directory).st_mtime_ns))
+        except OSError:
+            stamps.append((directory, None))
+    return tuple(stamps)
+
+
+# Indice persistente en proceso. Las escrituras del propio proceso llegan como eventos y solo
+# re-parsean el cuento afectado. El recorrido de library/ con huellas (mtime_ns, size) de cada
+# NN.json solo se repite si otro proceso toco el marcador del store o cada CATALOG_RESCAN_SECONDS
+# (cambios hechos fuera de la app). En ese recorrido la miniatura se revisa solo si cambio el
+# mtime de alguna carpeta con imagenes candidatas.
+class CatalogIndex:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_scan = 0.0
+        self._change_stamp: int | None = None
+        self._fingerprints: dict[str, tuple[int, int]] = {}
+        self._summaries: dict[str, dict[str, Any] | None] = {}
+        self._thumb_candidates: dict[str, list[tuple[str, str]]] = {}
+        self._thumb_dir_stamps: dict[str, tuple[tuple[str, int | None], ...]] = {}
+        self._dirty_stories: set[str] = set()
+        self._catalog: dict[str, Any] | None = None
+
+    def on_store_change(self, kind: str, rel_path: str) -> None:
+        if kind != STORE_CHANGE_STORY:
+            return
+        normalized = _normalize_rel_path(rel_path)
+        with self._lock:
+            self._dirty_stories.add(normalized)
+
+    def _drop_story(self, story_rel_path: str) -> bool:
+        if story_rel_path not in self._fingerprints:
+            return False
+        del self._fingerprints[story_rel_path]
+        del self._summaries[story_rel_path]
+        self._thumb_candidates.pop(story_rel_path, None)
+        self._thumb_dir_stamps.pop(story_rel_path, None)
+        return True
+
+    def _refresh_thumbnail(self, story_rel_path: str) -> bool:
+        candidates = self._thumb_candidates.get(story_rel_path, [])
+        dir_stamps = _thumbnail_dir_stamps(candidates)
+        if dir_stamps == self._thumb_dir_stamps.get(story_rel_path):
+            return False
+        self._thumb_dir_stamps[story_rel_path] = dir_stamps
+
+        summary = self._summaries.get(story_rel_path)
+        if summary is None:
+            return False
+        thumb_rel_path, thumb_source = _pick_thumbnail(candidates)
+        if (thumb_rel_path, thumb_source) == (summary["thumb_rel_path"], summary["thumb_source"]):
+            return False
+        # Copia nueva: el catalogo anterior puede seguir en uso en otro hilo.
+        self._summaries[story_rel_path] = dict(
+            summary,
+            thumb_rel_path=thumb_rel_path,
+            thumb_source=thumb_source,
+            thumb_exists=bool(thumb_rel_path),
+        )
+        return True
+
+    def _refresh_story(self, story_rel_path: str, story_file: Path) -> bool:
+        try:
+            stat = story_file.stat()
+        except OSError:
+            return self._drop_story(story_rel_path)
+
+        fingerprint = (stat.st_mtime_ns, stat.st_size)
+        if self._fingerprints.get(story_rel_path) == fingerprint:
+            return self._refresh_thumbnail(story_rel_path)
+
+        try:
+            story_payload = load_story(story_rel_path)
+            thumb_candidates = _story_thumbnail_candidates(story_payload)
+            # Huella de carpetas antes de mirar las imagenes: un alta simultanea se ve en la siguiente pasada.
+            dir_stamps = _thumbnail_dir_stamps(thumb_candidates)
+            summary: dict[str, Any] | None = _build_story_summary(story_rel_path, story_payload, thumb_candidates)
+        except (FileNotFoundError, StoryStoreError, ValueError):
+            thumb_candidates = []
+            dir_stamps = ()
+            summary = None
+
+        self._fingerprints[story_rel_path] = fingerprint
+        self._thumb_candidates[story_rel_path] = thumb_candidates
+        self._thumb_dir_stamps[story_rel_path] = dir_stamps
+        self._summaries[story_rel_path] = summary
+        return True
+
+    def _scan(self) -> bool:
+        changed = False
+        seen: set[str] = set()
+
+        for story_file in list_story_json_files():
+            try:
+                story_rel_path = json_path_to_story_rel(story_file)
+            except (StoryStoreError, ValueError):
+                continue
+            seen.add(story_rel_path)
+            if self._refresh_story(story_rel_path, story_file):
+                changed = True
+
+        for story_rel_path in set(self._fingerprints) - seen:
+            if self._drop_story(story_rel_path):
+                changed = True
+
+        self._loaded = True
+        self._last_scan = time.monotonic()
+        return changed
+
+    def _refresh(self) -> bool:
+        change_stamp = store_change_stamp()
+        if self._loaded and change_stamp != self._change_stamp and is_own_store_change(self._change_stamp, change_stamp):
+            # Marcador tocado solo por escrituras de este proceso: on_store_change ya marco los cuentos.
+            self._change_stamp = change_stamp
+
+        if (
+            not self._loaded
+            or change_stamp != self._change_stamp
+            or time.monotonic() - self._last_scan >= CATALOG_RESCAN_SECONDS
+        ):
+            self._change_stamp = change_stamp
+            self._dirty_stories.clear()
+            return self._scan()
+
+        changed = False
+        dirty_stories = sorted(self._dirty_stories)
+        self._dirty_stories.clear()
+        for story_rel_path in dirty_stories:
+            top_level = story_rel_path.split("/", 1)[0]
+            if top_level in STORY_EXCLUDED_TOP_LEVEL_DIRS:
+                continue
+            try:
+                story_file = story_rel_to_json_path(story_rel_path)
+            except StoryStoreError:
+                continue
+            if self._refresh_story(story_rel_path, story_file):
+                changed = True
+        return changed
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            if self._refresh() or self._catalog is None:
+                self._catalog = _assemble_catalog(self._summaries)
+            return self._catalog
+
+
+_CATALOG_INDEX = CatalogIndex()
+add_store_listener(_CATALOG_INDEX.on_store_change)
+
+
+def _build_catalog() -> dict[str, Any]:
+    return _CATALOG_INDEX.snapshot()
+
+
 def catalog_counts() -> dict[str, int]:
-    return _build_catalog()["counts"]
+    return dict(_build_catalog()["counts"])
 
 
 def get_node(path_rel: str) -> dict[str, Any] | None:
     catalog = _build_catalog()
     normalized = _normalize_rel_path(path_rel)
-    return catalog["nodes"].get(normalized)
+    node = catalog["nodes"].get(normalized)
+    return dict(node) if node else None
 
 
 def list_children(parent_path_rel: str) -> list[dict[str, Any]]:
@@ -217,7 +400,7 @@ def list_children(parent_path_rel: str) -> list[dict[str, Any]]:
         if item.get("is_story_leaf"):
             summary = catalog["stories"].get(item["path_rel"])
             if summary:
-                item["story_summary"] = summary
+                item["story_summary"] = dict(summary)
         rows.append(item)
 
     rows.sort(key=lambda item: (0 if not item["is_story_leaf"] else 1, item["name"].lower()))
@@ -227,4 +410,5 @@ def list_children(parent_path_rel: str) -> list[dict[str, Any]]:
 def get_story_summary(story_rel_path: str) -> dict[str, Any] | None:
     catalog = _build_catalog()
     normalized = _normalize_rel_path(story_rel_path)
-    return catalog["stories"].get(normalized)
+    summary = catalog["stories"].get(normalized)
+    return dict(summary) if summary else None
@@ -8,3 +8,22 @@ LIBRARY_ROOT = ROOT_DIR / "library"
 APP_TITLE = "Generador de cuentos ilustrados"
 APP_SECRET_KEY = "story-generator-local-dev"
 UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_FLOW_RESCAN_SECONDS = 10.0
+# Cada cuanto el catalogo vuelve a recorrer library/ para ver cambios hechos fuera de la app.
+CATALOG_RESCAN_SECONDS = 10.0
+CACHE_ROOT = LIBRARY_ROOT / "_cache"
+MEDIA_CACHE_DIR = CACHE_ROOT / "media"
+PDF_IMAGE_CACHE_DIR = CACHE_ROOT / "pdf_images"
+STORE_LOCK_DIR = CACHE_ROOT / "locks"
+# Se toca en cada escritura del store: los demas procesos (workers de `serve`) detectan cambios por su mtime.
+STORE_CHANGE_MARKER = CACHE_ROOT / "store.changed"
+PDF_EXPORT_JOBS_DIR = CACHE_ROOT / "export_jobs"
+MEDIA_DERIVATIVE_WIDTHS = (160, 320, 480, 640, 960, 1280, 1920)
+MEDIA_THUMB_WIDTH = 480
+MEDIA_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+PDF_EXPORT_WORKERS = 1
+# Directorios de fuentes adicionales para el PDF; se buscan antes que fontconfig y las rutas del sistema.
+PDF_FONT_DIRS: tuple[Path, ...] = ()
+PDF_EXPORT_JOBS_KEPT = 50
+# Backend JSON del store: "auto" usa orjson si esta instalado; "json" fuerza la libreria estandar.
+JSON_BACKEND = "auto"
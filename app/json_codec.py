@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from .config import JSON_BACKEND
+
+JSON_BACKENDS = ("auto", "orjson", "json")
+UTF8_BOM = b"\xef\xbb\xbf"
+
+
+class JsonCodecError(RuntimeError):
+    pass
+
+
+def _resolve_backend(backend: str) -> tuple[str, Any]:
+    value = backend.strip().lower()
+    if value not in JSON_BACKENDS:
+        raise JsonCodecError(f"backend JSON invalido: {backend}")
+    if value == "json":
+        return "json", None
+
+    try:
+        import orjson
+    except ImportError as exc:
+        if value == "orjson":
+            raise JsonCodecError("Falta dependencia 'orjson'. Instala con: pipenv install orjson") from exc
+        return "json", None
+    return "orjson", orjson
+
+
+JSON_BACKEND_NAME, _ORJSON = _resolve_backend(JSON_BACKEND)
+
+
+def loads(data: bytes | str) -> Any:
+    # Se parsea directamente desde los bytes del archivo, sin decodificar antes a str.
+    # Los errores de orjson heredan de json.JSONDecodeError: los except existentes siguen valiendo.
+    if isinstance(data, bytes):
+        if data.startswith(UTF8_BOM):
+            data = data[len(UTF8_BOM) :]
+    elif data.startswith("\ufeff"):
+        data = data[1:]
+
+    if _ORJSON is not None:
+        return _ORJSON.loads(data)
+    return json.loads(data)
+
+
+def dumps_pretty(value: Any) -> bytes:
+    # Mismo texto que json.dumps(value, indent=2, ensure_ascii=False) en UTF-8, con cualquier backend:
+    # cambiar de backend no genera diffs en git. Unica diferencia conocida: floats en notacion
+    # exponencial (1e-07 frente a 1e-7); los payloads del store no contienen floats.
+    if _ORJSON is not None:
+        try:
+            return _ORJSON.dumps(value, option=_ORJSON.OPT_INDENT_2)
+        except TypeError:
+            # Claves no str o enteros de mas de 64 bits: los serializa la libreria estandar.
+            pass
+    return json.dumps(value, indent=2, ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import uuid
+from pathlib import Path
+from typing import Any
+
+from .config import MEDIA_CACHE_DIR, MEDIA_DERIVATIVE_WIDTHS
+
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "jpg": ("JPEG", "image/jpeg", "jpg"),
+    "png": ("PNG", "image/png", "png"),
+}
+DERIVATIVE_QUALITY = 82
+# Se incrementa si cambia el algoritmo de generacion para invalidar la cache en disco.
+DERIVATIVE_VERSION = 2
+CONTENT_HASH_CHUNK_BYTES = 1024 * 1024
+
+_CONTENT_ETAGS: dict[str, tuple[tuple[int, int, int], str]] = {}
+_CONTENT_ETAGS_LOCK = threading.Lock()
+
+
+class MediaDerivativeError(ValueError):
+    pass
+
+
+def normalize_derivative_width(raw_value: Any) -> int:
+    try:
+        requested = int(str(raw_value))
+    except (TypeError, ValueError) as exc:
+        raise MediaDerivativeError(f"ancho invalido: {raw_value}") from exc
+    if requested <= 0:
+        raise MediaDerivativeError(f"ancho invalido: {raw_value}")
+
+    # Solo se generan anchos de la lista cerrada para acotar la cache en disco.
+    for width in sorted(MEDIA_DERIVATIVE_WIDTHS):
+        if width >= requested:
+            return width
+    return max(MEDIA_DERIVATIVE_WIDTHS)
+
+
+def normalize_derivative_format(raw_value: str | None) -> str:
+    value = (raw_value or "webp").strip().lower()
+    if value not in DERIVATIVE_FORMATS:
+        raise MediaDerivativeError(f"formato invalido: {raw_value}")
+    return "jpeg" if value == "jpg" else value
+
+
+def media_content_etag(source: Path) -> str:
+    stat = source.stat()
+    fingerprint = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cache_key = str(source)
+    with _CONTENT_ETAGS_LOCK:
+        cached = _CONTENT_ETAGS.get(cache_key)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    # El hash se calcula una vez por version del archivo; las siguientes peticiones solo hacen stat.
+    digest = hashlib.sha1()
+    with source.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(CONTENT_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    etag = digest.hexdigest()
+    with _CONTENT_ETAGS_LOCK:
+        _CONTENT_ETAGS[cache_key] = (fingerprint, etag)
+    return etag
+
+
+def derivative_key(source: Path, *, width: int, fmt: str) -> str:
+    raw = "|".join(
+        [
+            str(DERIVATIVE_VERSION),
+            media_content_etag(source),
+            str(width),
+            fmt,
+            str(DERIVATIVE_QUALITY),
+        ]
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _render_derivative(source: Path, target: Path, *, width: int, fmt: str) -> None:
+    from PIL import Image
+
+    pil_format = DERIVATIVE_FORMATS[fmt][0]
+    with Image.open(source) as image:
+        image.load()
+        if image.width > width:
+            height = max(1, round(image.height * (width / image.width)))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+        has_alpha = image.mode in {"RGBA", "LA"} or (image.mode == "P" and "transparency" in image.info)
+        if pil_format == "JPEG":
+            if has_alpha:
+                rgba = image.convert("RGBA")
+                flattened = Image.new("RGB", rgba.size, (255, 255, 255))
+                flattened.paste(rgba, mask=rgba.split()[-1])
+                image = flattened
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+        elif image.mode not in {"RGB", "RGBA"}:
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+        temp_file = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+        save_kwargs: dict[str, Any] = {"format": pil_format}
+        if pil_format in {"WEBP", "JPEG"}:
+            save_kwargs["quality"] = DERIVATIVE_QUALITY
+        if pil_format == "JPEG":
+            save_kwargs["optimize"] = True
+            save_kwargs["progressive"] = True
+        if pil_format == "PNG":
+            save_kwargs["optimize"] = True
+        try:
+            image.save(temp_file, **save_kwargs)
+            temp_file.replace(target)
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
+
+
+def get_media_derivative(source: Path, *, source_rel_path: str, width: int, fmt: str) -> dict[str, Any]:
+    if not source.exists() or not source.is_file():
+        raise FileNotFoundError(f"No existe imagen origen: {source}")
+
+    key = derivative_key(source, width=width, fmt=fmt)
+    _pil_format, mime_type, extension = DERIVATIVE_FORMATS[fmt]
+    target = MEDIA_CACHE_DIR / key[:2] / f"{key}.{extension}"
+
+    if not target.exists():
+        try:
+            import PIL  # noqa: F401
+        except ImportError as exc:
+            raise MediaDerivativeError("Falta dependencia 'pillow' para generar derivados.") from exc
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            _render_derivative(source, target, width=width, fmt=fmt)
+        except OSError as exc:
+            raise MediaDerivativeError(f"No se pudo generar derivado de {source_rel_path}: {exc}") from exc
+
+    return {
+        "path": target,
+        "etag": key,
+        "mime_type": mime_type,
+    }
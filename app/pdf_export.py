@@ -1,13 +1,27 @@
 from __future__ import annotations
 
+import hashlib
 import io
+import json
+import math
+import os
 import re
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Any
+from xml.etree import ElementTree
 
 from PIL import Image
 
-from .config import LIBRARY_ROOT, ROOT_DIR
+from .config import LIBRARY_ROOT, PDF_FONT_DIRS, PDF_IMAGE_CACHE_DIR, ROOT_DIR
+from .media_derivatives import media_content_etag
 from .story_progress import (
     SLOT_STATE_COMPLETED,
     SLOT_STATE_NOT_REQUIRED,
@@ -16,7 +30,40 @@ from .story_progress import (
     resolve_active_asset_path,
     slot_state,
 )
-from .story_store import load_story
+from .story_store import StoryStoreError, json_path_to_story_rel, list_story_json_files, load_story
+
+
+# Resolucion de impresion: las imagenes se reducen a este DPI para el tamano fisico de la pagina.
+PDF_PRINT_DPI = 300
+PDF_IMAGE_JPEG_QUALITY = 90
+# Se incrementa si cambia la preparacion de imagenes para invalidar la cache en disco.
+PDF_IMAGE_CACHE_VERSION = 1
+# Se incrementa si cambia la maquetacion para forzar la re-exportacion de PDF ya generados.
+PDF_BUILD_MANIFEST_VERSION = 1
+# Paginas por bloque temporal al exportar: acota la memoria de ReportLab con independencia del cuento.
+PDF_EXPORT_CHUNK_PAGES = 12
+PT_PER_INCH = 72.0
+PDF_TEXT_FONT_SIZES = (18.0, 17.5, 17.0, 16.5, 16.0, 15.5, 15.0, 14.5, 14.0)
+PDF_TITLE_FONT_SIZES = (44.0, 40.0, 36.0, 32.0, 28.0, 24.0)
+
+# Familias en orden de preferencia: (prefijo, archivos regular, archivos bold), nombres en minusculas.
+# Gelasio y Caladea son las alternativas libres con metricas de Georgia y Cambria habituales en Linux.
+PDF_FONT_FAMILIES = (
+    ("StoryGaramond", ("gara.ttf",), ("garabd.ttf",)),
+    ("StoryPalatino", ("pala.ttf",), ("palab.ttf",)),
+    ("StoryGeorgia", ("georgia.ttf",), ("georgiab.ttf",)),
+    ("StoryCambria", ("cambria.ttf", "cambria.ttc"), ("cambriab.ttf",)),
+    ("StoryGelasio", ("gelasio-regular.ttf",), ("gelasio-bold.ttf",)),
+    ("StoryCaladea", ("caladea-regular.ttf",), ("caladea-bold.ttf",)),
+    ("StoryLiberationSerif", ("liberationserif-regular.ttf",), ("liberationserif-bold.ttf",)),
+    ("StoryDejaVuSerif", ("dejavuserif.ttf",), ("dejavuserif-bold.ttf",)),
+)
+PDF_FONT_SUFFIXES = {".ttf", ".ttc"}
+# Anchos de palabra memorizados (fuente, texto): acotado, un proceso largo exporta muchos cuentos distintos.
+PDF_TEXT_UNITS_CACHE_SIZE = 16384
+
+_RESOLVED_PDF_FONTS: dict[str, str] = {}
+_PDF_FONTS_LOCK = threading.Lock()
 
 
 class PdfExportError(RuntimeError):
@@ -157,7 +204,10 @@ def _validate_secondary_slot(
     ]
 
 
-def validate_story_for_pdf(*, story_rel_path: str) -> dict[str, Any]:
+def validate_story_for_pdf(*, story_rel_path: str, size_cm: float = 20.0) -> dict[str, Any]:
+    if size_cm <= 0:
+        raise PdfExportError("size_cm debe ser mayor que 0.")
+
     normalized_story = _normalize_rel_path(story_rel_path)
     payload = load_story(normalized_story)
 
@@ -213,17 +263,81 @@ def validate_story_for_pdf(*, story_rel_path: str) -> dict[str, Any]:
             )
         )
 
+    errors.extend(_validate_text_layout(payload, size_cm=size_cm))
+
     return {
         "story_rel_path": normalized_story,
         "story_id": str(payload.get("story_id", "")).strip(),
         "title": str(payload.get("title", "")).strip(),
         "book_rel_path": _normalize_rel_path(str(payload.get("book_rel_path", ""))),
         "page_count": len(_sorted_pages(payload)),
+        "size_cm": float(size_cm),
         "is_valid": not errors,
         "errors": errors,
     }
 
 
+def _validate_text_layout(payload: dict[str, Any], *, size_cm: float) -> list[dict[str, Any]]:
+    # Mismo ajuste que el render (fuentes resueltas, sin tocar imagenes): un text_overflow falla antes de exportar.
+    _rl_canvas, pdfmetrics_mod, _image_reader_cls, _colors_mod, rl_cm, ttfont_cls = _require_reportlab()
+    fonts = _resolve_pdf_fonts(pdfmetrics_mod=pdfmetrics_mod, ttfont_cls=ttfont_cls)
+    page_size = float(size_cm) * rl_cm
+    errors: list[dict[str, Any]] = []
+
+    title = str(payload.get("title", "")).strip() or "Sin titulo"
+    _title_x, _title_y, title_w, title_h = _cover_title_box(page_size)
+    title_fit = _fit_cover_title(
+        title=title,
+        pdfmetrics_mod=pdfmetrics_mod,
+        font_name=fonts["bold"],
+        max_width=title_w,
+        max_height=title_h,
+    )
+    if title_fit is None:
+        errors.append(
+            _build_validation_error(
+                code="text_overflow",
+                item_type="cover",
+                slot_name="title",
+                page_number=None,
+                state="overflow",
+                message="El titulo no cabe en la banda superior de la portada.",
+            )
+        )
+
+    _text_x, _text_y, text_w, text_h = _text_page_box(page_size)
+    for page in _sorted_pages(payload):
+        try:
+            page_number = int(page.get("page_number", 0))
+        except (TypeError, ValueError):
+            continue
+        if page_number <= 0:
+            continue
+
+        text_fit = _fit_text_block(
+            text=_normalize_story_text(str(page.get("text", ""))),
+            pdfmetrics_mod=pdfmetrics_mod,
+            font_name=fonts["regular"],
+            max_width=text_w,
+            max_height=text_h,
+        )
+        if text_fit is None:
+            errors.append(
+                _build_validation_error(
+                    code="text_overflow",
+                    item_type="text",
+                    slot_name="text",
+                    page_number=page_number,
+                    state="overflow",
+                    message="El texto excede el area de la pagina incluso reduciendo de 18pt a 14pt.",
+                )
+            )
+
+    return errors
+
+
+# Se ejecuta una vez por proceso: importa ReportLab y fija su configuracion global (ver useA85).
+@lru_cache(maxsize=None)
 def _require_reportlab() -> tuple[Any, Any, Any, Any, Any, Any]:
     try:
         from reportlab.lib import colors
@@ -236,9 +350,41 @@ def _require_reportlab() -> tuple[Any, Any, Any, Any, Any, Any]:
         raise PdfExportError(
             "Falta dependencia 'reportlab'. Instala con: pipenv install reportlab"
         ) from exc
+
+    from reportlab import rl_config
+
+    # ASCII85 solo sirve para PDF de 7 bits; en Python puro domina el tiempo de exportacion y engorda el archivo.
+    # Canvas no acepta la opcion por documento (ReportLab lee rl_config.useA85 al dibujar y guardar), asi que
+    # es un ajuste deliberado de todo el proceso: este modulo es el unico que genera PDF con ReportLab.
+    rl_config.useA85 = 0
     return rl_canvas, pdfmetrics, ImageReader, colors, rl_cm, TTFont
 
 
+def _require_pdfium() -> Any:
+    try:
+        import pypdfium2 as pdfium
+    except ImportError as exc:
+        raise PdfExportError(
+            "Falta dependencia 'pypdfium2'. Instala con: pipenv install pypdfium2"
+        ) from exc
+    return pdfium
+
+
+def _concat_pdf_files(sources: list[Path], output: Path) -> None:
+    pdfium = _require_pdfium()
+    merged = pdfium.PdfDocument.new()
+    try:
+        for source_path in sources:
+            source = pdfium.PdfDocument(str(source_path))
+            try:
+                merged.import_pages(source)
+            finally:
+                source.close()
+        merged.save(str(output))
+    finally:
+        merged.close()
+
+
 def _default_output_path(payload: dict[str, Any]) -> Path:
     story_id = str(payload.get("story_id", "")).strip() or "00"
     book_rel_path = _normalize_rel_path(str(payload.get("book_rel_path", "")))
@@ -257,68 +403,140 @@ def _resolve_output_path(output_path: str | Path | None, payload: dict[str, Any]
     return (ROOT_DIR / raw).resolve()
 
 
-def _register_font_from_candidates(
+def _default_font_dirs() -> list[Path]:
+    home = Path.home()
+    dirs: list[Path] = []
+    if os.name == "nt":
+        dirs.append(Path(os.environ.get("WINDIR", r"C:\Windows")) / "Fonts")
+        local_app_data = os.environ.get("LOCALAPPDATA")
+        if local_app_data:
+            dirs.append(Path(local_app_data) / "Microsoft" / "Windows" / "Fonts")
+    dirs.extend(
+        [
+            home / ".local" / "share" / "fonts",
+            home / ".fonts",
+            Path("/usr/local/share/fonts"),
+            Path("/usr/share/fonts"),
+            home / "Library" / "Fonts",
+            Path("/Library/Fonts"),
+            Path("/System/Library/Fonts"),
+        ]
+    )
+    return dirs
+
+
+def _fontconfig_font_files() -> list[Path]:
+    fc_list = shutil.which("fc-list")
+    if not fc_list:
+        return []
+    try:
+        completed = subprocess.run(
+            [fc_list, "--format", "%{file}\n"],
+            capture_output=True,
+            text=True,
+            timeout=15,
+            check=False,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return []
+    if completed.returncode != 0:
+        return []
+    return [Path(line.strip()) for line in completed.stdout.splitlines() if line.strip()]
+
+
+def _fontconfig_dirs() -> list[Path]:
+    # Sin fc-list se leen los <dir> de fonts.conf: son los directorios que indexaria fontconfig.
+    config_file = Path(os.environ.get("FONTCONFIG_FILE") or "/etc/fonts/fonts.conf")
+    try:
+        root = ElementTree.parse(config_file).getroot()
+    except (OSError, ElementTree.ParseError):
+        return []
+
+    xdg_data_home = Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share")
+    dirs: list[Path] = []
+    for node in root.iter("dir"):
+        raw = (node.text or "").strip()
+        if not raw:
+            continue
+        dirs.append(xdg_data_home / raw if node.get("prefix") == "xdg" else Path(raw).expanduser())
+    return dirs
+
+
+def _iter_font_files(dirs: list[Path]) -> Iterator[Path]:
+    for font_dir in dirs:
+        if not font_dir.is_dir():
+            continue
+        for dirpath, _dirnames, filenames in os.walk(font_dir):
+            for filename in sorted(filenames):
+                if Path(filename).suffix.lower() in PDF_FONT_SUFFIXES:
+                    yield Path(dirpath) / filename
+
+
+def _build_font_file_index() -> dict[str, Path]:
+    # Nombre de archivo en minusculas -> primera ruta encontrada; PDF_FONT_DIRS tiene prioridad sobre el sistema.
+    configured_dirs = [Path(item).expanduser() for item in PDF_FONT_DIRS]
+    sources = [
+        _iter_font_files(configured_dirs),
+        _fontconfig_font_files(),
+        _iter_font_files(_fontconfig_dirs() + _default_font_dirs()),
+    ]
+    index: dict[str, Path] = {}
+    for source in sources:
+        for font_file in source:
+            index.setdefault(font_file.name.lower(), font_file)
+    return index
+
+
+def _load_ttfont(
     *,
-    pdfmetrics_mod: Any,
     ttfont_cls: Any,
     font_name: str,
-    paths: list[str],
-) -> str | None:
-    for raw_path in paths:
-        candidate = Path(raw_path)
-        if not candidate.exists():
+    file_names: tuple[str, ...],
+    index: dict[str, Path],
+) -> Any | None:
+    for file_name in file_names:
+        font_file = index.get(file_name)
+        if font_file is None:
             continue
         try:
-            pdfmetrics_mod.registerFont(ttfont_cls(font_name, str(candidate)))
-            return font_name
+            return ttfont_cls(font_name, str(font_file))
         except Exception:
             continue
     return None
 
 
 def _resolve_pdf_fonts(*, pdfmetrics_mod: Any, ttfont_cls: Any) -> dict[str, str]:
-    families = [
-        (
-            "StoryGaramond",
-            [r"C:\Windows\Fonts\gara.ttf", r"C:\Windows\Fonts\GARA.TTF"],
-            [r"C:\Windows\Fonts\garabd.ttf", r"C:\Windows\Fonts\GARABD.TTF"],
-        ),
-        (
-            "StoryPalatino",
-            [r"C:\Windows\Fonts\pala.ttf", r"C:\Windows\Fonts\PALA.TTF"],
-            [r"C:\Windows\Fonts\palab.ttf", r"C:\Windows\Fonts\PALAB.TTF"],
-        ),
-        (
-            "StoryGeorgia",
-            [r"C:\Windows\Fonts\georgia.ttf"],
-            [r"C:\Windows\Fonts\georgiab.ttf"],
-        ),
-        (
-            "StoryCambria",
-            [r"C:\Windows\Fonts\cambria.ttf", r"C:\Windows\Fonts\cambria.ttc"],
-            [r"C:\Windows\Fonts\cambriab.ttf"],
-        ),
-    ]
-
-    for prefix, regular_paths, bold_paths in families:
-        regular_name = f"{prefix}-Regular"
-        bold_name = f"{prefix}-Bold"
-        regular_ok = _register_font_from_candidates(
-            pdfmetrics_mod=pdfmetrics_mod,
-            ttfont_cls=ttfont_cls,
-            font_name=regular_name,
-            paths=regular_paths,
-        )
-        bold_ok = _register_font_from_candidates(
-            pdfmetrics_mod=pdfmetrics_mod,
-            ttfont_cls=ttfont_cls,
-            font_name=bold_name,
-            paths=bold_paths,
-        )
-        if regular_ok and bold_ok:
-            return {"regular": regular_name, "bold": bold_name}
+    # Se resuelve una vez por proceso: el indice de archivos y el parseo de TTFont se reutilizan en lotes y en la web.
+    with _PDF_FONTS_LOCK:
+        if _RESOLVED_PDF_FONTS:
+            return dict(_RESOLVED_PDF_FONTS)
+
+        index = _build_font_file_index()
+        resolved = {"regular": "Times-Roman", "bold": "Times-Bold"}
+        for prefix, regular_files, bold_files in PDF_FONT_FAMILIES:
+            regular_name = f"{prefix}-Regular"
+            bold_name = f"{prefix}-Bold"
+            regular_font = _load_ttfont(
+                ttfont_cls=ttfont_cls,
+                font_name=regular_name,
+                file_names=regular_files,
+                index=index,
+            )
+            bold_font = _load_ttfont(
+                ttfont_cls=ttfont_cls,
+                font_name=bold_name,
+                file_names=bold_files,
+                index=index,
+            )
+            if regular_font is None or bold_font is None:
+                continue
+            pdfmetrics_mod.registerFont(regular_font)
+            pdfmetrics_mod.registerFont(bold_font)
+            resolved = {"regular": regular_name, "bold": bold_name}
+            break
 
-    return {"regular": "Times-Roman", "bold": "Times-Bold"}
+        _RESOLVED_PDF_FONTS.update(resolved)
+        return dict(resolved)
 
 
 def _humanize_book_rel_path(book_rel_path: str) -> str:
@@ -399,6 +617,37 @@ def _normalize_story_text(text: str) -> str:
     return "\n\n".join(polished_blocks)
 
 
+@lru_cache(maxsize=PDF_TEXT_UNITS_CACHE_SIZE)
+def _text_units(pdfmetrics_mod: Any, font_name: str, text: str) -> float:
+    # Ancho en unidades de fuente (1/1000 em): independiente del tamano, sirve para todos los tamanos probados.
+    return pdfmetrics_mod.stringWidth(text, font_name, 1000.0)
+
+
+def _split_word_to_width(
+    word: str,
+    *,
+    pdfmetrics_mod: Any,
+    font_name: str,
+    max_units: float,
+) -> list[tuple[str, float]]:
+    chunks: list[tuple[str, float]] = []
+    chunk = ""
+    chunk_units = 0.0
+    for char in word:
+        char_units = _text_units(pdfmetrics_mod, font_name, char)
+        if chunk_units + char_units <= max_units:
+            chunk += char
+            chunk_units += char_units
+            continue
+        if chunk:
+            chunks.append((chunk, chunk_units))
+        chunk = char
+        chunk_units = char_units
+    if chunk:
+        chunks.append((chunk, chunk_units))
+    return chunks or [(word, _text_units(pdfmetrics_mod, font_name, word))]
+
+
 def _wrap_line_to_width(
     text: str,
     *,
@@ -414,41 +663,32 @@ def _wrap_line_to_width(
     if not words:
         return [""]
 
+    # Cortes por anchos acumulados: cada palabra se mide una vez por fuente, no la linea entera por palabra.
+    max_units = max_width / (0.001 * font_size)
+    space_units = _text_units(pdfmetrics_mod, font_name, " ")
     lines: list[str] = []
-    current = words[0]
-
-    def split_word(word: str) -> list[str]:
-        chunks: list[str] = []
-        chunk = ""
-        for char in word:
-            candidate = f"{chunk}{char}"
-            if pdfmetrics_mod.stringWidth(candidate, font_name, font_size) <= max_width:
-                chunk = candidate
+    current = ""
+    current_units = 0.0
+    for index, word in enumerate(words):
+        word_units = _text_units(pdfmetrics_mod, font_name, word)
+        if index > 0:
+            if current_units + space_units + word_units <= max_units:
+                current = f"{current} {word}"
+                current_units += space_units + word_units
                 continue
-            if chunk:
-                chunks.append(chunk)
-            chunk = char
-        if chunk:
-            chunks.append(chunk)
-        return chunks or [word]
+            lines.append(current)
 
-    if pdfmetrics_mod.stringWidth(current, font_name, font_size) > max_width:
-        broken = split_word(current)
-        lines.extend(broken[:-1])
-        current = broken[-1]
-
-    for word in words[1:]:
-        candidate = f"{current} {word}"
-        if pdfmetrics_mod.stringWidth(candidate, font_name, font_size) <= max_width:
-            current = candidate
-            continue
-
-        lines.append(current)
         current = word
-        if pdfmetrics_mod.stringWidth(current, font_name, font_size) > max_width:
-            broken = split_word(current)
-            lines.extend(broken[:-1])
-            current = broken[-1]
+        current_units = word_units
+        if word_units > max_units:
+            broken = _split_word_to_width(
+                word,
+                pdfmetrics_mod=pdfmetrics_mod,
+                font_name=font_name,
+                max_units=max_units,
+            )
+            lines.extend(chunk for chunk, _units in broken[:-1])
+            current, current_units = broken[-1]
 
     lines.append(current)
     return lines
@@ -480,16 +720,18 @@ def _wrap_text(
     return lines or [""]
 
 
-def _fit_text_block(
+def fit_text_layout(
     *,
     text: str,
     pdfmetrics_mod: Any,
     font_name: str,
+    font_sizes: tuple[float, ...],
+    line_height_ratio: float,
     max_width: float,
     max_height: float,
+    skip_blank_lines: bool = False,
 ) -> tuple[float, float, list[str]] | None:
-    for font_size in (18.0, 17.5, 17.0, 16.5, 16.0, 15.5, 15.0, 14.5, 14.0):
-        line_height = font_size * 1.5
+    def layout(font_size: float) -> tuple[float, float, list[str]] | None:
         lines = _wrap_text(
             text,
             pdfmetrics_mod=pdfmetrics_mod,
@@ -497,10 +739,175 @@ def _fit_text_block(
             font_size=font_size,
             max_width=max_width,
         )
-        needed_height = len(lines) * line_height
-        if needed_height <= max_height:
-            return font_size, line_height, lines
-    return None
+        if skip_blank_lines:
+            lines = [line for line in lines if line.strip()]
+            if not lines:
+                return None
+        line_height = font_size * line_height_ratio
+        if len(lines) * line_height > max_height:
+            return None
+        return font_size, line_height, lines
+
+    # font_sizes va de mayor a menor y la altura necesaria crece con el tamano:
+    # busqueda binaria del primer tamano que cabe.
+    if not font_sizes:
+        return None
+    best = layout(font_sizes[-1])
+    if best is None:
+        return None
+    low, high = 0, len(font_sizes) - 1
+    while low < high:
+        middle = (low + high) // 2
+        candidate = layout(font_sizes[middle])
+        if candidate is None:
+            low = middle + 1
+        else:
+            best = candidate
+            high = middle
+    return best
+
+
+def _fit_text_block(
+    *,
+    text: str,
+    pdfmetrics_mod: Any,
+    font_name: str,
+    max_width: float,
+    max_height: float,
+) -> tuple[float, float, list[str]] | None:
+    return fit_text_layout(
+        text=text,
+        pdfmetrics_mod=pdfmetrics_mod,
+        font_name=font_name,
+        font_sizes=PDF_TEXT_FONT_SIZES,
+        line_height_ratio=1.5,
+        max_width=max_width,
+        max_height=max_height,
+    )
+
+
+def _fit_cover_title(
+    *,
+    title: str,
+    pdfmetrics_mod: Any,
+    font_name: str,
+    max_width: float,
+    max_height: float,
+) -> tuple[float, float, list[str]] | None:
+    return fit_text_layout(
+        text=title,
+        pdfmetrics_mod=pdfmetrics_mod,
+        font_name=font_name,
+        font_sizes=PDF_TITLE_FONT_SIZES,
+        line_height_ratio=1.18,
+        max_width=max_width,
+        max_height=max_height,
+        skip_blank_lines=True,
+    )
+
+
+def _image_has_alpha(image: Image.Image) -> bool:
+    if image.mode in {"RGBA", "LA", "PA"}:
+        return True
+    return image.mode == "P" and "transparency" in image.info
+
+
+def _crop_box_for_ratio(src_w: int, src_h: int, target_ratio: float) -> tuple[int, int, int, int]:
+    src_ratio = src_w / src_h if src_h else 1.0
+    if src_ratio > target_ratio:
+        new_w = max(1, int(src_h * target_ratio))
+        offset_x = max(0, (src_w - new_w) // 2)
+        return (offset_x, 0, offset_x + new_w, src_h)
+
+    new_h = max(1, int(src_w / target_ratio))
+    offset_y = max(0, (src_h - new_h) // 2)
+    return (0, offset_y, src_w, offset_y + new_h)
+
+
+def _print_pixel_size(width: float, height: float, *, dpi: int = PDF_PRINT_DPI) -> tuple[int, int]:
+    return (
+        max(1, math.ceil(width / PT_PER_INCH * dpi)),
+        max(1, math.ceil(height / PT_PER_INCH * dpi)),
+    )
+
+
+def _encode_print_image(
+    source: Image.Image,
+    *,
+    box: tuple[int, int, int, int],
+    target_size: tuple[int, int],
+) -> bytes:
+    target_w, target_h = target_size
+    crop_w = box[2] - box[0]
+    crop_h = box[3] - box[1]
+
+    img: Image.Image = source
+    if _image_has_alpha(img):
+        rgba = img.convert("RGBA")
+        img = Image.new("RGB", rgba.size, (255, 255, 255))
+        img.paste(rgba, mask=rgba.getchannel("A"))
+    elif img.mode not in {"RGB", "L"}:
+        img = img.convert("RGB")
+
+    # Solo se reduce: ampliar no anade detalle y multiplica el peso del PDF.
+    if crop_w > target_w or crop_h > target_h:
+        scale = min(target_w / crop_w, target_h / crop_h)
+        size = (max(1, round(crop_w * scale)), max(1, round(crop_h * scale)))
+        img = img.resize(size, Image.Resampling.LANCZOS, box=box)
+    else:
+        img = img.crop(box)
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=PDF_IMAGE_JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def _print_image_cache_file(
+    image_path: Path,
+    *,
+    box: tuple[int, int, int, int],
+    target_size: tuple[int, int],
+) -> Path:
+    raw = "|".join(
+        [
+            str(PDF_IMAGE_CACHE_VERSION),
+            media_content_etag(image_path),
+            ",".join(str(value) for value in box),
+            f"{target_size[0]}x{target_size[1]}",
+            f"JPEG:{PDF_IMAGE_JPEG_QUALITY}",
+        ]
+    )
+    key = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return PDF_IMAGE_CACHE_DIR / key[:2] / f"{key}.jpg"
+
+
+def _store_print_image(cache_file: Path, image_bytes: bytes) -> bool:
+    temp_file = cache_file.with_name(f"{cache_file.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file.write_bytes(image_bytes)
+        temp_file.replace(cache_file)
+        return True
+    except OSError:
+        # La cache es opcional: un fallo de escritura no invalida la exportacion.
+        return False
+    finally:
+        if temp_file.exists():
+            temp_file.unlink()
+
+
+def _prepare_print_image(image_path: Path, *, width: float, height: float) -> Path | bytes:
+    target_size = _print_pixel_size(width, height)
+    with Image.open(image_path) as source:
+        box = _crop_box_for_ratio(source.width, source.height, width / height if height else 1.0)
+        cache_file = _print_image_cache_file(image_path, box=box, target_size=target_size)
+        if cache_file.is_file():
+            return cache_file
+        image_bytes = _encode_print_image(source, box=box, target_size=target_size)
+
+    if _store_print_image(cache_file, image_bytes):
+        return cache_file
+    return image_bytes
 
 
 def _draw_image_fill(
@@ -512,39 +919,37 @@ def _draw_image_fill(
     y: float,
     width: float,
     height: float,
-) -> None:
-    with Image.open(image_path) as source:
-        img = source.convert("RGBA")
-        src_w, src_h = img.size
-        src_ratio = src_w / src_h if src_h else 1.0
-        target_ratio = width / height if height else 1.0
-
-        if src_ratio > target_ratio:
-            new_w = max(1, int(src_h * target_ratio))
-            offset_x = max(0, (src_w - new_w) // 2)
-            box = (offset_x, 0, offset_x + new_w, src_h)
-        else:
-            new_h = max(1, int(src_w / target_ratio))
-            offset_y = max(0, (src_h - new_h) // 2)
-            box = (0, offset_y, src_w, offset_y + new_h)
-
-        cropped = img.crop(box)
-        rgb = Image.new("RGB", cropped.size, (255, 255, 255))
-        rgb.paste(cropped, mask=cropped.split()[-1])
-
-        buffer = io.BytesIO()
-        rgb.save(buffer, format="PNG")
-        buffer.seek(0)
-        reader = image_reader_cls(buffer)
-        canvas_obj.drawImage(
-            reader,
-            x,
-            y,
-            width=width,
-            height=height,
-            preserveAspectRatio=False,
-            mask="auto",
-        )
+) -> int:
+    # JPEG ya recortado y a DPI de impresion: ReportLab lo incrusta tal cual (DCTDecode).
+    # Por ruta de archivo no lo decodifica; un ImageReader lo pasaria a RGB solo para calcular su firma.
+    prepared = _prepare_print_image(image_path, width=width, height=height)
+    if isinstance(prepared, Path):
+        image_source: Any = str(prepared)
+        image_size = prepared.stat().st_size
+    else:
+        image_source = image_reader_cls(io.BytesIO(prepared))
+        image_size = len(prepared)
+    canvas_obj.drawImage(
+        image_source,
+        x,
+        y,
+        width=width,
+        height=height,
+        preserveAspectRatio=False,
+    )
+    return image_size
+
+
+def _cover_title_box(page_size: float) -> tuple[float, float, float, float]:
+    top_band_h = page_size * 0.24
+    top_band_y = page_size - top_band_h
+    return 24.0, top_band_y + (top_band_h * 0.22), page_size - 44.0, top_band_h * 0.64
+
+
+def _text_page_box(page_size: float) -> tuple[float, float, float, float]:
+    margin = max(36.0, page_size * 0.076)
+    footer_gap = 24.0
+    return margin, margin, page_size - (margin * 2.0), page_size - (margin * 2.0) - footer_gap
 
 
 def _draw_centered_title(
@@ -558,32 +963,25 @@ def _draw_centered_title(
     width: float,
     height: float,
 ) -> None:
-    for font_size in (44.0, 40.0, 36.0, 32.0, 28.0, 24.0):
-        lines = _wrap_text(
-            title,
-            pdfmetrics_mod=pdfmetrics_mod,
-            font_name=font_name,
-            font_size=font_size,
-            max_width=width,
-        )
-        lines = [line for line in lines if line.strip()]
-        if not lines:
-            continue
-        line_height = font_size * 1.18
-        needed_height = len(lines) * line_height
-        if needed_height > height:
-            continue
-
-        start_y = y + ((height - needed_height) / 2.0) + needed_height - font_size
-        canvas_obj.setFont(font_name, font_size)
-        for index, line in enumerate(lines):
-            line_width = pdfmetrics_mod.stringWidth(line, font_name, font_size)
-            line_x = x + max(0.0, (width - line_width) / 2.0)
-            line_y = start_y - (index * line_height)
-            canvas_obj.drawString(line_x, line_y, line)
-        return
+    fit = _fit_cover_title(
+        title=title,
+        pdfmetrics_mod=pdfmetrics_mod,
+        font_name=font_name,
+        max_width=width,
+        max_height=height,
+    )
+    if fit is None:
+        raise PdfExportError("text_overflow: la portada no puede renderizar el titulo en la banda superior.")
 
-    raise PdfExportError("text_overflow: la portada no puede renderizar el titulo en la banda superior.")
+    font_size, line_height, lines = fit
+    needed_height = len(lines) * line_height
+    start_y = y + ((height - needed_height) / 2.0) + needed_height - font_size
+    canvas_obj.setFont(font_name, font_size)
+    for index, line in enumerate(lines):
+        line_width = pdfmetrics_mod.stringWidth(line, font_name, font_size)
+        line_x = x + max(0.0, (width - line_width) / 2.0)
+        line_y = start_y - (index * line_height)
+        canvas_obj.drawString(line_x, line_y, line)
 
 
 def _draw_cover_page(
@@ -596,8 +994,8 @@ def _draw_cover_page(
     colors_mod: Any,
     pdfmetrics_mod: Any,
     fonts: dict[str, str],
-) -> None:
-    _draw_image_fill(
+) -> int:
+    image_bytes = _draw_image_fill(
         canvas_obj=canvas_obj,
         image_reader_cls=image_reader_cls,
         image_path=cover_image_path,
@@ -613,16 +1011,17 @@ def _draw_cover_page(
     canvas_obj.rect(0.0, top_band_y, page_size, top_band_h, fill=1, stroke=0)
 
     title = str(payload.get("title", "")).strip() or "Sin titulo"
+    title_x, title_y, title_w, title_h = _cover_title_box(page_size)
     canvas_obj.setFillColor(colors_mod.white)
     _draw_centered_title(
         canvas_obj=canvas_obj,
         pdfmetrics_mod=pdfmetrics_mod,
         title=title,
         font_name=fonts["bold"],
-        x=24.0,
-        y=top_band_y + (top_band_h * 0.22),
-        width=page_size - 44.0,
-        height=top_band_h * 0.64,
+        x=title_x,
+        y=title_y,
+        width=title_w,
+        height=title_h,
     )
     header_label = _format_cover_header_label(payload)
     header_size = 12.0
@@ -636,6 +1035,7 @@ def _draw_cover_page(
     canvas_obj.setFillColor(colors_mod.white)
     canvas_obj.setFont(fonts["regular"], header_size)
     canvas_obj.drawString(label_x, label_y, header_label)
+    return image_bytes
 
 
 def _draw_export_page_number(
@@ -692,17 +1092,11 @@ def _draw_text_page(
     fonts: dict[str, str],
     export_page_number: int,
 ) -> None:
-    margin = max(36.0, page_size * 0.076)
-    footer_gap = 24.0
-
     canvas_obj.setFillColor(colors_mod.white)
     canvas_obj.rect(0.0, 0.0, page_size, page_size, fill=1, stroke=0)
 
     page_number = int(page.get("page_number", 0))
-    text_x = margin
-    text_y = margin
-    text_w = page_size - (margin * 2.0)
-    text_h = page_size - (margin * 2.0) - footer_gap
+    text_x, text_y, text_w, text_h = _text_page_box(page_size)
     story_text = _normalize_story_text(str(page.get("text", "")))
 
     fit = _fit_text_block(
@@ -744,8 +1138,8 @@ def _draw_image_page(
     main_path: Path,
     page_size: float,
     image_reader_cls: Any,
-) -> None:
-    _draw_image_fill(
+) -> int:
+    return _draw_image_fill(
         canvas_obj=canvas_obj,
         image_reader_cls=image_reader_cls,
         image_path=main_path,
@@ -802,17 +1196,79 @@ def format_validation_errors(validation: dict[str, Any]) -> str:
     return "\n".join(lines)
 
 
+def _build_manifest_path(output: Path) -> Path:
+    return output.with_name(f"{output.name}.build.json")
+
+
+def _build_pdf_manifest(
+    *,
+    payload: dict[str, Any],
+    story_rel_path: str,
+    cover_path: Path,
+    page_rows: list[dict[str, Any]],
+    size_cm: float,
+    fonts: dict[str, str],
+) -> dict[str, Any]:
+    assets = {"cover": media_content_etag(cover_path)}
+    for row in page_rows:
+        page_number = int(row["page"].get("page_number", 0))
+        assets[f"page_{page_number:02d}"] = media_content_etag(row["main_path"])
+
+    return {
+        "version": PDF_BUILD_MANIFEST_VERSION,
+        "story_rel_path": story_rel_path,
+        "updated_at": str(payload.get("updated_at", "")),
+        "size_cm": float(size_cm),
+        "fonts": dict(fonts),
+        "print_dpi": PDF_PRINT_DPI,
+        "jpeg_quality": PDF_IMAGE_JPEG_QUALITY,
+        "assets": assets,
+    }
+
+
+def _is_pdf_up_to_date(output: Path, manifest: dict[str, Any]) -> bool:
+    if not output.is_file():
+        return False
+    try:
+        stored = json.loads(_build_manifest_path(output).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return False
+    return stored == manifest
+
+
+def _write_pdf_manifest(output: Path, manifest: dict[str, Any]) -> None:
+    manifest_path = _build_manifest_path(output)
+    temp_file = manifest_path.with_name(f"{manifest_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        temp_file.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        temp_file.replace(manifest_path)
+    finally:
+        if temp_file.exists():
+            temp_file.unlink()
+
+
 def export_story_pdf(
     *,
     story_rel_path: str,
     output_path: str | Path | None = None,
     size_cm: float = 20.0,
     overwrite: bool = False,
+    force: bool = False,
+    on_progress: Callable[[dict[str, Any]], None] | None = None,
+    chunk_pages: int | None = None,
+    validation: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
     if size_cm <= 0:
         raise PdfExportError("size_cm debe ser mayor que 0.")
 
-    validation = validate_story_for_pdf(story_rel_path=story_rel_path)
+    started = time.perf_counter()
+    # Quien ya valido (manage.py, lotes) pasa el resultado: solo se repite si es de otro cuento o tamano.
+    if (
+        validation is None
+        or validation.get("story_rel_path") != _normalize_rel_path(story_rel_path)
+        or validation.get("size_cm") != float(size_cm)
+    ):
+        validation = validate_story_for_pdf(story_rel_path=story_rel_path, size_cm=size_cm)
     if not validation.get("is_valid", False):
         raise PdfExportError(
             "El cuento no esta listo para exportacion PDF:\n" + format_validation_errors(validation)
@@ -833,68 +1289,257 @@ def export_story_pdf(
         if not isinstance(main_path, Path) or not main_path.exists():
             raise PdfExportError(f"No se pudo resolver la imagen activa main de la pagina {page_number}.")
 
-    output = _resolve_output_path(output_path, payload)
-    if output.exists() and not overwrite:
-        raise PdfExportError(f"El archivo ya existe: {output}. Usa --overwrite para reemplazarlo.")
-
-    output.parent.mkdir(parents=True, exist_ok=True)
+    page_rows = [
+        row
+        for row in active_paths.get("pages", [])
+        if isinstance(row, dict) and isinstance(row.get("page"), dict) and isinstance(row.get("main_path"), Path)
+    ]
+    page_count = 1 + (len(page_rows) * 2)
 
     rl_canvas, pdfmetrics_mod, image_reader_cls, colors_mod, rl_cm, ttfont_cls = _require_reportlab()
     fonts = _resolve_pdf_fonts(pdfmetrics_mod=pdfmetrics_mod, ttfont_cls=ttfont_cls)
 
-    page_size = float(size_cm) * rl_cm
-    canvas_obj = rl_canvas.Canvas(str(output), pagesize=(page_size, page_size))
-
-    _draw_cover_page(
-        canvas_obj=canvas_obj,
+    output = _resolve_output_path(output_path, payload)
+    manifest = _build_pdf_manifest(
         payload=payload,
-        cover_image_path=cover_path,
-        page_size=page_size,
-        image_reader_cls=image_reader_cls,
-        colors_mod=colors_mod,
-        pdfmetrics_mod=pdfmetrics_mod,
+        story_rel_path=validation["story_rel_path"],
+        cover_path=cover_path,
+        page_rows=page_rows,
+        size_cm=size_cm,
         fonts=fonts,
     )
+    result = {
+        "story_rel_path": validation["story_rel_path"],
+        "story_id": validation["story_id"],
+        "output_path": str(output),
+        "layout_mode": "paged",
+        "page_count": page_count,
+        "spread_count": page_count,
+        "size_cm": float(size_cm),
+        "skipped": False,
+    }
 
-    export_page_number = 0
-    for row in active_paths.get("pages", []):
-        if not isinstance(row, dict):
-            continue
-        page = row.get("page")
-        main_path = row.get("main_path")
-        if not isinstance(page, dict) or not isinstance(main_path, Path):
-            continue
+    def report(stage: str, page: int, *, file_bytes: int | None = None, embedded_image_bytes: int | None = None) -> None:
+        if on_progress is None:
+            return
+        event: dict[str, Any] = {
+            "story_rel_path": validation["story_rel_path"],
+            "stage": stage,
+            "page": page,
+            "page_count": page_count,
+            "elapsed": time.perf_counter() - started,
+        }
+        # "bytes" son bytes ya escritos en disco: va en "chunk" (bloques cerrados), "skipped" y "saved".
+        # En cada pagina se informa ademas el acumulado de JPEG incrustados.
+        if file_bytes is not None:
+            event["bytes"] = file_bytes
+        if embedded_image_bytes is not None:
+            event["embedded_image_bytes"] = embedded_image_bytes
+        on_progress(event)
+
+    # Mismo cuento, mismas imagenes activas, tamano y fuentes que el PDF existente: no hay nada que regenerar.
+    if not force and _is_pdf_up_to_date(output, manifest):
+        report("skipped", page_count, file_bytes=output.stat().st_size)
+        result["skipped"] = True
+        return result
+
+    if output.exists() and not overwrite:
+        raise PdfExportError(f"El archivo ya existe: {output}. Usa --overwrite para reemplazarlo.")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    page_size = float(size_cm) * rl_cm
 
-        canvas_obj.showPage()
-        export_page_number += 1
-        _draw_text_page(
-            canvas_obj=canvas_obj,
-            page=page,
+    # Paginas en orden de impresion; cada una se dibuja sobre el canvas del bloque que le toca.
+    page_drawers: list[Callable[..., int | None]] = [
+        partial(
+            _draw_cover_page,
+            payload=payload,
+            cover_image_path=cover_path,
             page_size=page_size,
-            pdfmetrics_mod=pdfmetrics_mod,
+            image_reader_cls=image_reader_cls,
             colors_mod=colors_mod,
+            pdfmetrics_mod=pdfmetrics_mod,
             fonts=fonts,
-            export_page_number=export_page_number,
         )
-
-        canvas_obj.showPage()
-        export_page_number += 1
-        _draw_image_page(
-            canvas_obj=canvas_obj,
-            main_path=main_path,
-            page_size=page_size,
-            image_reader_cls=image_reader_cls,
+    ]
+    for index, row in enumerate(page_rows):
+        page_drawers.append(
+            partial(
+                _draw_text_page,
+                page=row["page"],
+                page_size=page_size,
+                pdfmetrics_mod=pdfmetrics_mod,
+                colors_mod=colors_mod,
+                fonts=fonts,
+                export_page_number=(index * 2) + 1,
+            )
+        )
+        page_drawers.append(
+            partial(
+                _draw_image_page,
+                main_path=row["main_path"],
+                page_size=page_size,
+                image_reader_cls=image_reader_cls,
+            )
         )
 
-    canvas_obj.save()
+    # ReportLab retiene todo el documento hasta save(): se cierra un PDF temporal cada `chunk_pages`
+    # paginas y al final PDFium los concatena. El canvas nunca guarda mas de un bloque de paginas.
+    chunk_size = max(1, int(chunk_pages or PDF_EXPORT_CHUNK_PAGES))
+    temp_prefix = f".{output.name}.{uuid.uuid4().hex}"
+    temp_output = output.with_name(f"{temp_prefix}.tmp")
+    chunk_files: list[Path] = []
+    embedded_bytes = 0
+    written_bytes = 0
+    try:
+        for chunk_start in range(0, page_count, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, page_count)
+            if page_count <= chunk_size:
+                chunk_file = temp_output
+            else:
+                chunk_file = output.with_name(f"{temp_prefix}.{len(chunk_files):03d}.tmp")
+            chunk_files.append(chunk_file)
+
+            canvas_obj = rl_canvas.Canvas(str(chunk_file), pagesize=(page_size, page_size))
+            for page_index in range(chunk_start, chunk_end):
+                if page_index > chunk_start:
+                    canvas_obj.showPage()
+                embedded_bytes += page_drawers[page_index](canvas_obj=canvas_obj) or 0
+                report("page", page_index + 1, embedded_image_bytes=embedded_bytes)
+            canvas_obj.save()
+            del canvas_obj
+
+            written_bytes += chunk_file.stat().st_size
+            report("chunk", chunk_end, file_bytes=written_bytes, embedded_image_bytes=embedded_bytes)
+
+        if len(chunk_files) > 1:
+            _concat_pdf_files(chunk_files, temp_output)
+        temp_output.replace(output)
+    finally:
+        for leftover in (*chunk_files, temp_output):
+            if leftover.exists():
+                leftover.unlink()
+
+    _write_pdf_manifest(output, manifest)
+    report("saved", page_count, file_bytes=output.stat().st_size, embedded_image_bytes=embedded_bytes)
+    return result
+
+
+def list_pdf_story_rel_paths(book_rel_path: str = "") -> list[str]:
+    normalized_book = _normalize_rel_path(book_rel_path)
+    story_rel_paths: list[str] = []
+    for story_file in list_story_json_files():
+        story_rel_path = json_path_to_story_rel(story_file)
+        if normalized_book and not story_rel_path.startswith(f"{normalized_book}/"):
+            continue
+        story_rel_paths.append(story_rel_path)
+    return story_rel_paths
 
-    page_count = 1 + (len(active_paths.get("pages", [])) * 2)
-    return {
-        "story_rel_path": validation["story_rel_path"],
-        "story_id": validation["story_id"],
-        "output_path": str(output),
-        "layout_mode": "paged",
-        "page_count": page_count,
-        "spread_count": page_count,
-        "size_cm": float(size_cm),
+
+def _validate_story_row(story_rel_path: str, size_cm: float) -> tuple[dict[str, Any], dict[str, Any]]:
+    started = time.perf_counter()
+    try:
+        validation = validate_story_for_pdf(story_rel_path=story_rel_path, size_cm=size_cm)
+    except (FileNotFoundError, StoryStoreError, PdfExportError) as exc:
+        validation = {"is_valid": False, "errors": [], "load_error": str(exc)}
+
+    row: dict[str, Any] = {
+        "story_rel_path": _normalize_rel_path(story_rel_path),
+        "status": "valid",
+        "seconds": time.perf_counter() - started,
+        "output_path": "",
+        "page_count": int(validation.get("page_count", 0) or 0),
+        "message": "",
     }
+    if not validation.get("is_valid", False):
+        row["status"] = "invalid"
+        row["message"] = str(validation.get("load_error", "")) or format_validation_errors(validation)
+    return row, validation
+
+
+def _export_story_pdf_job(story_rel_path: str, size_cm: float, force: bool = False) -> dict[str, Any]:
+    # Valida y exporta en el mismo proceso: la validacion se hace una vez y se pasa a export_story_pdf.
+    started = time.perf_counter()
+    row, validation = _validate_story_row(story_rel_path, size_cm)
+    if row["status"] == "invalid":
+        return row
+
+    row["status"] = "ok"
+    row["page_count"] = 0
+    try:
+        # Destino canonico library/<book_rel_path>/NN.pdf: se reemplaza en cada exportacion.
+        result = export_story_pdf(
+            story_rel_path=story_rel_path,
+            size_cm=size_cm,
+            overwrite=True,
+            force=force,
+            validation=validation,
+        )
+        row["output_path"] = result["output_path"]
+        row["page_count"] = int(result.get("page_count", 0) or 0)
+        if result.get("skipped"):
+            row["status"] = "skipped"
+            row["message"] = "sin cambios desde la ultima exportacion"
+    except (FileNotFoundError, StoryStoreError, PdfExportError) as exc:
+        row["status"] = "error"
+        row["message"] = str(exc)
+    row["seconds"] = time.perf_counter() - started
+    return row
+
+
+def export_stories_pdf(
+    *,
+    story_rel_paths: list[str],
+    size_cm: float = 20.0,
+    jobs: int = 1,
+    dry_run: bool = False,
+    force: bool = False,
+    on_result: Callable[[dict[str, Any]], None] | None = None,
+) -> list[dict[str, Any]]:
+    if size_cm <= 0:
+        raise PdfExportError("size_cm debe ser mayor que 0.")
+
+    rows: dict[str, dict[str, Any]] = {}
+    if dry_run:
+        for story_rel_path in story_rel_paths:
+            row, _validation = _validate_story_row(story_rel_path, size_cm)
+            rows[row["story_rel_path"]] = row
+            if on_result:
+                on_result(row)
+        return [rows[_normalize_rel_path(story_rel_path)] for story_rel_path in story_rel_paths]
+
+    # Cada trabajo valida su cuento y exporta con ese resultado: el padre no valida por adelantado.
+    pending = [_normalize_rel_path(story_rel_path) for story_rel_path in story_rel_paths]
+
+    # Cada cuento es independiente (PDF propio, sin estado compartido): se reparten entre procesos.
+    workers = max(1, min(int(jobs), len(pending)))
+    if workers == 1:
+        for story_rel_path in pending:
+            row = _export_story_pdf_job(story_rel_path, size_cm, force)
+            rows[story_rel_path] = row
+            if on_result:
+                on_result(row)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_export_story_pdf_job, story_rel_path, size_cm, force): story_rel_path
+                for story_rel_path in pending
+            }
+            for future in as_completed(futures):
+                story_rel_path = futures[future]
+                try:
+                    row = future.result()
+                except Exception as exc:
+                    row = {
+                        "story_rel_path": story_rel_path,
+                        "status": "error",
+                        "seconds": 0.0,
+                        "output_path": "",
+                        "page_count": 0,
+                        "message": f"fallo del proceso de exportacion: {exc}",
+                    }
+                rows[story_rel_path] = row
+                if on_result:
+                    on_result(row)
+
+    return [rows[_normalize_rel_path(story_rel_path)] for story_rel_path in story_rel_paths]
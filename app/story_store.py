@@ -1,27 +1,180 @@
 from __future__ import annotations
 
+import bisect
+import copy
+import hashlib
 import json
+import logging
 import mimetypes
+import os
 import re
+import threading
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-from .config import LIBRARY_ROOT, ROOT_DIR
+try:
+    import fcntl
+except ImportError:  # Windows: solo exclusion entre hilos del mismo proceso.
+    fcntl = None
+
+from . import json_codec
+from .config import CACHE_ROOT, LIBRARY_ROOT, ROOT_DIR, STORE_CHANGE_MARKER, STORE_LOCK_DIR
 
 STORY_JSON_RE = re.compile(r"^(\d{2})\.json$", re.IGNORECASE)
 SLOT_NAMES = ("main", "secondary")
 STORY_STATUS_VALUES = {"draft", "in_review", "definitive"}
+STORY_EXCLUDED_TOP_LEVEL_DIRS = {"_inbox", "_backups"}
+# Carpetas que nunca contienen NN.json de cuento: no se recorren al buscar cuentos.
+STORY_WALK_SKIPPED_DIRS = {"images"}
+# Version de la forma canonica de NN.json. Subirla al cambiar _coerce_story_payload: los archivos
+# sellados con la version anterior vuelven a pasar por la coercion completa.
+STORY_SCHEMA_VERSION = 1
+# Cabecera de un NN.json canonico: version de esquema y sha256 de los bytes que la siguen.
+_CANONICAL_HEADER_PREFIX = b'{\n  "schema_version": %d,\n  "payload_sha256": "' % STORY_SCHEMA_VERSION
+_CANONICAL_HEADER_SUFFIX = b'",\n'
+_CANONICAL_MARKER_KEYS = ("schema_version", "payload_sha256")
+
+
+STORE_CHANGE_STORY = "story"
+STORE_CHANGE_META = "meta"
+
+_STORE_LISTENERS: list[Callable[[str, str], None]] = []
+_PATH_LOCKS: dict[str, threading.RLock] = {}
+_PATH_LOCK_DEPTH: dict[str, int] = {}
+_PATH_LOCKS_GUARD = threading.Lock()
+_OPEN_EDITS = threading.local()
+# Cambios del marcador hechos por este proceso (mtime anterior -> mtime nuevo): sus listeners
+# ya los recibieron, asi que no obligan a re-escanear.
+_OWN_CHANGE_STAMPS: dict[int | None, int] = {}
+_OWN_CHANGE_STAMPS_MAX = 256
+_OWN_CHANGE_STAMPS_LOCK = threading.Lock()
+_IMAGE_INDEXES: dict[str, _ImageIndex] = {}
+_REFERENCE_LEVELS: dict[str, _LevelReferenceAssets] = {}
+_REFERENCE_RESOLVERS: dict[str, ReferenceResolver] = {}
+_REFERENCE_CACHE_LOCK = threading.Lock()
+# meta.json por nodo (huella, payload coercionado, error) y anclas aplicables materializadas por nodo.
+_NODE_METAS: dict[str, tuple[tuple[int, int, int] | None, dict[str, Any] | None, str]] = {}
+_APPLICABLE_ANCHORS: dict[str, tuple[tuple[tuple[int, int, int] | None, ...], list[dict[str, Any]]]] = {}
+_META_CACHE_LOCK = threading.Lock()
 
 
 class StoryStoreError(ValueError):
     pass
 
 
+class StoryConflictError(StoryStoreError):
+    pass
+
+
+def add_store_listener(listener: Callable[[str, str], None]) -> None:
+    if listener not in _STORE_LISTENERS:
+        _STORE_LISTENERS.append(listener)
+
+
+def store_change_stamp() -> int | None:
+    try:
+        return STORE_CHANGE_MARKER.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def is_own_store_change(known_stamp: int | None, current_stamp: int | None) -> bool:
+    # True si el marcador paso de known_stamp a current_stamp solo por escrituras de este proceso.
+    stamp = known_stamp
+    with _OWN_CHANGE_STAMPS_LOCK:
+        for _step in range(len(_OWN_CHANGE_STAMPS)):
+            if stamp == current_stamp:
+                return True
+            if stamp not in _OWN_CHANGE_STAMPS:
+                return False
+            stamp = _OWN_CHANGE_STAMPS[stamp]
+    return stamp == current_stamp
+
+
+def _touch_store_change_marker() -> None:
+    try:
+        STORE_CHANGE_MARKER.parent.mkdir(parents=True, exist_ok=True)
+        # Lock entre procesos: nadie toca el marcador entre la lectura del mtime anterior y el nuevo.
+        with _locked_path(STORE_CHANGE_MARKER):
+            previous = store_change_stamp()
+            STORE_CHANGE_MARKER.touch()
+            current = store_change_stamp()
+    except OSError:
+        return
+
+    # Si el mtime no avanza (resolucion gruesa) no se registra nada: otro proceso pudo tocarlo igual.
+    if current is None or current == previous:
+        return
+    with _OWN_CHANGE_STAMPS_LOCK:
+        if len(_OWN_CHANGE_STAMPS) >= _OWN_CHANGE_STAMPS_MAX:
+            _OWN_CHANGE_STAMPS.clear()
+        _OWN_CHANGE_STAMPS[previous] = current
+
+
+def _notify_store_change(kind: str, rel_path: str) -> None:
+    # Los listeners solo ven escrituras del propio proceso; el marcador avisa al resto.
+    _touch_store_change_marker()
+
+    # Las imagenes de un cuento viven en images/ de su libro; las de anclas, en el nodo del meta.json.
+    normalized = _normalize_rel_path(rel_path)
+    _invalidate_reference_level(normalized.rpartition("/")[0] if kind == STORE_CHANGE_STORY else normalized)
+
+    for listener in list(_STORE_LISTENERS):
+        try:
+            listener(kind, rel_path)
+        except Exception:
+            # Un listener roto no debe cortar la escritura, pero su estado queda desfasado: se registra.
+            logging.getLogger(__name__).exception("Fallo el listener del store %r (%s %s)", listener, kind, rel_path)
+            continue
+
+
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+@contextmanager
+def _locked_path(target: Path) -> Iterator[None]:
+    # Exclusion por archivo: RLock entre hilos (reentrante para mutadores anidados) y flock entre procesos.
+    # El lock vive en un archivo aparte porque el JSON se reemplaza (cambia de inodo) en cada escritura.
+    key = os.path.abspath(target)
+    with _PATH_LOCKS_GUARD:
+        thread_lock = _PATH_LOCKS.setdefault(key, threading.RLock())
+
+    with thread_lock:
+        depth = _PATH_LOCK_DEPTH.get(key, 0)
+        _PATH_LOCK_DEPTH[key] = depth + 1
+        handle = None
+        try:
+            if depth == 0 and fcntl is not None:
+                STORE_LOCK_DIR.mkdir(parents=True, exist_ok=True)
+                lock_name = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".lock"
+                handle = (STORE_LOCK_DIR / lock_name).open("a+b")
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            yield
+        finally:
+            if depth == 0:
+                _PATH_LOCK_DEPTH.pop(key, None)
+            else:
+                _PATH_LOCK_DEPTH[key] = depth
+            if handle is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                handle.close()
+
+
+def _check_expected_updated_at(payload: dict[str, Any], expected_updated_at: str | None, label: str) -> None:
+    if expected_updated_at is None:
+        return
+    current = str(payload.get("updated_at", "")).strip()
+    if current != str(expected_updated_at).strip():
+        raise StoryConflictError(
+            f"El cuento {label} se modifico desde que se abrio el editor ({current}). Recarga antes de guardar."
+        )
+
+
 def _normalize_rel_path(path_rel: str) -> str:
     return path_rel.strip().replace("\\", "/").strip("/")
 
@@ -221,59 +374,142 @@ def story_rel_to_json_path(story_rel_path: str) -> Path:
 
 
 def json_path_to_story_rel(json_file: Path) -> str:
-    rel = json_file.resolve().relative_to(LIBRARY_ROOT.resolve()).as_posix()
+    # Las rutas que produce iter_story_json_files ya cuelgan de LIBRARY_ROOT: sin resolve() por archivo.
+    if json_file.is_absolute() and ".." not in json_file.parts and json_file.is_relative_to(LIBRARY_ROOT):
+        rel = json_file.relative_to(LIBRARY_ROOT).as_posix()
+    else:
+        rel = json_file.resolve().relative_to(LIBRARY_ROOT.resolve()).as_posix()
     if not rel.lower().endswith(".json"):
         raise StoryStoreError("archivo no es JSON de cuento")
     return rel[:-5]
 
 
-def list_story_json_files() -> list[Path]:
-    matches: list[Path] = []
-    if not LIBRARY_ROOT.exists():
-        return matches
+def _walk_library_dir(directory: Path, *, top_level: bool, match_file: Callable[[str], Any]) -> Iterator[Path]:
+    try:
+        with os.scandir(directory) as iterator:
+            rows: list[tuple[str, str, bool]] = []
+            for entry in iterator:
+                try:
+                    # Como rglob: no se desciende por enlaces simbolicos a carpetas.
+                    if entry.is_dir(follow_symlinks=False):
+                        rows.append((entry.name + "/", entry.name, True))
+                    elif entry.is_file() and match_file(entry.name):
+                        rows.append((entry.name, entry.name, False))
+                except OSError:
+                    continue
+    except OSError:
+        return
 
-    for entry in LIBRARY_ROOT.rglob("*.json"):
-        if not entry.is_file():
+    # Una carpeta ordena como "nombre/": el recorrido sale ya en el orden de las rutas completas.
+    rows.sort()
+    for _sort_key, name, is_dir in rows:
+        if not is_dir:
+            yield directory / name
             continue
-
-        rel_parts = entry.resolve().relative_to(LIBRARY_ROOT.resolve()).parts
-        if rel_parts and rel_parts[0] in {"_inbox", "_backups"}:
+        if name in STORY_WALK_SKIPPED_DIRS:
             continue
-
-        if not STORY_JSON_RE.fullmatch(entry.name):
+        if top_level and (name in STORY_EXCLUDED_TOP_LEVEL_DIRS or name == CACHE_ROOT.name):
             continue
+        yield from _walk_library_dir(directory / name, top_level=False, match_file=match_file)
 
-        matches.append(entry)
 
-    matches.sort(key=lambda item: item.as_posix())
-    return matches
+def iter_story_json_files(root: Path | None = None) -> Iterator[Path]:
+    # Poda antes de descender: images/ de cada nodo, cache y carpetas excluidas de primer nivel.
+    library_root = LIBRARY_ROOT if root is None else root
+    if not library_root.is_dir():
+        return iter(())
+    return _walk_library_dir(library_root, top_level=True, match_file=STORY_JSON_RE.fullmatch)
 
 
-def _read_story_file(story_file: Path) -> dict[str, Any]:
-    if not story_file.exists() or not story_file.is_file():
-        raise FileNotFoundError(f"No existe cuento JSON: {story_file}")
+def iter_node_meta_files(root: Path | None = None) -> Iterator[Path]:
+    # meta.json de cada nodo, con la misma poda que el descubrimiento de cuentos.
+    library_root = LIBRARY_ROOT if root is None else root
+    if not library_root.is_dir():
+        return iter(())
+    return _walk_library_dir(library_root, top_level=True, match_file="meta.json".__eq__)
+
+
+def list_story_json_files() -> list[Path]:
+    return list(iter_story_json_files())
 
-    try:
-        payload = json.loads(story_file.read_text(encoding="utf-8"))
-    except json.JSONDecodeError as exc:
-        raise StoryStoreError(f"JSON invalido en {story_file}: {exc}") from exc
 
+def _story_file_hints(story_file: Path) -> tuple[str, str]:
     story_id_hint = story_file.stem
     book_rel_hint = (
         story_file.parent.resolve().relative_to(LIBRARY_ROOT.resolve()).as_posix()
         if story_file.parent.resolve() != LIBRARY_ROOT.resolve()
         else ""
     )
+    return story_id_hint, book_rel_hint
+
+
+def _canonical_story_payload(raw: bytes) -> dict[str, Any] | None:
+    # Camino rapido: archivo sellado por _write_story_file y sin tocar desde entonces. La cabecera
+    # solo varia en el hash, asi que un sha256 correcto cubre el archivo entero.
+    hash_start = len(_CANONICAL_HEADER_PREFIX)
+    hash_end = hash_start + 64
+    body_start = hash_end + len(_CANONICAL_HEADER_SUFFIX)
+    if not raw.startswith(_CANONICAL_HEADER_PREFIX) or raw[hash_end:body_start] != _CANONICAL_HEADER_SUFFIX:
+        return None
+    if hashlib.sha256(memoryview(raw)[body_start:]).hexdigest().encode("ascii") != raw[hash_start:hash_end]:
+        return None
+
+    try:
+        payload = json_codec.loads(raw)
+    except json.JSONDecodeError:
+        return None
+    for key in _CANONICAL_MARKER_KEYS:
+        payload.pop(key, None)
+    # Sin book_rel_path la coercion usa la carpeta actual del archivo: se deja a la via completa.
+    if not payload.get("book_rel_path"):
+        return None
+    return payload
+
+
+def _read_story_file(story_file: Path) -> dict[str, Any]:
+    if not story_file.exists() or not story_file.is_file():
+        raise FileNotFoundError(f"No existe cuento JSON: {story_file}")
+
+    raw = story_file.read_bytes()
+    payload = _canonical_story_payload(raw)
+    if payload is not None:
+        return payload
+
+    # Archivo antiguo o editado a mano: coercion completa.
+    try:
+        payload = json_codec.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise StoryStoreError(f"JSON invalido en {story_file}: {exc}") from exc
+
+    story_id_hint, book_rel_hint = _story_file_hints(story_file)
     return _coerce_story_payload(payload, story_id_hint=story_id_hint, book_rel_path_hint=book_rel_hint)
 
 
+def _story_file_content(story_file: Path, payload: dict[str, Any]) -> bytes:
+    body = json_codec.dumps_pretty(payload)
+    story_id_hint, book_rel_hint = _story_file_hints(story_file)
+    try:
+        canonical = _coerce_story_payload(payload, story_id_hint=story_id_hint, book_rel_path_hint=book_rel_hint)
+    except StoryStoreError:
+        canonical = None
+    # Solo se sella si la coercion no cambiaria ni un byte; si no, el archivo se escribe como
+    # siempre y cada lectura lo coerciona.
+    if canonical is None or json_codec.dumps_pretty(canonical) != body:
+        return body + b"\n"
+
+    rest = body[2:] + b"\n"  # body empieza por "{\n": la cabecera abre el objeto.
+    digest = hashlib.sha256(rest).hexdigest().encode("ascii")
+    return _CANONICAL_HEADER_PREFIX + digest + _CANONICAL_HEADER_SUFFIX + rest
+
+
 def _write_story_file(story_file: Path, payload: dict[str, Any]) -> None:
     story_file.parent.mkdir(parents=True, exist_ok=True)
-    temp_file = story_file.with_suffix(story_file.suffix + ".tmp")
-    content = json.dumps(payload, indent=2, ensure_ascii=False) + "\n"
+    # Nombre unico: dos escrituras simultaneas (otro proceso, lock no disponible) no comparten temporal.
+    temp_file = story_file.with_name(f"{story_file.name}.{uuid.uuid4().hex}.tmp")
+    content = _story_file_content(story_file, payload)
 
     try:
-        temp_file.write_text(content, encoding="utf-8")
+        temp_file.write_bytes(content)
     except OSError as exc:
         raise StoryStoreError(f"No se pudo escribir temporal JSON: {exc}") from exc
 
@@ -281,7 +517,7 @@ def _write_story_file(story_file: Path, payload: dict[str, Any]) -> None:
         temp_file.replace(story_file)
     except OSError:
         try:
-            story_file.write_text(content, encoding="utf-8")
+            story_file.write_bytes(content)
         except OSError as exc:
             raise StoryStoreError(f"No se pudo guardar JSON de cuento: {exc}") from exc
         finally:
@@ -291,60 +527,38 @@ def _write_story_file(story_file: Path, payload: dict[str, Any]) -> None:
             except OSError:
                 pass
 
+    try:
+        _notify_store_change(STORE_CHANGE_STORY, json_path_to_story_rel(story_file))
+    except ValueError:
+        pass
+
 
 def load_story(story_rel_path: str) -> dict[str, Any]:
     story_file = story_rel_to_json_path(story_rel_path)
     return _read_story_file(story_file)
 
 
-def get_story(story_rel_path: str) -> dict[str, Any] | None:
-    try:
-        payload = load_story(story_rel_path)
-    except (FileNotFoundError, StoryStoreError):
-        return None
-
-    pages = payload["pages"]
-    slots = 0
-    alternatives = 0
-    for page in pages:
-        images = page.get("images", {})
-        for slot_name in SLOT_NAMES:
-            slot = images.get(slot_name)
-            if not isinstance(slot, dict):
-                continue
-            slots += 1
-            alternatives += len(slot.get("alternatives", []))
-
-    cover_alternatives = len(payload.get("cover", {}).get("alternatives", []))
-
-    story_rel = _normalize_rel_path(story_rel_path)
-    return {
-        "story_rel_path": story_rel,
-        "story_id": payload["story_id"],
-        "title": payload["title"],
-        "status": payload["status"],
-        "book_rel_path": payload["book_rel_path"],
-        "created_at": payload["created_at"],
-        "updated_at": payload["updated_at"],
-        "pages": len(pages),
-        "slots": slots,
-        "alternatives": alternatives,
-        "cover_alternatives": cover_alternatives,
-    }
+def canonicalize_story_file(story_rel_path: str, *, dry_run: bool = False) -> bool:
+    # Reescribe en forma canonica (sellada) un NN.json antiguo o editado a mano, sin tocar updated_at.
+    # Devuelve True si el archivo no estaba sellado.
+    story_file = story_rel_to_json_path(story_rel_path)
+    with _locked_path(story_file):
+        if not story_file.is_file():
+            raise FileNotFoundError(f"No existe cuento JSON: {story_file}")
+        if _canonical_story_payload(story_file.read_bytes()) is not None:
+            return False
+        if not dry_run:
+            _write_story_file(story_file, _read_story_file(story_file))
+    return True
 
 
-def list_story_pages(story_rel_path: str) -> list[dict[str, Any]]:
-    payload = load_story(story_rel_path)
-    rows: list[dict[str, Any]] = []
-    for page in payload["pages"]:
-        rows.append(
-            {
-                "page_number": int(page["page_number"]),
-                "text": str(page.get("text", "")),
-            }
-        )
-    rows.sort(key=lambda item: item["page_number"])
-    return rows
+def _story_file_fingerprint(story_file: Path) -> tuple[int, int, int] | None:
+    try:
+        stat = story_file.stat()
+    except OSError:
+        return None
+    # st_ino cambia en cada reemplazo atomico de _write_story_file.
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
 
 
 def _find_page(payload: dict[str, Any], page_number: int) -> dict[str, Any] | None:
@@ -370,39 +584,129 @@ def _build_slot_view(slot_name: str, slot_payload: dict[str, Any]) -> dict[str,
     }
 
 
-def get_story_page(story_rel_path: str, page_number: int) -> dict[str, Any] | None:
-    payload = load_story(story_rel_path)
-    page = _find_page(payload, page_number)
-    if not page:
+# Cuento cargado y coercionado una sola vez; todos los accesores de lectura
+# trabajan sobre el mismo payload en memoria.
+class StoryHandle:
+    def __init__(
+        self,
+        story_rel_path: str,
+        payload: dict[str, Any],
+        fingerprint: tuple[int, int, int] | None = None,
+    ) -> None:
+        self.story_rel_path = _normalize_rel_path(story_rel_path)
+        self.payload = payload
+        self.fingerprint = fingerprint
+
+    def is_current(self) -> bool:
+        if self.fingerprint is None:
+            return False
+        return _story_file_fingerprint(story_rel_to_json_path(self.story_rel_path)) == self.fingerprint
+
+    def summary(self) -> dict[str, Any]:
+        payload = self.payload
+        pages = payload["pages"]
+        slots = 0
+        alternatives = 0
+        for page in pages:
+            images = page.get("images", {})
+            for slot_name in SLOT_NAMES:
+                slot = images.get(slot_name)
+                if not isinstance(slot, dict):
+                    continue
+                slots += 1
+                alternatives += len(slot.get("alternatives", []))
+
+        cover_alternatives = len(payload.get("cover", {}).get("alternatives", []))
+
+        return {
+            "story_rel_path": self.story_rel_path,
+            "story_id": payload["story_id"],
+            "title": payload["title"],
+            "status": payload["status"],
+            "book_rel_path": payload["book_rel_path"],
+            "created_at": payload["created_at"],
+            "updated_at": payload["updated_at"],
+            "pages": len(pages),
+            "slots": slots,
+            "alternatives": alternatives,
+            "cover_alternatives": cover_alternatives,
+        }
+
+    def pages(self) -> list[dict[str, Any]]:
+        rows: list[dict[str, Any]] = []
+        for page in self.payload["pages"]:
+            rows.append(
+                {
+                    "page_number": int(page["page_number"]),
+                    "text": str(page.get("text", "")),
+                }
+            )
+        rows.sort(key=lambda item: item["page_number"])
+        return rows
+
+    def first_page_number(self) -> int:
+        page_numbers = [int(page["page_number"]) for page in self.payload["pages"]]
+        return min(page_numbers) if page_numbers else 1
+
+    def page(self, page_number: int) -> dict[str, Any] | None:
+        page = _find_page(self.payload, page_number)
+        if not page:
+            return None
+
+        return {
+            "page_number": int(page["page_number"]),
+            "text": str(page.get("text", "")),
+            "images": page.get("images", {}),
+        }
+
+    def page_slots(self, page_number: int) -> list[dict[str, Any]]:
+        page = _find_page(self.payload, page_number)
+        if not page:
+            return []
+
+        images = page.get("images", {})
+        items: list[dict[str, Any]] = []
+        for slot_name in SLOT_NAMES:
+            slot = images.get(slot_name)
+            if not isinstance(slot, dict):
+                continue
+            items.append(_build_slot_view(slot_name, slot))
+        return items
+
+    def cover(self) -> dict[str, Any]:
+        cover = self.payload.get("cover", _slot_default())
+        return _build_slot_view("cover", cover)
+
+
+def open_story(story_rel_path: str) -> StoryHandle:
+    story_file = story_rel_to_json_path(story_rel_path)
+    fingerprint = _story_file_fingerprint(story_file)
+    payload = _read_story_file(story_file)
+    return StoryHandle(story_rel_path, payload, fingerprint)
+
+
+def get_story(story_rel_path: str) -> dict[str, Any] | None:
+    try:
+        return open_story(story_rel_path).summary()
+    except (FileNotFoundError, StoryStoreError):
         return None
 
-    return {
-        "page_number": int(page["page_number"]),
-        "text": str(page.get("text", "")),
-        "images": page.get("images", {}),
-    }
 
+def list_story_pages(story_rel_path: str) -> list[dict[str, Any]]:
+    return open_story(story_rel_path).pages()
 
-def list_page_slots(story_rel_path: str, page_number: int) -> list[dict[str, Any]]:
-    payload = load_story(story_rel_path)
-    page = _find_page(payload, page_number)
-    if not page:
-        return []
 
-    images = page.get("images", {})
-    items: list[dict[str, Any]] = []
-    for slot_name in SLOT_NAMES:
-        slot = images.get(slot_name)
-        if not isinstance(slot, dict):
-            continue
-        items.append(_build_slot_view(slot_name, slot))
-    return items
+def get_story_page(story_rel_path: str, page_number: int) -> dict[str, Any] | None:
+    return open_story(story_rel_path).page(page_number)
+
+
+def list_page_slots(story_rel_path: str, page_number: int) -> list[dict[str, Any]]:
+    return open_story(story_rel_path).page_slots(page_number)
 
 
 def get_story_cover(story_rel_path: str) -> dict[str, Any]:
-    payload = load_story(story_rel_path)
-    cover = payload.get("cover", _slot_default())
-    return _build_slot_view("cover", cover)
+    return open_story(story_rel_path).cover()
+
 
 def _ensure_slot(page: dict[str, Any], slot_name: str) -> dict[str, Any]:
     slot_name = _normalize_slot_name(slot_name)
@@ -437,6 +741,222 @@ def _parse_reference_ids(raw_value: str | None) -> list[str]:
     return values
 
 
+# Transaccion sobre un cuento: un solo read+coerce, varias mutaciones sobre el mismo payload
+# y una sola escritura atomica (mas un upsert agrupado de index.json) al cerrar edit().
+class StoryEdit(StoryHandle):
+    def __init__(self, story_rel_path: str, payload: dict[str, Any]) -> None:
+        super().__init__(story_rel_path, payload)
+        self.changed = False
+        self._written_images: list[Path] = []
+        self._pending_index: dict[str, list[tuple[str, str]]] = {}
+
+    def _require_page(self, page_number: int) -> dict[str, Any]:
+        page = _find_page(self.payload, page_number)
+        if not page:
+            raise StoryStoreError(f"No existe pagina {page_number} en {self.story_rel_path}.")
+        return page
+
+    def _node_rel_path(self) -> str:
+        return _normalize_rel_path(str(self.payload.get("book_rel_path", "")))
+
+    def save_page(
+        self,
+        *,
+        page_number: int,
+        text: str,
+        main_prompt: str,
+        secondary_prompt: str | None,
+        main_reference_ids: str | None,
+        secondary_reference_ids: str | None,
+    ) -> None:
+        page = self._require_page(page_number)
+        page["text"] = str(text)
+
+        main_slot = _ensure_slot(page, "main")
+        main_slot["prompt"] = str(main_prompt)
+        main_slot["reference_ids"] = _parse_reference_ids(main_reference_ids)
+
+        secondary_value = (secondary_prompt or "").strip()
+        secondary_refs = _parse_reference_ids(secondary_reference_ids)
+        has_secondary = "secondary" in page.get("images", {})
+        if secondary_value or secondary_refs or has_secondary:
+            secondary_slot = _ensure_slot(page, "secondary")
+            secondary_slot["prompt"] = str(secondary_prompt or "")
+            secondary_slot["reference_ids"] = secondary_refs
+        self.changed = True
+
+    def save_cover(self, *, prompt: str, reference_ids: str | None) -> None:
+        cover = _ensure_cover(self.payload)
+        cover["prompt"] = str(prompt)
+        cover["reference_ids"] = _parse_reference_ids(reference_ids)
+        self.changed = True
+
+    def set_status(self, status: str) -> None:
+        normalized_status = status.strip().lower()
+        if normalized_status not in STORY_STATUS_VALUES:
+            raise StoryStoreError(f"status invalido: {status}")
+        self.payload["status"] = normalized_status
+        self.changed = True
+
+    def _add_alternative(
+        self,
+        *,
+        slot: dict[str, Any],
+        file_name: str,
+        slug: str,
+        mime_type: str,
+        notes: str,
+        image_bytes: bytes,
+        description: str,
+    ) -> dict[str, Any]:
+        node_rel_path = self._node_rel_path()
+        _assert_available_image_name(node_rel_path=node_rel_path, file_name=file_name)
+        alternative = _new_alternative(
+            node_rel_path=node_rel_path,
+            file_name=file_name,
+            slug=slug,
+            mime_type=mime_type,
+            notes=notes,
+        )
+        image_path = _write_node_image(node_rel_path=node_rel_path, file_name=alternative["id"], image_bytes=image_bytes)
+        self._written_images.append(image_path)
+        self._pending_index.setdefault(node_rel_path, []).append((alternative["id"], description))
+
+        alternatives = slot.setdefault("alternatives", [])
+        alternatives.append(alternative)
+        if not str(slot.get("active_id", "")).strip():
+            slot["active_id"] = alternative["id"]
+        self.changed = True
+        return alternative
+
+    def add_slot_alternative(
+        self,
+        *,
+        page_number: int,
+        slot_name: str,
+        image_bytes: bytes,
+        mime_type: str,
+        slug: str,
+        notes: str,
+    ) -> dict[str, Any]:
+        if not image_bytes:
+            raise StoryStoreError("No se recibieron bytes de imagen.")
+
+        normalized_slot = _normalize_slot_name(slot_name)
+        slot = _ensure_slot(self._require_page(page_number), normalized_slot)
+        safe_slug = _normalize_slug(slug, normalized_slot)
+        story_id = str(self.payload.get("story_id", "")).strip()
+        file_name = _build_slot_image_name(
+            story_id=story_id,
+            page_number=page_number,
+            slot_name=normalized_slot,
+            slug=safe_slug,
+            mime_type=mime_type,
+        )
+        return self._add_alternative(
+            slot=slot,
+            file_name=file_name,
+            slug=safe_slug,
+            mime_type=mime_type,
+            notes=notes,
+            image_bytes=image_bytes,
+            description=f"story {self.payload['story_id']} page {page_number} slot {normalized_slot}",
+        )
+
+    def set_slot_active(self, *, page_number: int, slot_name: str, alternative_id: str) -> dict[str, Any]:
+        slot = _ensure_slot(self._require_page(page_number), _normalize_slot_name(slot_name))
+        alternatives = slot.get("alternatives", [])
+        target = next((item for item in alternatives if str(item.get("id", "")) == alternative_id), None)
+        if not target:
+            raise StoryStoreError("La alternativa indicada no existe para este slot.")
+
+        slot["active_id"] = alternative_id
+        self.changed = True
+        return target
+
+    def add_cover_alternative(self, *, image_bytes: bytes, mime_type: str, slug: str, notes: str) -> dict[str, Any]:
+        if not image_bytes:
+            raise StoryStoreError("No se recibieron bytes de imagen.")
+
+        cover = _ensure_cover(self.payload)
+        safe_slug = _normalize_slug(slug, "cover")
+        story_id = str(self.payload.get("story_id", "")).strip()
+        file_name = _build_cover_image_name(story_id=story_id, slug=safe_slug, mime_type=mime_type)
+        return self._add_alternative(
+            slot=cover,
+            file_name=file_name,
+            slug=safe_slug,
+            mime_type=mime_type,
+            notes=notes,
+            image_bytes=image_bytes,
+            description=f"story {self.payload['story_id']} cover",
+        )
+
+    def set_cover_active(self, *, alternative_id: str) -> dict[str, Any]:
+        cover = _ensure_cover(self.payload)
+        alternatives = cover.get("alternatives", [])
+        target = next((item for item in alternatives if str(item.get("id", "")) == alternative_id), None)
+        if not target:
+            raise StoryStoreError("La alternativa indicada no existe para la portada.")
+
+        cover["active_id"] = alternative_id
+        self.changed = True
+        return target
+
+    def _commit(self, story_file: Path) -> None:
+        self.payload["updated_at"] = _utc_now_iso()
+        _write_story_file(story_file, self.payload)
+        # El cuento ya referencia las imagenes nuevas: desde aqui un fallo no debe borrarlas.
+        # index.json se actualiza despues para no dejar entradas de imagenes descartadas.
+        self._written_images.clear()
+        pending_index, self._pending_index = self._pending_index, {}
+        for node_rel_path, items in pending_index.items():
+            _upsert_image_index_entries(node_rel_path, items)
+        self.changed = False
+
+    def _discard(self) -> None:
+        # Una transaccion abortada no deja imagenes huerfanas en disco.
+        for image_path in self._written_images:
+            try:
+                image_path.unlink()
+            except OSError:
+                pass
+        self._written_images.clear()
+        self._pending_index.clear()
+
+
+@contextmanager
+def edit(story_rel_path: str, *, expected_updated_at: str | None = None) -> Iterator[StoryEdit]:
+    story_file = story_rel_to_json_path(story_rel_path)
+    key = os.path.abspath(story_file)
+    open_edits = getattr(_OPEN_EDITS, "by_path", None)
+    if open_edits is None:
+        open_edits = _OPEN_EDITS.by_path = {}
+
+    current = open_edits.get(key)
+    if current is not None:
+        # Mutador llamado dentro de una transaccion abierta del mismo hilo: se suma a ella
+        # en lugar de releer el archivo y pisar los cambios pendientes al cerrar.
+        _check_expected_updated_at(current.payload, expected_updated_at, story_rel_path)
+        yield current
+        return
+
+    with _locked_path(story_file):
+        payload = _read_story_file(story_file)
+        _check_expected_updated_at(payload, expected_updated_at, story_rel_path)
+        story = StoryEdit(story_rel_path, payload)
+        open_edits[key] = story
+        try:
+            yield story
+            if story.changed:
+                story._commit(story_file)
+        except BaseException:
+            story._discard()
+            raise
+        finally:
+            open_edits.pop(key, None)
+
+
 def save_page_edits(
     *,
     story_rel_path: str,
@@ -446,48 +966,34 @@ def save_page_edits(
     secondary_prompt: str | None,
     main_reference_ids: str | None,
     secondary_reference_ids: str | None,
+    expected_updated_at: str | None = None,
 ) -> dict[str, Any]:
-    story_file = story_rel_to_json_path(story_rel_path)
-    payload = _read_story_file(story_file)
-
-    page = _find_page(payload, page_number)
-    if not page:
-        raise StoryStoreError(f"No existe pagina {page_number} en {story_rel_path}.")
-
-    page["text"] = str(text)
-
-    main_slot = _ensure_slot(page, "main")
-    main_slot["prompt"] = str(main_prompt)
-    main_slot["reference_ids"] = _parse_reference_ids(main_reference_ids)
-
-    secondary_value = (secondary_prompt or "").strip()
-    secondary_refs = _parse_reference_ids(secondary_reference_ids)
-    has_secondary = "secondary" in page.get("images", {})
-    if secondary_value or secondary_refs or has_secondary:
-        secondary_slot = _ensure_slot(page, "secondary")
-        secondary_slot["prompt"] = str(secondary_prompt or "")
-        secondary_slot["reference_ids"] = secondary_refs
-
-    payload["updated_at"] = _utc_now_iso()
-    _write_story_file(story_file, payload)
+    with edit(story_rel_path, expected_updated_at=expected_updated_at) as story:
+        story.save_page(
+            page_number=page_number,
+            text=text,
+            main_prompt=main_prompt,
+            secondary_prompt=secondary_prompt,
+            main_reference_ids=main_reference_ids,
+            secondary_reference_ids=secondary_reference_ids,
+        )
 
-    updated_page = get_story_page(story_rel_path, page_number)
+    updated_page = story.page(page_number)
     if not updated_page:
         raise StoryStoreError("No se pudo recargar la pagina tras guardar.")
     return updated_page
 
 
-def save_cover_edits(*, story_rel_path: str, prompt: str, reference_ids: str | None) -> dict[str, Any]:
-    story_file = story_rel_to_json_path(story_rel_path)
-    payload = _read_story_file(story_file)
-
-    cover = _ensure_cover(payload)
-    cover["prompt"] = str(prompt)
-    cover["reference_ids"] = _parse_reference_ids(reference_ids)
-
-    payload["updated_at"] = _utc_now_iso()
-    _write_story_file(story_file, payload)
-    return get_story_cover(story_rel_path)
+def save_cover_edits(
+    *,
+    story_rel_path: str,
+    prompt: str,
+    reference_ids: str | None,
+    expected_updated_at: str | None = None,
+) -> dict[str, Any]:
+    with edit(story_rel_path, expected_updated_at=expected_updated_at) as story:
+        story.save_cover(prompt=prompt, reference_ids=reference_ids)
+    return story.cover()
 
 
 def _extension_for_mime(mime_type: str) -> str:
@@ -525,7 +1031,7 @@ def _load_image_index(node_rel_path: str) -> list[dict[str, Any]]:
         return []
 
     try:
-        payload = json.loads(index_path.read_text(encoding="utf-8"))
+        payload = json_codec.loads(index_path.read_bytes())
     except (json.JSONDecodeError, OSError):
         return []
 
@@ -551,44 +1057,111 @@ def _load_image_index(node_rel_path: str) -> list[dict[str, Any]]:
     return entries
 
 
-def _write_image_index(node_rel_path: str, entries: list[dict[str, Any]]) -> None:
+def _image_index_block(entry: dict[str, Any]) -> bytes:
+    # Entrada tal como aparece dentro de la lista con indent=2: se serializa una sola vez.
+    # Se parte solo por b"\n": las cadenas JSON nunca llevan saltos de linea sin escapar.
+    return b"\n".join(b"  " + line for line in json_codec.dumps_pretty(entry).split(b"\n"))
+
+
+# index.json de un nodo en memoria: entradas por filename (bloque JSON incluido) y orden
+# de escritura mantenido con bisect, asi un alta no relee, ni reordena, ni reserializa la lista.
+class _ImageIndex:
+    def __init__(self, fingerprint: tuple[int, int, int] | None, rows: list[dict[str, Any]]) -> None:
+        self.fingerprint = fingerprint
+        self.entries: dict[str, dict[str, Any]] = {}
+        for item in rows:
+            self.entries.setdefault(item["filename"], item)
+        # Claves de orden y bloques en listas paralelas: render() es un unico join.
+        self.order = sorted((file_name.lower(), file_name) for file_name in self.entries)
+        self.blocks = [_image_index_block(self.entries[file_name]) for _key, file_name in self.order]
+
+    def get(self, file_name: str) -> dict[str, Any] | None:
+        return self.entries.get(file_name)
+
+    def put(self, entry: dict[str, Any]) -> None:
+        file_name = entry["filename"]
+        sort_key = (file_name.lower(), file_name)
+        position = bisect.bisect_left(self.order, sort_key)
+        if file_name in self.entries:
+            self.blocks[position] = _image_index_block(entry)
+        else:
+            self.order.insert(position, sort_key)
+            self.blocks.insert(position, _image_index_block(entry))
+        self.entries[file_name] = entry
+
+    def render(self) -> bytes:
+        # Mismo contenido que json.dumps(lista, indent=2), uniendo bloques ya serializados.
+        if not self.blocks:
+            return b"[]\n"
+        return b"[\n" + b",\n".join(self.blocks) + b"\n]\n"
+
+
+def _load_image_index_cached(node_rel_path: str) -> _ImageIndex:
+    index_path = _image_index_path(node_rel_path)
+    cache_key = os.path.abspath(index_path)
+    fingerprint = _story_file_fingerprint(index_path)
+    cached = _IMAGE_INDEXES.get(cache_key)
+    if cached is not None and cached.fingerprint == fingerprint:
+        return cached
+
+    # Primer uso, otro proceso o una edicion manual cambiaron index.json: se reconstruye desde disco.
+    index = _ImageIndex(fingerprint, _load_image_index(node_rel_path))
+    _IMAGE_INDEXES[cache_key] = index
+    return index
+
+
+def _write_image_index(node_rel_path: str, index: _ImageIndex) -> None:
     index_path = _image_index_path(node_rel_path)
+    cache_key = os.path.abspath(index_path)
     index_path.parent.mkdir(parents=True, exist_ok=True)
-    content = json.dumps(entries, indent=2, ensure_ascii=False) + "\n"
+
+    temp_file = index_path.with_name(f"{index_path.name}.{uuid.uuid4().hex}.tmp")
     try:
-        index_path.write_text(content, encoding="utf-8")
+        temp_file.write_bytes(index.render())
+        temp_file.replace(index_path)
     except OSError as exc:
+        _IMAGE_INDEXES.pop(cache_key, None)
         raise StoryStoreError(f"No se pudo escribir index de imagenes: {exc}") from exc
+    finally:
+        if temp_file.exists():
+            temp_file.unlink()
+    index.fingerprint = _story_file_fingerprint(index_path)
 
 
 def _upsert_image_index(*, node_rel_path: str, file_name: str, description: str) -> None:
-    entries = _load_image_index(node_rel_path)
-    asset_rel_path = _asset_rel_path_for_node(node_rel_path, file_name)
-    normalized_node = _normalize_rel_path(node_rel_path)
-
-    updated = False
-    for item in entries:
-        if item["filename"] != file_name:
-            continue
-        item["asset_rel_path"] = asset_rel_path
-        item["description"] = description.strip()
-        item["node_rel_path"] = normalized_node
-        updated = True
-        break
-
-    if not updated:
-        entries.append(
-            {
-                "filename": file_name,
-                "asset_rel_path": asset_rel_path,
-                "description": description.strip(),
-                "node_rel_path": normalized_node,
-                "created_at": _utc_now_iso(),
-            }
-        )
-
-    entries.sort(key=lambda item: item["filename"].lower())
-    _write_image_index(node_rel_path, entries)
+    _upsert_image_index_entries(node_rel_path, [(file_name, description)])
+
+
+def _upsert_image_index_entries(node_rel_path: str, items: list[tuple[str, str]]) -> None:
+    # index.json es compartido por todos los cuentos del nodo: se serializa aparte del lock del cuento.
+    with _locked_path(_image_index_path(node_rel_path)):
+        index = _load_image_index_cached(node_rel_path)
+        normalized_node = _normalize_rel_path(node_rel_path)
+
+        changed = False
+        for file_name, description in items:
+            asset_rel_path = _asset_rel_path_for_node(node_rel_path, file_name)
+            current = index.get(file_name)
+            if current is not None:
+                entry = dict(current)
+                entry["asset_rel_path"] = asset_rel_path
+                entry["description"] = description.strip()
+                entry["node_rel_path"] = normalized_node
+                if entry == current:
+                    continue
+            else:
+                entry = {
+                    "filename": file_name,
+                    "asset_rel_path": asset_rel_path,
+                    "description": description.strip(),
+                    "node_rel_path": normalized_node,
+                    "created_at": _utc_now_iso(),
+                }
+            index.put(entry)
+            changed = True
+
+        if changed:
+            _write_image_index(node_rel_path, index)
 
 
 def _write_node_image(*, node_rel_path: str, file_name: str, image_bytes: bytes) -> Path:
@@ -658,52 +1231,17 @@ def add_slot_alternative(
     mime_type: str,
     slug: str,
     notes: str,
+    expected_updated_at: str | None = None,
 ) -> dict[str, Any]:
-    if not image_bytes:
-        raise StoryStoreError("No se recibieron bytes de imagen.")
-
-    normalized_slot = _normalize_slot_name(slot_name)
-    story_file = story_rel_to_json_path(story_rel_path)
-    payload = _read_story_file(story_file)
-
-    page = _find_page(payload, page_number)
-    if not page:
-        raise StoryStoreError(f"No existe pagina {page_number} en {story_rel_path}.")
-
-    slot = _ensure_slot(page, normalized_slot)
-    node_rel_path = _normalize_rel_path(str(payload.get("book_rel_path", "")))
-    safe_slug = _normalize_slug(slug, normalized_slot)
-    story_id = str(payload.get("story_id", "")).strip()
-    file_name = _build_slot_image_name(
-        story_id=story_id,
-        page_number=page_number,
-        slot_name=normalized_slot,
-        slug=safe_slug,
-        mime_type=mime_type,
-    )
-    _assert_available_image_name(node_rel_path=node_rel_path, file_name=file_name)
-    alternative = _new_alternative(
-        node_rel_path=node_rel_path,
-        file_name=file_name,
-        slug=safe_slug,
-        mime_type=mime_type,
-        notes=notes,
-    )
-    _write_node_image(node_rel_path=node_rel_path, file_name=alternative["id"], image_bytes=image_bytes)
-    _upsert_image_index(
-        node_rel_path=node_rel_path,
-        file_name=alternative["id"],
-        description=f"story {payload['story_id']} page {page_number} slot {normalized_slot}",
-    )
-
-    alternatives = slot.setdefault("alternatives", [])
-    alternatives.append(alternative)
-    if not str(slot.get("active_id", "")).strip():
-        slot["active_id"] = alternative["id"]
-
-    payload["updated_at"] = _utc_now_iso()
-    _write_story_file(story_file, payload)
-    return alternative
+    with edit(story_rel_path, expected_updated_at=expected_updated_at) as story:
+        return story.add_slot_alternative(
+            page_number=page_number,
+            slot_name=slot_name,
+            image_bytes=image_bytes,
+            mime_type=mime_type,
+            slug=slug,
+            notes=notes,
+        )
 
 
 def set_slot_active(
@@ -712,26 +1250,10 @@ def set_slot_active(
     page_number: int,
     slot_name: str,
     alternative_id: str,
+    expected_updated_at: str | None = None,
 ) -> dict[str, Any]:
-    normalized_slot = _normalize_slot_name(slot_name)
-    story_file = story_rel_to_json_path(story_rel_path)
-    payload = _read_story_file(story_file)
-
-    page = _find_page(payload, page_number)
-    if not page:
-        raise StoryStoreError(f"No existe pagina {page_number} en {story_rel_path}.")
-
-    slot = _ensure_slot(page, normalized_slot)
-    alternatives = slot.get("alternatives", [])
-
-    target = next((item for item in alternatives if str(item.get("id", "")) == alternative_id), None)
-    if not target:
-        raise StoryStoreError("La alternativa indicada no existe para este slot.")
-
-    slot["active_id"] = alternative_id
-    payload["updated_at"] = _utc_now_iso()
-    _write_story_file(story_file, payload)
-    return target
+    with edit(story_rel_path, expected_updated_at=expected_updated_at) as story:
+        return story.set_slot_active(page_number=page_number, slot_name=slot_name, alternative_id=alternative_id)
 
 
 def add_cover_alternative(
@@ -741,58 +1263,20 @@ def add_cover_alternative(
     mime_type: str,
     slug: str,
     notes: str,
+    expected_updated_at: str | None = None,
 ) -> dict[str, Any]:
-    if not image_bytes:
-        raise StoryStoreError("No se recibieron bytes de imagen.")
+    with edit(story_rel_path, expected_updated_at=expected_updated_at) as story:
+        return story.add_cover_alternative(image_bytes=image_bytes, mime_type=mime_type, slug=slug, notes=notes)
 
-    story_file = story_rel_to_json_path(story_rel_path)
-    payload = _read_story_file(story_file)
-    cover = _ensure_cover(payload)
 
-    node_rel_path = _normalize_rel_path(str(payload.get("book_rel_path", "")))
-    safe_slug = _normalize_slug(slug, "cover")
-    story_id = str(payload.get("story_id", "")).strip()
-    file_name = _build_cover_image_name(story_id=story_id, slug=safe_slug, mime_type=mime_type)
-    _assert_available_image_name(node_rel_path=node_rel_path, file_name=file_name)
-    alternative = _new_alternative(
-        node_rel_path=node_rel_path,
-        file_name=file_name,
-        slug=safe_slug,
-        mime_type=mime_type,
-        notes=notes,
-    )
-
-    _write_node_image(node_rel_path=node_rel_path, file_name=alternative["id"], image_bytes=image_bytes)
-    _upsert_image_index(
-        node_rel_path=node_rel_path,
-        file_name=alternative["id"],
-        description=f"story {payload['story_id']} cover",
-    )
-
-    alternatives = cover.setdefault("alternatives", [])
-    alternatives.append(alternative)
-    if not str(cover.get("active_id", "")).strip():
-        cover["active_id"] = alternative["id"]
-
-    payload["updated_at"] = _utc_now_iso()
-    _write_story_file(story_file, payload)
-    return alternative
-
-
-def set_cover_active(*, story_rel_path: str, alternative_id: str) -> dict[str, Any]:
-    story_file = story_rel_to_json_path(story_rel_path)
-    payload = _read_story_file(story_file)
-    cover = _ensure_cover(payload)
-
-    alternatives = cover.get("alternatives", [])
-    target = next((item for item in alternatives if str(item.get("id", "")) == alternative_id), None)
-    if not target:
-        raise StoryStoreError("La alternativa indicada no existe para la portada.")
-
-    cover["active_id"] = alternative_id
-    payload["updated_at"] = _utc_now_iso()
-    _write_story_file(story_file, payload)
-    return target
+def set_cover_active(
+    *,
+    story_rel_path: str,
+    alternative_id: str,
+    expected_updated_at: str | None = None,
+) -> dict[str, Any]:
+    with edit(story_rel_path, expected_updated_at=expected_updated_at) as story:
+        return story.set_cover_active(alternative_id=alternative_id)
 
 
 def resolve_media_rel_path(rel_path: str) -> Path:
@@ -820,7 +1304,7 @@ def _node_levels(node_rel_path: str) -> list[str]:
     return levels
 
 
-def _select_anchor_resolved_filename(node_level: str, anchor: dict[str, Any]) -> str:
+def _select_anchor_resolved_filename(anchor: dict[str, Any], has_file: Callable[[str], bool]) -> str:
     candidates: list[str] = []
     active_id = str(anchor.get("active_id", "")).strip()
     if active_id:
@@ -848,8 +1332,7 @@ def _select_anchor_resolved_filename(node_level: str, anchor: dict[str, Any]) ->
         if not normalized_candidate or normalized_candidate in seen:
             continue
         seen.add(normalized_candidate)
-        candidate_path = _node_images_dir(node_level) / normalized_candidate
-        if candidate_path.exists() and candidate_path.is_file():
+        if has_file(normalized_candidate):
             return normalized_candidate
 
         # Compatibilidad legacy: meta con ruta, archivo en raiz de images/.
@@ -857,8 +1340,7 @@ def _select_anchor_resolved_filename(node_level: str, anchor: dict[str, Any]) ->
         if not file_name or file_name in seen:
             continue
         seen.add(file_name)
-        legacy_candidate = _node_images_dir(node_level) / file_name
-        if legacy_candidate.exists() and legacy_candidate.is_file():
+        if has_file(file_name):
             return file_name
 
     return ""
@@ -875,23 +1357,32 @@ def _legacy_anchor_aliases(anchor_id: str) -> list[str]:
     return aliases
 
 
-def _build_anchor_reference_fallback_map(search_levels: list[str]) -> dict[str, tuple[str, str]]:
-    fallback_map: dict[str, tuple[str, str]] = {}
+def _reference_file_key(file_name: str) -> str:
+    # En Windows el sistema de archivos no distingue mayusculas: la busqueda en memoria tampoco.
+    return file_name.casefold() if os.name == "nt" else file_name
 
-    for level in search_levels:
-        meta = get_node_meta(level)
-        if not meta:
-            continue
 
-        anchors = meta.get("anchors", [])
+# Instantanea de un nivel para resolver referencias: archivos de images/ (recursivo) y alias
+# de anclas de meta.json. Vale mientras no cambie la huella de meta.json ni el mtime de ningun
+# directorio de images/ (crear, borrar o renombrar un archivo cambia el mtime de su carpeta).
+class _LevelReferenceAssets:
+    def __init__(self, level: str) -> None:
+        self.level = level
+        self.meta_fingerprint, meta, _error = _cached_node_meta(level)
+        self.dir_stamps: list[tuple[str, int | None]] = []
+        self.files: set[str] = set()
+        self._scan_images(_node_images_dir(level), "")
+
+        self.aliases: dict[str, str] = {}
+        anchors = meta.get("anchors", []) if meta else []
         if not isinstance(anchors, list):
-            continue
+            anchors = []
 
         for anchor in anchors:
             if not isinstance(anchor, dict):
                 continue
 
-            resolved_file = _select_anchor_resolved_filename(level, anchor)
+            resolved_file = _select_anchor_resolved_filename(anchor, self.has_file)
             if not resolved_file:
                 continue
 
@@ -913,59 +1404,163 @@ def _build_anchor_reference_fallback_map(search_levels: list[str]) -> dict[str,
                         aliases.append(base_name)
 
             for alias in aliases:
-                if alias and alias not in fallback_map:
-                    fallback_map[alias] = (level, resolved_file)
+                if alias and alias not in self.aliases:
+                    self.aliases[alias] = resolved_file
 
-    return fallback_map
+    def _scan_images(self, directory: Path, prefix: str) -> None:
+        # El mtime se toma antes de listar: un cambio durante el listado invalida la instantanea.
+        try:
+            stamp: int | None = directory.stat().st_mtime_ns
+        except OSError:
+            stamp = None
+        self.dir_stamps.append((str(directory), stamp))
+        if stamp is None:
+            return
 
+        try:
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+        except OSError:
+            return
 
-def resolve_reference_assets(node_rel_path: str, reference_ids: list[str]) -> list[dict[str, Any]]:
-    normalized_node = _normalize_rel_path(node_rel_path)
-    search_levels = list(reversed(_node_levels(normalized_node)))
-    fallback_map = _build_anchor_reference_fallback_map(search_levels)
+        for entry in entries:
+            rel_name = f"{prefix}{entry.name}"
+            try:
+                if entry.is_dir():
+                    self._scan_images(Path(entry.path), rel_name + "/")
+                elif entry.is_file():
+                    self.files.add(_reference_file_key(rel_name))
+            except OSError:
+                continue
 
-    items: list[dict[str, Any]] = []
-    for raw_name in reference_ids:
-        reference_name = _normalize_reference_id(str(raw_name))
-        if not reference_name:
-            continue
+    def is_current(self) -> bool:
+        if _story_file_fingerprint(meta_path_for_node(self.level)) != self.meta_fingerprint:
+            return False
+        for directory, stamp in self.dir_stamps:
+            try:
+                current: int | None = os.stat(directory).st_mtime_ns
+            except OSError:
+                current = None
+            if current != stamp:
+                return False
+        return True
+
+    def has_file(self, file_name: str) -> bool:
+        return _reference_file_key(file_name) in self.files
+
+
+# Resolutor de referencias de un nodo: niveles del mas profundo a la raiz, cada uno con su
+# instantanea compartida entre nodos. resolve() no toca disco: quien lo obtiene lo valida una vez
+# (get_reference_resolver) y lo reutiliza para su peticion o lote; las escrituras del proceso lo invalidan.
+class ReferenceResolver:
+    def __init__(self, node_rel_path: str, levels: list[_LevelReferenceAssets]) -> None:
+        self.node_rel_path = node_rel_path
+        self.levels = levels
+        self.invalidated = False
+        self.fallback_map: dict[str, tuple[str, str]] = {}
+        for level_assets in levels:
+            for alias, resolved_file in level_assets.aliases.items():
+                self.fallback_map.setdefault(alias, (level_assets.level, resolved_file))
+
+    def is_current(self) -> bool:
+        return not self.invalidated and all(level_assets.is_current() for level_assets in self.levels)
+
+    def version_stamps(self) -> list[str]:
+        # Version de lo que resuelve: huella de meta.json y mtimes de images/ de cada nivel al escanearlo.
+        stamps: list[str] = []
+        for level_assets in self.levels:
+            meta_stamp = ":".join(str(value) for value in level_assets.meta_fingerprint or ()) or "-"
+            dir_stamps = ",".join("-" if stamp is None else str(stamp) for _directory, stamp in level_assets.dir_stamps)
+            stamps.append(f"{level_assets.level}={meta_stamp};{dir_stamps}")
+        return stamps
+
+    def _find_level(self, file_name: str) -> str | None:
+        for level_assets in self.levels:
+            if level_assets.has_file(file_name):
+                return level_assets.level
+        return None
 
-        found_rel_path = ""
-        found_node = ""
-        direct_candidates: list[str] = [reference_name]
-        base_name = Path(reference_name).name
-        if base_name and base_name != reference_name:
-            direct_candidates.append(base_name)
-
-        for candidate_name in direct_candidates:
-            for level in search_levels:
-                candidate = _node_images_dir(level) / candidate_name
-                if candidate.exists() and candidate.is_file():
+    def resolve(self, reference_ids: list[str]) -> list[dict[str, Any]]:
+        items: list[dict[str, Any]] = []
+        for raw_name in reference_ids:
+            reference_name = _normalize_reference_id(str(raw_name))
+            if not reference_name:
+                continue
+
+            found_rel_path = ""
+            found_node = ""
+            direct_candidates: list[str] = [reference_name]
+            base_name = Path(reference_name).name
+            if base_name and base_name != reference_name:
+                direct_candidates.append(base_name)
+
+            for candidate_name in direct_candidates:
+                level = self._find_level(candidate_name)
+                if level is not None:
                     found_rel_path = _asset_rel_path_for_node(level, candidate_name)
                     found_node = level
                     break
-            if found_rel_path:
-                break
-
-        if not found_rel_path:
-            fallback_match = fallback_map.get(reference_name)
-            if not fallback_match and base_name:
-                fallback_match = fallback_map.get(base_name)
-            if fallback_match:
-                matched_level, matched_name = fallback_match
-                found_rel_path = _asset_rel_path_for_node(matched_level, matched_name)
-                found_node = matched_level
-
-        items.append(
-            {
-                "filename": reference_name,
-                "found": bool(found_rel_path),
-                "asset_rel_path": found_rel_path,
-                "node_rel_path": found_node,
-            }
-        )
 
-    return items
+            if not found_rel_path:
+                fallback_match = self.fallback_map.get(reference_name)
+                if not fallback_match and base_name:
+                    fallback_match = self.fallback_map.get(base_name)
+                if fallback_match:
+                    matched_level, matched_name = fallback_match
+                    found_rel_path = _asset_rel_path_for_node(matched_level, matched_name)
+                    found_node = matched_level
+
+            items.append(
+                {
+                    "filename": reference_name,
+                    "found": bool(found_rel_path),
+                    "asset_rel_path": found_rel_path,
+                    "node_rel_path": found_node,
+                }
+            )
+
+        return items
+
+
+def _level_reference_assets(level: str) -> _LevelReferenceAssets:
+    with _REFERENCE_CACHE_LOCK:
+        cached = _REFERENCE_LEVELS.get(level)
+    if cached is not None and cached.is_current():
+        return cached
+
+    level_assets = _LevelReferenceAssets(level)
+    with _REFERENCE_CACHE_LOCK:
+        _REFERENCE_LEVELS[level] = level_assets
+    return level_assets
+
+
+def get_reference_resolver(node_rel_path: str) -> ReferenceResolver:
+    normalized_node = _normalize_rel_path(node_rel_path)
+    with _REFERENCE_CACHE_LOCK:
+        cached = _REFERENCE_RESOLVERS.get(normalized_node)
+    if cached is not None and cached.is_current():
+        return cached
+
+    levels = [_level_reference_assets(level) for level in reversed(_node_levels(normalized_node))]
+    resolver = ReferenceResolver(normalized_node, levels)
+    with _REFERENCE_CACHE_LOCK:
+        _REFERENCE_RESOLVERS[normalized_node] = resolver
+    return resolver
+
+
+def _invalidate_reference_level(level: str) -> None:
+    # Escritura del proceso en meta.json o images/ del nivel: sus resolutores caducan aunque el mtime
+    # del directorio no haya avanzado (resolucion gruesa) y aunque alguien los tenga guardados.
+    with _REFERENCE_CACHE_LOCK:
+        _REFERENCE_LEVELS.pop(level, None)
+        for node_rel_path, resolver in list(_REFERENCE_RESOLVERS.items()):
+            if any(level_assets.level == level for level_assets in resolver.levels):
+                resolver.invalidated = True
+                del _REFERENCE_RESOLVERS[node_rel_path]
+
+
+def resolve_reference_assets(node_rel_path: str, reference_ids: list[str]) -> list[dict[str, Any]]:
+    return get_reference_resolver(node_rel_path).resolve(reference_ids)
 
 
 def save_story_payload(
@@ -973,29 +1568,25 @@ def save_story_payload(
     story_rel_path: str,
     payload: dict[str, Any],
     touch_updated_at: bool = True,
+    expected_updated_at: str | None = None,
 ) -> dict[str, Any]:
     story_file = story_rel_to_json_path(story_rel_path)
-    story_id_hint = story_file.stem
-    book_rel_hint = (
-        story_file.parent.resolve().relative_to(LIBRARY_ROOT.resolve()).as_posix()
-        if story_file.parent.resolve() != LIBRARY_ROOT.resolve()
-        else ""
-    )
+    story_id_hint, book_rel_hint = _story_file_hints(story_file)
     normalized = _coerce_story_payload(payload, story_id_hint=story_id_hint, book_rel_path_hint=book_rel_hint)
     if touch_updated_at:
         normalized["updated_at"] = _utc_now_iso()
-    _write_story_file(story_file, normalized)
+    with _locked_path(story_file):
+        if expected_updated_at is not None and story_file.exists():
+            _check_expected_updated_at(_read_story_file(story_file), expected_updated_at, story_rel_path)
+        _write_story_file(story_file, normalized)
     return normalized
 
 
 def set_story_status(*, story_rel_path: str, status: str) -> dict[str, Any]:
-    normalized_status = status.strip().lower()
-    if normalized_status not in STORY_STATUS_VALUES:
-        raise StoryStoreError(f"status invalido: {status}")
+    with edit(story_rel_path) as story:
+        story.set_status(status)
+    return story.payload
 
-    payload = load_story(story_rel_path)
-    payload["status"] = normalized_status
-    return save_story_payload(story_rel_path=story_rel_path, payload=payload, touch_updated_at=True)
 
 def meta_path_for_node(node_rel_path: str) -> Path:
     normalized = _normalize_rel_path(node_rel_path)
@@ -1088,23 +1679,57 @@ def _coerce_meta_payload(payload: Any, node_rel_path: str) -> dict[str, Any]:
     return base
 
 
+def _cached_node_meta(normalized_node: str) -> tuple[tuple[int, int, int] | None, dict[str, Any] | None, str]:
+    # (huella, meta coercionado o None si no existe, error de parseo). Solo lectura: quien
+    # vaya a mutar el meta usa load_node_meta, que devuelve una copia.
+    meta_path = meta_path_for_node(normalized_node)
+    fingerprint = _story_file_fingerprint(meta_path)
+    with _META_CACHE_LOCK:
+        cached = _NODE_METAS.get(normalized_node)
+    if cached is not None and cached[0] == fingerprint:
+        return cached
+
+    entry: tuple[tuple[int, int, int] | None, dict[str, Any] | None, str] = (fingerprint, None, "")
+    if fingerprint is not None and meta_path.is_file():
+        try:
+            raw_payload = json_codec.loads(meta_path.read_bytes())
+        except OSError:
+            return (None, None, "")
+        except json.JSONDecodeError as exc:
+            entry = (fingerprint, None, f"JSON invalido en {meta_path}: {exc}")
+        else:
+            entry = (fingerprint, _coerce_meta_payload(raw_payload, normalized_node), "")
+
+    with _META_CACHE_LOCK:
+        _NODE_METAS[normalized_node] = entry
+    return entry
+
+
+def _node_meta_view(node_rel_path: str) -> dict[str, Any] | None:
+    return _cached_node_meta(_normalize_rel_path(node_rel_path))[1]
+
+
 def load_node_meta(node_rel_path: str, *, create_if_missing: bool = False) -> dict[str, Any]:
     normalized_node = _normalize_rel_path(node_rel_path)
     meta_path = meta_path_for_node(normalized_node)
 
-    if not meta_path.exists() or not meta_path.is_file():
+    _fingerprint, meta, error = _cached_node_meta(normalized_node)
+    if error:
+        raise StoryStoreError(error)
+    if meta is None:
         if not create_if_missing:
             raise FileNotFoundError(f"No existe meta.json en {normalized_node or 'library'}")
-        payload = _default_meta(normalized_node)
-        save_node_meta(normalized_node, payload, touch_updated_at=True)
-        return payload
-
-    try:
-        raw_payload = json.loads(meta_path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError as exc:
-        raise StoryStoreError(f"JSON invalido en {meta_path}: {exc}") from exc
+        with _locked_path(meta_path):
+            # Otro escritor pudo crearlo mientras se esperaba el lock.
+            _fingerprint, meta, error = _cached_node_meta(normalized_node)
+            if error:
+                raise StoryStoreError(error)
+            if meta is None:
+                payload = _default_meta(normalized_node)
+                save_node_meta(normalized_node, payload, touch_updated_at=True)
+                return payload
 
-    return _coerce_meta_payload(raw_payload, normalized_node)
+    return copy.deepcopy(meta)
 
 
 def get_node_meta(node_rel_path: str) -> dict[str, Any] | None:
@@ -1122,22 +1747,30 @@ def save_node_meta(node_rel_path: str, payload: dict[str, Any], *, touch_updated
 
     meta_path = meta_path_for_node(normalized_node)
     meta_path.parent.mkdir(parents=True, exist_ok=True)
-    content = json.dumps(normalized, indent=2, ensure_ascii=False) + "\n"
+    content = json_codec.dumps_pretty(normalized) + b"\n"
+    temp_file = meta_path.with_name(f"{meta_path.name}.{uuid.uuid4().hex}.tmp")
 
-    try:
-        meta_path.write_text(content, encoding="utf-8")
-    except OSError as exc:
-        raise StoryStoreError(f"No se pudo guardar meta.json: {exc}") from exc
+    with _locked_path(meta_path):
+        try:
+            temp_file.write_bytes(content)
+            temp_file.replace(meta_path)
+        except OSError as exc:
+            raise StoryStoreError(f"No se pudo guardar meta.json: {exc}") from exc
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
 
+    _notify_store_change(STORE_CHANGE_META, normalized_node)
     return normalized
 
 
 def list_meta_hierarchy(node_rel_path: str) -> list[dict[str, Any]]:
+    # Los meta devueltos son los de la cache: solo lectura.
     normalized_node = _normalize_rel_path(node_rel_path)
     rows: list[dict[str, Any]] = []
 
     for level in _node_levels(normalized_node):
-        meta = get_node_meta(level)
+        meta = _node_meta_view(level)
         if not meta:
             continue
         rows.append(
@@ -1151,10 +1784,20 @@ def list_meta_hierarchy(node_rel_path: str) -> list[dict[str, Any]]:
 
 
 def list_applicable_anchors(node_rel_path: str) -> list[dict[str, Any]]:
+    # Lista materializada por nodo: se reconstruye solo si cambia algun meta.json de la jerarquia.
+    # Las filas se comparten entre llamadas: solo lectura.
+    normalized_node = _normalize_rel_path(node_rel_path)
+    levels = [(level, _cached_node_meta(level)) for level in _node_levels(normalized_node)]
+    fingerprints = tuple(entry[0] for _level, entry in levels)
+    with _META_CACHE_LOCK:
+        cached = _APPLICABLE_ANCHORS.get(normalized_node)
+    if cached is not None and cached[0] == fingerprints:
+        return list(cached[1])
+
     rows: list[dict[str, Any]] = []
-    for item in list_meta_hierarchy(node_rel_path):
-        level = item["node_rel_path"]
-        meta = item["meta"]
+    for level, (_fingerprint, meta, _error) in levels:
+        if not meta:
+            continue
         for anchor in meta.get("anchors", []):
             if not isinstance(anchor, dict):
                 continue
@@ -1163,7 +1806,9 @@ def list_applicable_anchors(node_rel_path: str) -> list[dict[str, Any]]:
             rows.append(anchor_row)
 
     rows.sort(key=lambda item: (str(item.get("name", "")).lower(), str(item.get("id", "")).lower()))
-    return rows
+    with _META_CACHE_LOCK:
+        _APPLICABLE_ANCHORS[normalized_node] = (fingerprints, rows)
+    return list(rows)
 
 
 def upsert_anchor(*, node_rel_path: str, anchor_id: str, name: str, prompt: str, status: str) -> dict[str, Any]:
@@ -1171,27 +1816,29 @@ def upsert_anchor(*, node_rel_path: str, anchor_id: str, name: str, prompt: str,
     if not anchor_id.strip():
         raise StoryStoreError("anchor_id es obligatorio.")
 
-    meta = load_node_meta(normalized_node, create_if_missing=True)
-    anchors = meta.setdefault("anchors", [])
-
-    existing = next((item for item in anchors if str(item.get("id", "")) == anchor_id), None)
-    if existing is None:
-        existing = {
-            "id": anchor_id,
-            "name": name.strip() or anchor_id,
-            "prompt": prompt.strip(),
-            "image_filenames": [],
-            "status": status.strip() or "draft",
-            "active_id": "",
-            "alternatives": [],
-        }
-        anchors.append(existing)
-    else:
-        existing["name"] = name.strip() or anchor_id
-        existing["prompt"] = prompt.strip()
-        existing["status"] = status.strip() or str(existing.get("status", "draft"))
+    with _locked_path(meta_path_for_node(normalized_node)):
+        meta = load_node_meta(normalized_node, create_if_missing=True)
+        anchors = meta.setdefault("anchors", [])
+
+        existing = next((item for item in anchors if str(item.get("id", "")) == anchor_id), None)
+        if existing is None:
+            existing = {
+                "id": anchor_id,
+                "name": name.strip() or anchor_id,
+                "prompt": prompt.strip(),
+                "image_filenames": [],
+                "status": status.strip() or "draft",
+                "active_id": "",
+                "alternatives": [],
+            }
+            anchors.append(existing)
+        else:
+            existing["name"] = name.strip() or anchor_id
+            existing["prompt"] = prompt.strip()
+            existing["status"] = status.strip() or str(existing.get("status", "draft"))
+
+        save_node_meta(normalized_node, meta, touch_updated_at=True)
 
-    save_node_meta(normalized_node, meta, touch_updated_at=True)
     return existing
 
 
@@ -1210,66 +1857,72 @@ def add_anchor_alternative(
     mime_type: str,
     slug: str,
     notes: str,
+    activate: bool = False,
 ) -> dict[str, Any]:
     if not image_bytes:
         raise StoryStoreError("No se recibieron bytes de imagen.")
 
     normalized_node = _normalize_rel_path(node_rel_path)
-    meta = load_node_meta(normalized_node, create_if_missing=True)
-    anchor = _find_anchor(meta, anchor_id)
-    if not anchor:
-        raise StoryStoreError(f"No existe anchor_id {anchor_id} en {normalized_node or 'library'}.")
-
-    safe_slug = _normalize_slug(slug, _normalize_slug(anchor_id, "anchor"))
-    file_name = _build_anchor_image_name(slug=safe_slug, mime_type=mime_type)
-    _assert_available_image_name(node_rel_path=normalized_node, file_name=file_name)
-    alternative = _new_alternative(
-        node_rel_path=normalized_node,
-        file_name=file_name,
-        slug=safe_slug,
-        mime_type=mime_type,
-        notes=notes,
-    )
+    with _locked_path(meta_path_for_node(normalized_node)):
+        meta = load_node_meta(normalized_node, create_if_missing=True)
+        anchor = _find_anchor(meta, anchor_id)
+        if not anchor:
+            raise StoryStoreError(f"No existe anchor_id {anchor_id} en {normalized_node or 'library'}.")
+
+        safe_slug = _normalize_slug(slug, _normalize_slug(anchor_id, "anchor"))
+        file_name = _build_anchor_image_name(slug=safe_slug, mime_type=mime_type)
+        _assert_available_image_name(node_rel_path=normalized_node, file_name=file_name)
+        alternative = _new_alternative(
+            node_rel_path=normalized_node,
+            file_name=file_name,
+            slug=safe_slug,
+            mime_type=mime_type,
+            notes=notes,
+        )
 
-    _write_node_image(node_rel_path=normalized_node, file_name=alternative["id"], image_bytes=image_bytes)
-    _upsert_image_index(
-        node_rel_path=normalized_node,
-        file_name=alternative["id"],
-        description=f"anchor {anchor_id}",
-    )
+        _write_node_image(node_rel_path=normalized_node, file_name=alternative["id"], image_bytes=image_bytes)
+        _upsert_image_index(
+            node_rel_path=normalized_node,
+            file_name=alternative["id"],
+            description=f"anchor {anchor_id}",
+        )
+
+        alternatives = anchor.setdefault("alternatives", [])
+        alternatives.append(alternative)
 
-    alternatives = anchor.setdefault("alternatives", [])
-    alternatives.append(alternative)
+        image_filenames = anchor.setdefault("image_filenames", [])
+        if alternative["id"] not in image_filenames:
+            image_filenames.append(alternative["id"])
 
-    image_filenames = anchor.setdefault("image_filenames", [])
-    if alternative["id"] not in image_filenames:
-        image_filenames.append(alternative["id"])
+        # activate=True deja la nueva alternativa activa en la misma escritura de meta.json.
+        if activate or not str(anchor.get("active_id", "")).strip():
+            anchor["active_id"] = alternative["id"]
 
-    if not str(anchor.get("active_id", "")).strip():
-        anchor["active_id"] = alternative["id"]
+        save_node_meta(normalized_node, meta, touch_updated_at=True)
 
-    save_node_meta(normalized_node, meta, touch_updated_at=True)
     return alternative
 
 
 def set_anchor_active(*, node_rel_path: str, anchor_id: str, alternative_id: str) -> dict[str, Any]:
     normalized_node = _normalize_rel_path(node_rel_path)
-    meta = load_node_meta(normalized_node, create_if_missing=False)
-    anchor = _find_anchor(meta, anchor_id)
-    if not anchor:
-        raise StoryStoreError(f"No existe anchor_id {anchor_id} en {normalized_node or 'library'}.")
+    with _locked_path(meta_path_for_node(normalized_node)):
+        meta = load_node_meta(normalized_node, create_if_missing=False)
+        anchor = _find_anchor(meta, anchor_id)
+        if not anchor:
+            raise StoryStoreError(f"No existe anchor_id {anchor_id} en {normalized_node or 'library'}.")
 
-    alternatives = anchor.get("alternatives", [])
-    target = next((item for item in alternatives if str(item.get("id", "")) == alternative_id), None)
-    if not target:
-        raise StoryStoreError("La alternativa indicada no existe para esta ancla.")
+        alternatives = anchor.get("alternatives", [])
+        target = next((item for item in alternatives if str(item.get("id", "")) == alternative_id), None)
+        if not target:
+            raise StoryStoreError("La alternativa indicada no existe para esta ancla.")
+
+        anchor["active_id"] = alternative_id
+        image_filenames = anchor.setdefault("image_filenames", [])
+        if alternative_id not in image_filenames:
+            image_filenames.append(alternative_id)
 
-    anchor["active_id"] = alternative_id
-    image_filenames = anchor.setdefault("image_filenames", [])
-    if alternative_id not in image_filenames:
-        image_filenames.append(alternative_id)
+        save_node_meta(normalized_node, meta, touch_updated_at=True)
 
-    save_node_meta(normalized_node, meta, touch_updated_at=True)
     return target
 
 
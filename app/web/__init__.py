@@ -17,6 +17,7 @@ def inject_image_flow_nav() -> dict[str, object]:
 # Route modules register endpoints via decorators on `web_bp`.
 from . import routes_image_flow  # noqa: E402,F401
 from . import routes_browse  # noqa: E402,F401
+from . import routes_export  # noqa: E402,F401
 from . import routes_fragments  # noqa: E402,F401
 from . import routes_story_editor  # noqa: E402,F401
 from . import routes_story_read  # noqa: E402,F401
@@ -1,11 +1,33 @@
 from __future__ import annotations
 
+import hashlib
+from pathlib import Path
 from typing import Any
 
-from flask import url_for
+from flask import g, has_request_context, request, url_for
 
 from ..catalog_provider import get_story_summary
-from ..story_store import StoryStoreError, list_story_pages
+from ..config import MEDIA_THUMB_WIDTH
+from ..story_store import (
+    ReferenceResolver,
+    StoryHandle,
+    StoryStoreError,
+    get_reference_resolver,
+    open_story,
+)
+
+TEMPLATES_DIR = Path(__file__).resolve().parents[1] / "templates"
+
+
+def _templates_stamp() -> str:
+    # Cambia al desplegar plantillas nuevas; es estable entre procesos con el mismo arbol.
+    latest = 0
+    for template_file in TEMPLATES_DIR.rglob("*.html"):
+        latest = max(latest, template_file.stat().st_mtime_ns)
+    return str(latest)
+
+
+_TEMPLATES_STAMP = _templates_stamp()
 
 
 def normalize_rel_path(path_rel: str) -> str:
@@ -56,14 +78,84 @@ def build_story_url(story_rel_path: str, *, page_number: int | None = None, edit
     return url_for("web.node_or_story", **args)
 
 
+def build_media_thumb_url(rel_path: str, *, width: int = MEDIA_THUMB_WIDTH) -> str:
+    return url_for("web.media_file", rel_path=rel_path, w=width, fmt="webp")
+
+
+def get_request_story(story_rel_path: str) -> StoryHandle:
+    normalized = normalize_rel_path(story_rel_path)
+    if not has_request_context():
+        return open_story(normalized)
+
+    cache = getattr(g, "_story_handles", None)
+    if not isinstance(cache, dict):
+        cache = {}
+        g._story_handles = cache
+
+    handle = cache.get(normalized)
+    if isinstance(handle, StoryHandle) and handle.is_current():
+        return handle
+
+    handle = open_story(normalized)
+    cache[normalized] = handle
+    return handle
+
+
+def get_request_reference_resolver(node_rel_path: str) -> ReferenceResolver:
+    # Se valida contra disco una vez por peticion; una escritura del proceso lo invalida y se vuelve a pedir.
+    normalized = normalize_rel_path(node_rel_path)
+    if not has_request_context():
+        return get_reference_resolver(normalized)
+
+    cache = getattr(g, "_reference_resolvers", None)
+    if not isinstance(cache, dict):
+        cache = {}
+        g._reference_resolvers = cache
+
+    resolver = cache.get(normalized)
+    if isinstance(resolver, ReferenceResolver) and not resolver.invalidated:
+        return resolver
+
+    resolver = get_reference_resolver(normalized)
+    cache[normalized] = resolver
+    return resolver
+
+
+def build_story_fragment_etag(story_rel_path: str, *parts: Any) -> str | None:
+    normalized = normalize_rel_path(story_rel_path)
+    try:
+        story = get_request_story(normalized)
+    except (FileNotFoundError, StoryStoreError):
+        return None
+
+    # Referencias y existencia de imagenes dependen de los meta.json y de images/ de la jerarquia del libro:
+    # el mismo resolutor (validado una vez) sirve para la version y para renderizar el fragmento.
+    book_rel_path = normalized.rpartition("/")[0]
+    reference_stamps = get_request_reference_resolver(book_rel_path).version_stamps()
+
+    raw = "|".join(
+        [
+            _TEMPLATES_STAMP,
+            normalized,
+            str(story.payload.get("updated_at", "")),
+            ":".join(str(value) for value in story.fingerprint or ()),
+            "|".join(reference_stamps),
+            *[str(part) for part in parts],
+        ]
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def is_fragment_not_modified(etag: str | None) -> bool:
+    return bool(etag) and etag in request.if_none_match
+
+
 def first_story_page_number(story_rel_path: str) -> int:
     try:
-        pages = list_story_pages(story_rel_path)
+        story = get_request_story(story_rel_path)
     except (FileNotFoundError, StoryStoreError):
         return 1
-    if not pages:
-        return 1
-    return int(pages[0]["page_number"])
+    return story.first_page_number()
 
 
 def decorate_children_for_cards(children: list[dict[str, Any]]) -> list[dict[str, Any]]:
@@ -85,7 +177,7 @@ def decorate_children_for_cards(children: list[dict[str, Any]]) -> list[dict[str
 
             thumb_rel_path = str(summary.get("thumb_rel_path", "")).strip().replace("\\", "/")
             item["thumb_url"] = (
-                url_for("web.media_file", rel_path=thumb_rel_path)
+                build_media_thumb_url(thumb_rel_path)
                 if thumb_rel_path and bool(summary.get("thumb_exists"))
                 else ""
             )
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from ..config import PDF_EXPORT_JOBS_DIR, PDF_EXPORT_JOBS_KEPT, PDF_EXPORT_WORKERS
+from ..pdf_export import PdfExportError, export_story_pdf
+from ..story_store import StoryStoreError
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_DONE = "done"
+JOB_STATUS_ERROR = "error"
+JOB_ACTIVE_STATUSES = {JOB_STATUS_QUEUED, JOB_STATUS_RUNNING}
+
+
+def _normalize_rel_path(path_rel: str) -> str:
+    return path_rel.strip().replace("\\", "/").strip("/")
+
+
+# Cola en proceso: la peticion solo encola y devuelve el id; la exportacion corre en el pool.
+# El estado se replica en disco para que el sondeo funcione aunque lo atienda otro worker de `serve`.
+class ExportJobQueue:
+    def __init__(
+        self,
+        *,
+        max_workers: int = PDF_EXPORT_WORKERS,
+        jobs_kept: int = PDF_EXPORT_JOBS_KEPT,
+        jobs_dir: Path | None = PDF_EXPORT_JOBS_DIR,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._jobs: dict[str, dict[str, Any]] = {}
+        self._jobs_kept = max(1, int(jobs_kept))
+        self._max_workers = max(1, int(max_workers))
+        self._jobs_dir = jobs_dir
+        self._executor: ThreadPoolExecutor | None = None
+
+    def _ensure_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="pdf-export")
+        return self._executor
+
+    def _job_file(self, job_id: str) -> Path | None:
+        if self._jobs_dir is None or not job_id.isalnum():
+            return None
+        return self._jobs_dir / f"{job_id}.json"
+
+    def _persist(self, job: dict[str, Any]) -> None:
+        job_file = self._job_file(str(job["id"]))
+        if job_file is None:
+            return
+        temp_file = job_file.with_name(f"{job_file.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            job_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file.write_text(json.dumps(job, ensure_ascii=False), encoding="utf-8")
+            temp_file.replace(job_file)
+        except OSError:
+            # El estado en memoria sigue siendo valido para el worker que lanzo el trabajo.
+            if temp_file.exists():
+                temp_file.unlink()
+
+    def _load_persisted(self, job_id: str) -> dict[str, Any] | None:
+        job_file = self._job_file(job_id)
+        if job_file is None:
+            return None
+        try:
+            job = json.loads(job_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return job if isinstance(job, dict) else None
+
+    def _update(self, job_id: str, **changes: Any) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(changes)
+                self._persist(job)
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job["status"] not in JOB_ACTIVE_STATUSES]
+        overflow = len(self._jobs) - self._jobs_kept
+        if overflow > 0:
+            finished.sort(key=lambda job: job["created_at"])
+            for job in finished[:overflow]:
+                self._jobs.pop(job["id"], None)
+
+        if self._jobs_dir is None or not self._jobs_dir.is_dir():
+            return
+        # Archivos de todos los workers: se conservan los mas recientes.
+        job_files: list[tuple[float, Path]] = []
+        for job_file in self._jobs_dir.glob("*.json"):
+            try:
+                job_files.append((job_file.stat().st_mtime, job_file))
+            except OSError:
+                continue
+        job_files.sort(reverse=True)
+        for _mtime, job_file in job_files[self._jobs_kept :]:
+            if job_file.stem in self._jobs:
+                continue
+            try:
+                job_file.unlink()
+            except OSError:
+                continue
+
+    def _run(self, job_id: str, story_rel_path: str, size_cm: float) -> None:
+        started = time.perf_counter()
+        self._update(job_id, status=JOB_STATUS_RUNNING)
+
+        def on_progress(event: dict[str, Any]) -> None:
+            # El trabajo solo publica el avance por paginas; "bytes" (escritos en disco, en chunk/skipped/saved)
+            # y "embedded_image_bytes" (JPEG incrustados durante las paginas) no se guardan.
+            self._update(
+                job_id,
+                page=int(event.get("page", 0) or 0),
+                page_count=int(event.get("page_count", 0) or 0),
+                elapsed=float(event.get("elapsed", 0.0) or 0.0),
+            )
+
+        try:
+            result = export_story_pdf(
+                story_rel_path=story_rel_path,
+                size_cm=size_cm,
+                overwrite=True,
+                on_progress=on_progress,
+            )
+        except (FileNotFoundError, StoryStoreError, PdfExportError) as exc:
+            self._update(job_id, status=JOB_STATUS_ERROR, message=str(exc), elapsed=time.perf_counter() - started)
+            return
+        except Exception as exc:
+            self._update(
+                job_id,
+                status=JOB_STATUS_ERROR,
+                message=f"Error inesperado exportando PDF: {exc}",
+                elapsed=time.perf_counter() - started,
+            )
+            return
+
+        self._update(
+            job_id,
+            status=JOB_STATUS_DONE,
+            output_path=str(result["output_path"]),
+            page=int(result.get("page_count", 0) or 0),
+            page_count=int(result.get("page_count", 0) or 0),
+            elapsed=time.perf_counter() - started,
+        )
+
+    def submit(self, story_rel_path: str, *, size_cm: float = 20.0) -> str:
+        normalized = _normalize_rel_path(story_rel_path)
+        with self._lock:
+            # Un segundo clic sobre el mismo cuento reutiliza el trabajo pendiente.
+            for job in self._jobs.values():
+                if job["story_rel_path"] == normalized and job["status"] in JOB_ACTIVE_STATUSES:
+                    return str(job["id"])
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "id": job_id,
+                "story_rel_path": normalized,
+                "size_cm": float(size_cm),
+                "status": JOB_STATUS_QUEUED,
+                "page": 0,
+                "page_count": 0,
+                "elapsed": 0.0,
+                "message": "",
+                "output_path": "",
+                "created_at": time.time(),
+            }
+            self._persist(self._jobs[job_id])
+            self._prune()
+            executor = self._ensure_executor()
+
+        executor.submit(self._run, job_id, normalized, float(size_cm))
+        return job_id
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        return self._load_persisted(job_id)
+
+
+_EXPORT_JOBS = ExportJobQueue()
+
+
+def submit_export_job(story_rel_path: str, *, size_cm: float = 20.0) -> str:
+    return _EXPORT_JOBS.submit(story_rel_path, size_cm=size_cm)
+
+
+def get_export_job(job_id: str) -> dict[str, Any] | None:
+    return _EXPORT_JOBS.get(job_id)
+
+
+def export_job_output(job: dict[str, Any]) -> Path | None:
+    if job.get("status") != JOB_STATUS_DONE:
+        return None
+    output = Path(str(job.get("output_path", "")))
+    if not output.is_file():
+        return None
+    return output
@@ -1,18 +1,28 @@
 from __future__ import annotations
 
 import json
+import threading
+import time
 from pathlib import Path
 from typing import Any
 
-from flask import g, has_request_context
-
-from ..config import LIBRARY_ROOT
+from .. import json_codec
+from ..config import IMAGE_FLOW_RESCAN_SECONDS, LIBRARY_ROOT
 from ..story_store import (
+    STORE_CHANGE_META,
+    STORE_CHANGE_STORY,
+    ReferenceResolver,
     StoryStoreError,
+    add_store_listener,
+    get_reference_resolver,
+    is_own_store_change,
+    iter_node_meta_files,
     json_path_to_story_rel,
     list_story_json_files,
     load_story,
-    resolve_reference_assets,
+    meta_path_for_node,
+    store_change_stamp,
+    story_rel_to_json_path,
 )
 from ..story_progress import coerce_string_list, slot_state
 
@@ -27,8 +37,8 @@ def _read_json_file(path: Path) -> dict[str, Any] | None:
     if not path.exists() or not path.is_file():
         return None
     try:
-        raw = path.read_text(encoding="utf-8-sig")
-        payload = json.loads(raw)
+        # json_codec descarta el BOM igual que utf-8-sig.
+        payload = json_codec.loads(path.read_bytes())
     except (OSError, json.JSONDecodeError):
         return None
     if not isinstance(payload, dict):
@@ -51,9 +61,9 @@ def _is_in_excluded_area(rel_path: str) -> bool:
     return any(part.startswith("_") for part in parts)
 
 
-def _build_reference_assets(node_rel_path: str, reference_ids: list[str]) -> list[dict[str, Any]]:
+def _build_reference_assets(resolver: ReferenceResolver, reference_ids: list[str]) -> list[dict[str, Any]]:
     rows: list[dict[str, Any]] = []
-    for ref in resolve_reference_assets(node_rel_path, reference_ids):
+    for ref in resolver.resolve(reference_ids):
         row = dict(ref)
         row["filename"] = str(row.get("filename", ""))
         row["asset_rel_path"] = str(row.get("asset_rel_path", ""))
@@ -63,47 +73,40 @@ def _build_reference_assets(node_rel_path: str, reference_ids: list[str]) -> lis
     return rows
 
 
-def _iter_story_records() -> list[dict[str, Any]]:
-    records: list[dict[str, Any]] = []
-    for story_file in list_story_json_files():
-        try:
-            story_rel_path = json_path_to_story_rel(story_file)
-        except StoryStoreError:
-            continue
-
-        if _is_in_excluded_area(story_rel_path):
-            continue
+def _build_story_record(story_file: Path) -> tuple[dict[str, Any], dict[str, Any]] | None:
+    try:
+        story_rel_path = json_path_to_story_rel(story_file)
+    except (StoryStoreError, ValueError):
+        return None
 
-        try:
-            payload = load_story(story_rel_path)
-        except (FileNotFoundError, StoryStoreError):
-            continue
+    if _is_in_excluded_area(story_rel_path):
+        return None
 
-        story_rel_path = _normalize_rel_path(story_rel_path)
-        book_rel_path = _normalize_rel_path(str(payload.get("book_rel_path", "")))
-        first_page = 1
-        pages = payload.get("pages", [])
-        if isinstance(pages, list) and pages:
-            first = pages[0]
-            if isinstance(first, dict):
-                try:
-                    first_page = max(1, int(first.get("page_number", 1)))
-                except (TypeError, ValueError):
-                    first_page = 1
-
-        records.append(
-            {
-                "story_rel_path": story_rel_path,
-                "story_id": str(payload.get("story_id", "")).strip(),
-                "title": str(payload.get("title", "")).strip() or story_rel_path.split("/")[-1],
-                "book_rel_path": book_rel_path,
-                "first_page": first_page,
-                "payload": payload,
-            }
-        )
+    try:
+        payload = load_story(story_rel_path)
+    except (FileNotFoundError, StoryStoreError):
+        return None
 
-    records.sort(key=lambda item: item["story_rel_path"])
-    return records
+    story_rel_path = _normalize_rel_path(story_rel_path)
+    book_rel_path = _normalize_rel_path(str(payload.get("book_rel_path", "")))
+    first_page = 1
+    pages = payload.get("pages", [])
+    if isinstance(pages, list) and pages:
+        first = pages[0]
+        if isinstance(first, dict):
+            try:
+                first_page = max(1, int(first.get("page_number", 1)))
+            except (TypeError, ValueError):
+                first_page = 1
+
+    record = {
+        "story_rel_path": story_rel_path,
+        "story_id": str(payload.get("story_id", "")).strip(),
+        "title": str(payload.get("title", "")).strip() or story_rel_path.split("/")[-1],
+        "book_rel_path": book_rel_path,
+        "first_page": first_page,
+    }
+    return record, payload
 
 
 def _pick_editor_story_for_anchor(node_rel_path: str, story_records: list[dict[str, Any]]) -> tuple[str, int] | None:
@@ -130,262 +133,468 @@ def _pick_editor_story_for_anchor(node_rel_path: str, story_records: list[dict[s
     return target["story_rel_path"], int(target["first_page"])
 
 
-def _iter_anchor_records(story_records: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    rows: list[dict[str, Any]] = []
-
-    for meta_file in LIBRARY_ROOT.rglob("meta.json"):
+def _meta_file_node_rel_path(meta_file: Path) -> str | None:
+    try:
         rel_meta = _normalize_rel_path(meta_file.resolve().relative_to(LIBRARY_ROOT.resolve()).as_posix())
-        if _is_in_excluded_area(rel_meta):
-            continue
+    except ValueError:
+        return None
+    if _is_in_excluded_area(rel_meta):
+        return None
 
-        meta_payload = _read_json_file(meta_file)
-        if not meta_payload:
-            continue
+    node_rel_path = _normalize_rel_path(meta_file.parent.resolve().relative_to(LIBRARY_ROOT.resolve()).as_posix())
+    if node_rel_path == ".":
+        node_rel_path = ""
+    return node_rel_path
 
-        node_rel_path = _normalize_rel_path(meta_file.parent.resolve().relative_to(LIBRARY_ROOT.resolve()).as_posix())
-        if node_rel_path == ".":
-            node_rel_path = ""
 
-        collection = meta_payload.get("collection", {})
-        collection_title = ""
-        if isinstance(collection, dict):
-            collection_title = str(collection.get("title", "")).strip()
-        if not collection_title:
-            collection_title = node_rel_path or "library"
+def _build_anchor_items(node_rel_path: str, resolver: ReferenceResolver) -> list[dict[str, Any]]:
+    meta_payload = _read_json_file(meta_path_for_node(node_rel_path))
+    if not meta_payload:
+        return []
 
-        anchors = meta_payload.get("anchors", [])
-        if not isinstance(anchors, list):
-            continue
+    collection = meta_payload.get("collection", {})
+    collection_title = ""
+    if isinstance(collection, dict):
+        collection_title = str(collection.get("title", "")).strip()
+    if not collection_title:
+        collection_title = node_rel_path or "library"
 
-        anchors_sorted = sorted(
-            [item for item in anchors if isinstance(item, dict)],
-            key=lambda item: str(item.get("id", "")).strip().lower(),
-        )
+    anchors = meta_payload.get("anchors", [])
+    if not isinstance(anchors, list):
+        return []
 
-        for anchor in anchors_sorted:
-            anchor_id = str(anchor.get("id", "")).strip()
-            if not anchor_id:
-                continue
-
-            prompt = str(anchor.get("prompt", "")).strip()
-            reference_ids = coerce_string_list(anchor.get("image_filenames", []))
-            state = slot_state(anchor)
+    rows: list[dict[str, Any]] = []
+    anchors_sorted = sorted(
+        [item for item in anchors if isinstance(item, dict)],
+        key=lambda item: str(item.get("id", "")).strip().lower(),
+    )
+
+    for anchor in anchors_sorted:
+        anchor_id = str(anchor.get("id", "")).strip()
+        if not anchor_id:
+            continue
 
-            editor_target = _pick_editor_story_for_anchor(node_rel_path, story_records)
-            editor_story_rel_path = editor_target[0] if editor_target else ""
-            editor_page = editor_target[1] if editor_target else 1
+        prompt = str(anchor.get("prompt", "")).strip()
+        reference_ids = coerce_string_list(anchor.get("image_filenames", []))
+        state = slot_state(anchor)
 
-            rows.append(
-                {
-                    "item_type": "anchor",
-                    "queue_key": f"anchor::{node_rel_path}::{anchor_id}",
-                    "book_rel_path": node_rel_path,
-                    "story_rel_path": "",
-                    "story_id": "",
-                    "story_title": "",
-                    "page_number": 0,
-                    "slot_name": "",
-                    "anchor_id": anchor_id,
-                    "anchor_node_rel_path": node_rel_path,
-                    "prompt": prompt,
-                    "status": str(anchor.get("status", "draft")).strip() or "draft",
-                    "reference_ids": reference_ids,
-                    "reference_assets": _build_reference_assets(node_rel_path, reference_ids),
-                    "state": state,
-                    "display_title": str(anchor.get("name", "")).strip() or anchor_id,
-                    "display_subtitle": f"Ancla · {collection_title}",
-                    "editor_story_rel_path": editor_story_rel_path,
-                    "editor_page": editor_page,
-                }
-            )
+        rows.append(
+            {
+                "item_type": "anchor",
+                "queue_key": f"anchor::{node_rel_path}::{anchor_id}",
+                "book_rel_path": node_rel_path,
+                "story_rel_path": "",
+                "story_id": "",
+                "story_title": "",
+                "page_number": 0,
+                "slot_name": "",
+                "anchor_id": anchor_id,
+                "anchor_node_rel_path": node_rel_path,
+                "prompt": prompt,
+                "status": str(anchor.get("status", "draft")).strip() or "draft",
+                "reference_ids": reference_ids,
+                "reference_assets": _build_reference_assets(resolver, reference_ids),
+                "state": state,
+                "display_title": str(anchor.get("name", "")).strip() or anchor_id,
+                "display_subtitle": f"Ancla · {collection_title}",
+                "editor_story_rel_path": "",
+                "editor_page": 1,
+            }
+        )
 
-    rows.sort(key=lambda item: (item["anchor_node_rel_path"], item["anchor_id"]))
+    rows.sort(key=lambda item: item["anchor_id"])
     return rows
 
 
-def _iter_story_slot_records(story_records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+def _build_story_slot_items(
+    story: dict[str, Any], payload: dict[str, Any], resolver: ReferenceResolver
+) -> list[dict[str, Any]]:
     rows: list[dict[str, Any]] = []
 
-    for story in story_records:
-        payload = story["payload"]
-        story_rel_path = story["story_rel_path"]
-        story_id = story["story_id"]
-        story_title = story["title"]
-        book_rel_path = story["book_rel_path"]
-
-        cover = payload.get("cover", {})
-        if isinstance(cover, dict):
-            cover_prompt = str(cover.get("prompt", "")).strip()
-            cover_refs = coerce_string_list(cover.get("reference_ids", []))
-            rows.append(
-                {
-                    "item_type": "cover",
-                    "queue_key": f"cover::{story_rel_path}",
-                    "book_rel_path": book_rel_path,
-                    "story_rel_path": story_rel_path,
-                    "story_id": story_id,
-                    "story_title": story_title,
-                    "page_number": 0,
-                    "slot_name": "cover",
-                    "anchor_id": "",
-                    "anchor_node_rel_path": "",
-                    "prompt": cover_prompt,
-                    "status": str(cover.get("status", "draft")).strip() or "draft",
-                    "reference_ids": cover_refs,
-                    "reference_assets": _build_reference_assets(book_rel_path, cover_refs),
-                    "state": slot_state(cover),
-                    "display_title": story_title,
-                    "display_subtitle": f"Cuento {story_id} · Portada",
-                    "editor_story_rel_path": story_rel_path,
-                    "editor_page": int(story["first_page"]),
-                }
-            )
+    story_rel_path = story["story_rel_path"]
+    story_id = story["story_id"]
+    story_title = story["title"]
+    book_rel_path = story["book_rel_path"]
 
-        pages = payload.get("pages", [])
-        pages_sorted = sorted(
-            [item for item in pages if isinstance(item, dict)],
-            key=lambda item: int(item.get("page_number", 0)),
+    cover = payload.get("cover", {})
+    if isinstance(cover, dict):
+        cover_prompt = str(cover.get("prompt", "")).strip()
+        cover_refs = coerce_string_list(cover.get("reference_ids", []))
+        rows.append(
+            {
+                "item_type": "cover",
+                "queue_key": f"cover::{story_rel_path}",
+                "book_rel_path": book_rel_path,
+                "story_rel_path": story_rel_path,
+                "story_id": story_id,
+                "story_title": story_title,
+                "page_number": 0,
+                "slot_name": "cover",
+                "anchor_id": "",
+                "anchor_node_rel_path": "",
+                "prompt": cover_prompt,
+                "status": str(cover.get("status", "draft")).strip() or "draft",
+                "reference_ids": cover_refs,
+                "reference_assets": _build_reference_assets(resolver, cover_refs),
+                "state": slot_state(cover),
+                "display_title": story_title,
+                "display_subtitle": f"Cuento {story_id} · Portada",
+                "editor_story_rel_path": story_rel_path,
+                "editor_page": int(story["first_page"]),
+            }
         )
 
-        # main first
-        for page in pages_sorted:
-            try:
-                page_number = int(page.get("page_number", 0))
-            except (TypeError, ValueError):
-                continue
-            if page_number <= 0:
-                continue
-
-            images = page.get("images", {})
-            if not isinstance(images, dict):
-                continue
-
-            main_slot = images.get("main", {})
-            if isinstance(main_slot, dict):
-                main_prompt = str(main_slot.get("prompt", "")).strip()
-                main_refs = coerce_string_list(main_slot.get("reference_ids", []))
-                rows.append(
-                    {
-                        "item_type": "slot",
-                        "queue_key": f"slot::{story_rel_path}::{page_number}::main",
-                        "book_rel_path": book_rel_path,
-                        "story_rel_path": story_rel_path,
-                        "story_id": story_id,
-                        "story_title": story_title,
-                        "page_number": page_number,
-                        "slot_name": "main",
-                        "anchor_id": "",
-                        "anchor_node_rel_path": "",
-                        "prompt": main_prompt,
-                        "status": str(main_slot.get("status", "draft")).strip() or "draft",
-                        "reference_ids": main_refs,
-                        "reference_assets": _build_reference_assets(book_rel_path, main_refs),
-                        "state": slot_state(main_slot),
-                        "display_title": story_title,
-                        "display_subtitle": f"Cuento {story_id} · Pagina {page_number} · Slot main",
-                        "editor_story_rel_path": story_rel_path,
-                        "editor_page": page_number,
-                    }
-                )
-
-        # secondary after all main
-        for page in pages_sorted:
-            try:
-                page_number = int(page.get("page_number", 0))
-            except (TypeError, ValueError):
-                continue
-            if page_number <= 0:
-                continue
+    pages = payload.get("pages", [])
+    pages_sorted = sorted(
+        [item for item in pages if isinstance(item, dict)],
+        key=lambda item: int(item.get("page_number", 0)),
+    )
 
-            images = page.get("images", {})
-            if not isinstance(images, dict) or "secondary" not in images:
-                continue
+    # main first
+    for page in pages_sorted:
+        try:
+            page_number = int(page.get("page_number", 0))
+        except (TypeError, ValueError):
+            continue
+        if page_number <= 0:
+            continue
 
-            secondary_slot = images.get("secondary", {})
-            if not isinstance(secondary_slot, dict):
-                continue
+        images = page.get("images", {})
+        if not isinstance(images, dict):
+            continue
 
-            secondary_prompt = str(secondary_slot.get("prompt", "")).strip()
-            secondary_refs = coerce_string_list(secondary_slot.get("reference_ids", []))
+        main_slot = images.get("main", {})
+        if isinstance(main_slot, dict):
+            main_prompt = str(main_slot.get("prompt", "")).strip()
+            main_refs = coerce_string_list(main_slot.get("reference_ids", []))
             rows.append(
                 {
                     "item_type": "slot",
-                    "queue_key": f"slot::{story_rel_path}::{page_number}::secondary",
+                    "queue_key": f"slot::{story_rel_path}::{page_number}::main",
                     "book_rel_path": book_rel_path,
                     "story_rel_path": story_rel_path,
                     "story_id": story_id,
                     "story_title": story_title,
                     "page_number": page_number,
-                    "slot_name": "secondary",
+                    "slot_name": "main",
                     "anchor_id": "",
                     "anchor_node_rel_path": "",
-                    "prompt": secondary_prompt,
-                    "status": str(secondary_slot.get("status", "draft")).strip() or "draft",
-                    "reference_ids": secondary_refs,
-                    "reference_assets": _build_reference_assets(book_rel_path, secondary_refs),
-                    "state": slot_state(secondary_slot),
+                    "prompt": main_prompt,
+                    "status": str(main_slot.get("status", "draft")).strip() or "draft",
+                    "reference_ids": main_refs,
+                    "reference_assets": _build_reference_assets(resolver, main_refs),
+                    "state": slot_state(main_slot),
                     "display_title": story_title,
-                    "display_subtitle": f"Cuento {story_id} · Pagina {page_number} · Slot secondary",
+                    "display_subtitle": f"Cuento {story_id} · Pagina {page_number} · Slot main",
                     "editor_story_rel_path": story_rel_path,
                     "editor_page": page_number,
                 }
             )
 
-    return rows
+    # secondary after all main
+    for page in pages_sorted:
+        try:
+            page_number = int(page.get("page_number", 0))
+        except (TypeError, ValueError):
+            continue
+        if page_number <= 0:
+            continue
+
+        images = page.get("images", {})
+        if not isinstance(images, dict) or "secondary" not in images:
+            continue
 
+        secondary_slot = images.get("secondary", {})
+        if not isinstance(secondary_slot, dict):
+            continue
 
-def _build_snapshot_uncached() -> dict[str, Any]:
-    story_records = _iter_story_records()
-    anchor_items = _iter_anchor_records(story_records)
-    story_items = _iter_story_slot_records(story_records)
-    all_items = anchor_items + story_items
+        secondary_prompt = str(secondary_slot.get("prompt", "")).strip()
+        secondary_refs = coerce_string_list(secondary_slot.get("reference_ids", []))
+        rows.append(
+            {
+                "item_type": "slot",
+                "queue_key": f"slot::{story_rel_path}::{page_number}::secondary",
+                "book_rel_path": book_rel_path,
+                "story_rel_path": story_rel_path,
+                "story_id": story_id,
+                "story_title": story_title,
+                "page_number": page_number,
+                "slot_name": "secondary",
+                "anchor_id": "",
+                "anchor_node_rel_path": "",
+                "prompt": secondary_prompt,
+                "status": str(secondary_slot.get("status", "draft")).strip() or "draft",
+                "reference_ids": secondary_refs,
+                "reference_assets": _build_reference_assets(resolver, secondary_refs),
+                "state": slot_state(secondary_slot),
+                "display_title": story_title,
+                "display_subtitle": f"Cuento {story_id} · Pagina {page_number} · Slot secondary",
+                "editor_story_rel_path": story_rel_path,
+                "editor_page": page_number,
+            }
+        )
+
+    return rows
 
-    pending_items: list[dict[str, Any]] = []
-    excluded_no_prompt: list[dict[str, Any]] = []
-    completed_count = 0
 
-    for item in all_items:
+def _count_states(items: list[dict[str, Any]]) -> dict[str, int]:
+    counts = {"pending": 0, "completed": 0, "no_prompt": 0}
+    for item in items:
         state = item.get("state", "")
         if state == "completed":
-            completed_count += 1
-            continue
-        if state == "no_prompt":
-            excluded_no_prompt.append(
-                {
-                    "queue_key": item.get("queue_key", ""),
-                    "display_title": item.get("display_title", ""),
-                    "display_subtitle": item.get("display_subtitle", ""),
-                    "item_type": item.get("item_type", ""),
-                }
-            )
-            continue
-        if state == "pending":
-            pending_items.append(item)
-
-    return {
-        "pending_items": pending_items,
-        "excluded_no_prompt": excluded_no_prompt,
-        "pending_count": len(pending_items),
-        "completed_count": completed_count,
-        "excluded_no_prompt_count": len(excluded_no_prompt),
-        "has_pending": bool(pending_items),
-    }
+            counts["completed"] += 1
+        elif state == "no_prompt":
+            counts["no_prompt"] += 1
+        elif state == "pending":
+            counts["pending"] += 1
+    return counts
+
+
+def _with_anchor_editor_target(item: dict[str, Any], story_records: list[dict[str, Any]]) -> dict[str, Any]:
+    editor_target = _pick_editor_story_for_anchor(str(item.get("anchor_node_rel_path", "")), story_records)
+    row = dict(item)
+    row["editor_story_rel_path"] = editor_target[0] if editor_target else ""
+    row["editor_page"] = editor_target[1] if editor_target else 1
+    return row
+
+
+def _is_node_within(node_rel_path: str, ancestor_rel_path: str) -> bool:
+    if not ancestor_rel_path:
+        return True
+    return node_rel_path == ancestor_rel_path or node_rel_path.startswith(ancestor_rel_path + "/")
+
+
+def _file_fingerprint(path: Path) -> tuple[int, int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+# Cola persistente del flujo guiado. Los cambios hechos por `story_store` llegan como
+# eventos y solo recalculan el cuento o nodo afectado; un re-escaneo por huellas recoge
+# escrituras de otros workers (marcador del store) y, cada IMAGE_FLOW_RESCAN_SECONDS,
+# cambios hechos fuera de la app.
+class ImageFlowIndex:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_scan = 0.0
+        self._change_stamp: int | None = None
+        self._story_records: dict[str, dict[str, Any]] = {}
+        self._story_items: dict[str, list[dict[str, Any]]] = {}
+        self._anchor_items: dict[str, list[dict[str, Any]]] = {}
+        self._fingerprints: dict[tuple[str, str], tuple[int, int, int] | None] = {}
+        self._source_counts: dict[tuple[str, str], dict[str, int]] = {}
+        self._totals = {"pending": 0, "completed": 0, "no_prompt": 0}
+        self._dirty_stories: set[str] = set()
+        self._dirty_nodes: set[str] = set()
+        self._batch_resolvers: dict[str, ReferenceResolver] = {}
+        self._snapshot: dict[str, Any] | None = None
+
+    def on_store_change(self, kind: str, rel_path: str) -> None:
+        normalized = _normalize_rel_path(rel_path)
+        with self._lock:
+            if kind == STORE_CHANGE_STORY:
+                self._dirty_stories.add(normalized)
+            elif kind == STORE_CHANGE_META:
+                self._mark_meta_dirty(normalized)
+
+    def _mark_meta_dirty(self, node_rel_path: str) -> None:
+        # Las referencias se resuelven contra los meta.json ancestros: un cambio en un
+        # nodo afecta a los cuentos y anclas de todo su subarbol.
+        self._dirty_nodes.add(node_rel_path)
+        for story_rel_path, record in self._story_records.items():
+            if _is_node_within(record["book_rel_path"], node_rel_path):
+                self._dirty_stories.add(story_rel_path)
+        for anchor_node in self._anchor_items:
+            if _is_node_within(anchor_node, node_rel_path):
+                self._dirty_nodes.add(anchor_node)
+
+    def _reference_resolver(self, node_rel_path: str) -> ReferenceResolver:
+        # Un resolutor por nodo y lote de reconstruccion: se valida contra disco una sola vez.
+        resolver = self._batch_resolvers.get(node_rel_path)
+        if resolver is None or resolver.invalidated:
+            resolver = get_reference_resolver(node_rel_path)
+            self._batch_resolvers[node_rel_path] = resolver
+        return resolver
+
+    def _set_source(self, key: tuple[str, str], items: list[dict[str, Any]] | None) -> None:
+        previous = self._source_counts.pop(key, None)
+        if previous:
+            for state, value in previous.items():
+                self._totals[state] -= value
+
+        kind, rel_path = key
+        target = self._story_items if kind == STORE_CHANGE_STORY else self._anchor_items
+        if items is None:
+            target.pop(rel_path, None)
+            if kind == STORE_CHANGE_STORY:
+                self._story_records.pop(rel_path, None)
+            self._fingerprints.pop(key, None)
+            return
+
+        target[rel_path] = items
+        counts = _count_states(items)
+        self._source_counts[key] = counts
+        for state, value in counts.items():
+            self._totals[state] += value
+
+    def _rebuild_story(self, story_rel_path: str) -> None:
+        key = (STORE_CHANGE_STORY, story_rel_path)
+        try:
+            story_file = story_rel_to_json_path(story_rel_path)
+        except StoryStoreError:
+            self._set_source(key, None)
+            return
+
+        fingerprint = _file_fingerprint(story_file)
+        built = _build_story_record(story_file) if fingerprint else None
+        if not built:
+            self._set_source(key, None)
+            return
+
+        record, payload = built
+        self._story_records[story_rel_path] = record
+        self._fingerprints[key] = fingerprint
+        resolver = self._reference_resolver(record["book_rel_path"])
+        self._set_source(key, _build_story_slot_items(record, payload, resolver))
+
+    def _rebuild_node(self, node_rel_path: str) -> None:
+        key = (STORE_CHANGE_META, node_rel_path)
+        meta_file = meta_path_for_node(node_rel_path)
+        fingerprint = _file_fingerprint(meta_file)
+        if not fingerprint or _meta_file_node_rel_path(meta_file) is None:
+            self._set_source(key, None)
+            return
+
+        self._fingerprints[key] = fingerprint
+        self._set_source(key, _build_anchor_items(node_rel_path, self._reference_resolver(node_rel_path)))
+
+    def _scan(self) -> None:
+        seen: set[tuple[str, str]] = set()
+
+        for meta_file in iter_node_meta_files():
+            node_rel_path = _meta_file_node_rel_path(meta_file)
+            if node_rel_path is None:
+                continue
+            key = (STORE_CHANGE_META, node_rel_path)
+            seen.add(key)
+            if self._fingerprints.get(key) != _file_fingerprint(meta_file):
+                self._mark_meta_dirty(node_rel_path)
+
+        for story_file in list_story_json_files():
+            try:
+                story_rel_path = _normalize_rel_path(json_path_to_story_rel(story_file))
+            except (StoryStoreError, ValueError):
+                continue
+            if _is_in_excluded_area(story_rel_path):
+                continue
+            key = (STORE_CHANGE_STORY, story_rel_path)
+            seen.add(key)
+            if self._fingerprints.get(key) != _file_fingerprint(story_file):
+                self._dirty_stories.add(story_rel_path)
+
+        for key in list(self._source_counts):
+            if key in seen:
+                continue
+            kind, rel_path = key
+            if kind == STORE_CHANGE_STORY:
+                self._dirty_stories.add(rel_path)
+            else:
+                self._mark_meta_dirty(rel_path)
+
+        self._loaded = True
+        self._last_scan = time.monotonic()
+
+    def _sync(self) -> None:
+        change_stamp = store_change_stamp()
+        if self._loaded and change_stamp != self._change_stamp and is_own_store_change(self._change_stamp, change_stamp):
+            # Marcador tocado solo por escrituras de este proceso: on_store_change ya marco lo cambiado.
+            self._change_stamp = change_stamp
+        if (
+            not self._loaded
+            or change_stamp != self._change_stamp
+            or time.monotonic() - self._last_scan >= IMAGE_FLOW_RESCAN_SECONDS
+        ):
+            self._change_stamp = change_stamp
+            self._scan()
+
+        if not self._dirty_stories and not self._dirty_nodes:
+            return
+
+        dirty_nodes = sorted(self._dirty_nodes)
+        dirty_stories = sorted(self._dirty_stories)
+        self._dirty_nodes.clear()
+        self._dirty_stories.clear()
+        try:
+            for node_rel_path in dirty_nodes:
+                self._rebuild_node(node_rel_path)
+            for story_rel_path in dirty_stories:
+                self._rebuild_story(story_rel_path)
+        finally:
+            self._batch_resolvers.clear()
+        self._snapshot = None
+
+    def _assemble_snapshot(self) -> dict[str, Any]:
+        story_records = [self._story_records[key] for key in sorted(self._story_records)]
+        anchor_items = [item for key in sorted(self._anchor_items) for item in self._anchor_items[key]]
+        story_items = [item for key in sorted(self._story_items) for item in self._story_items[key]]
+
+        pending_items: list[dict[str, Any]] = []
+        excluded_no_prompt: list[dict[str, Any]] = []
+
+        for item in anchor_items + story_items:
+            state = item.get("state", "")
+            if state == "no_prompt":
+                excluded_no_prompt.append(
+                    {
+                        "queue_key": item.get("queue_key", ""),
+                        "display_title": item.get("display_title", ""),
+                        "display_subtitle": item.get("display_subtitle", ""),
+                        "item_type": item.get("item_type", ""),
+                    }
+                )
+                continue
+            if state == "pending":
+                if item.get("item_type") == "anchor":
+                    item = _with_anchor_editor_target(item, story_records)
+                pending_items.append(item)
+
+        return {
+            "pending_items": pending_items,
+            "excluded_no_prompt": excluded_no_prompt,
+            "pending_count": len(pending_items),
+            "completed_count": self._totals["completed"],
+            "excluded_no_prompt_count": len(excluded_no_prompt),
+            "has_pending": bool(pending_items),
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            self._sync()
+            if self._snapshot is None:
+                self._snapshot = self._assemble_snapshot()
+            return self._snapshot
+
+    def nav_status(self) -> dict[str, Any]:
+        with self._lock:
+            self._sync()
+            pending_count = self._totals["pending"]
+        return {
+            "has_pending": pending_count > 0,
+            "pending_count": pending_count,
+        }
+
+
+_FLOW_INDEX = ImageFlowIndex()
+add_store_listener(_FLOW_INDEX.on_store_change)
 
 
 def build_image_flow_snapshot() -> dict[str, Any]:
-    if has_request_context():
-        cached = getattr(g, "_image_flow_snapshot", None)
-        if isinstance(cached, dict):
-            return cached
-        snapshot = _build_snapshot_uncached()
-        g._image_flow_snapshot = snapshot
-        return snapshot
-    return _build_snapshot_uncached()
+    return _FLOW_INDEX.snapshot()
 
 
 def get_image_flow_nav_status() -> dict[str, Any]:
-    snapshot = build_image_flow_snapshot()
-    return {
-        "has_pending": bool(snapshot.get("has_pending")),
-        "pending_count": int(snapshot.get("pending_count", 0) or 0),
-    }
+    return _FLOW_INDEX.nav_status()
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from flask import abort, flash, redirect, render_template, request, send_file, url_for
+
+from ..story_store import StoryStoreError
+from . import web_bp
+from .common import build_story_url, get_request_story, normalize_rel_path
+from .export_jobs import JOB_ACTIVE_STATUSES, export_job_output, get_export_job, submit_export_job
+
+
+def _render_job(job: dict[str, object]):
+    return render_template(
+        "story/read/_export_job.html",
+        job=job,
+        job_active=job.get("status") in JOB_ACTIVE_STATUSES,
+    )
+
+
+@web_bp.post("/<path:story_path>/_act/export")
+def export_story_action(story_path: str):
+    story_rel_path = normalize_rel_path(story_path)
+    try:
+        get_request_story(story_rel_path)
+    except (FileNotFoundError, StoryStoreError):
+        abort(404)
+
+    job_id = submit_export_job(story_rel_path)
+    job = get_export_job(job_id)
+    if job is None:
+        abort(404)
+
+    if request.headers.get("HX-Request"):
+        return _render_job(job)
+
+    # Sin htmx no hay fragmento que sustituir: se lleva al usuario a la pagina del trabajo.
+    flash("Exportacion PDF en cola.", "success")
+    return redirect(url_for("web.export_job_status", job_id=job_id))
+
+
+@web_bp.get("/_jobs/<job_id>")
+def export_job_status(job_id: str):
+    job = get_export_job(job_id)
+    if job is None:
+        abort(404)
+    if request.headers.get("HX-Request"):
+        return _render_job(job)
+
+    return render_template(
+        "story/read/export_job.html",
+        job=job,
+        job_active=job.get("status") in JOB_ACTIVE_STATUSES,
+        story_url=build_story_url(str(job.get("story_rel_path", ""))),
+    )
+
+
+@web_bp.get("/_jobs/<job_id>/download")
+def export_job_download(job_id: str):
+    job = get_export_job(job_id)
+    if job is None:
+        abort(404)
+    output = export_job_output(job)
+    if output is None:
+        abort(404)
+    return send_file(output, mimetype="application/pdf", as_attachment=True, download_name=output.name)
@@ -1,36 +1,68 @@
 from __future__ import annotations
 
-from flask import abort, render_template, request
+from flask import abort, make_response, render_template, request
 
 from ..story_store import StoryStoreError, set_slot_active
 from . import web_bp
-from .common import first_story_page_number, normalize_rel_path, parse_positive_int
+from .common import (
+    build_story_fragment_etag,
+    first_story_page_number,
+    is_fragment_not_modified,
+    normalize_rel_path,
+    parse_positive_int,
+)
 from .viewmodels import build_story_view_model
 
 
+def _fragment_response(body: str, etag: str | None):
+    response = make_response(body)
+    if etag:
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response
+
+
+def _not_modified_response(etag: str):
+    response = make_response("", 304)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
 @web_bp.get("/<path:story_path>/_fr/shell")
 def story_shell_fragment(story_path: str):
     story_rel_path = normalize_rel_path(story_path)
     page_number = parse_positive_int(request.args.get("p"), first_story_page_number(story_rel_path))
+    etag = build_story_fragment_etag(story_rel_path, "shell", page_number)
+    if etag and is_fragment_not_modified(etag):
+        return _not_modified_response(etag)
+
     view_model = build_story_view_model(story_rel_path, page_number, editor_mode=False)
     if not view_model:
         abort(404)
-    return render_template("story/read/_shell.html", **view_model)
+    return _fragment_response(render_template("story/read/_shell.html", **view_model), etag)
 
 
 @web_bp.get("/<path:story_path>/_fr/advanced")
 def story_advanced_fragment(story_path: str):
     story_rel_path = normalize_rel_path(story_path)
     page_number = parse_positive_int(request.args.get("p"), first_story_page_number(story_rel_path))
+    etag = build_story_fragment_etag(story_rel_path, "advanced", page_number)
+    if etag and is_fragment_not_modified(etag):
+        return _not_modified_response(etag)
+
     view_model = build_story_view_model(story_rel_path, page_number, editor_mode=False)
     if not view_model:
         abort(404)
-    return render_template(
+    body = render_template(
         "story/read/_advanced_panel.html",
         panel_message="",
         panel_kind="",
         **view_model,
     )
+    return _fragment_response(body, etag)
 
 
 @web_bp.post("/<path:story_path>/_fr/slot/<slot_name>/activate")
@@ -4,17 +4,9 @@ from collections.abc import Callable
 
 from flask import flash, redirect, render_template, request, url_for
 
-from ..story_store import (
-    StoryStoreError,
-    add_anchor_alternative,
-    add_cover_alternative,
-    add_slot_alternative,
-    set_anchor_active,
-    set_cover_active,
-    set_slot_active,
-)
+from ..story_store import StoryStoreError, add_anchor_alternative, edit
 from . import web_bp
-from .common import build_story_url, normalize_rel_path, parse_positive_int
+from .common import build_media_thumb_url, build_story_url, normalize_rel_path, parse_positive_int
 from .image_flow import build_image_flow_snapshot
 from .image_upload import extract_image_payload
 
@@ -81,7 +73,9 @@ def _with_reference_urls(item: dict[str, object]) -> dict[str, object]:
             continue
         row = dict(raw_ref)
         asset_rel_path = str(row.get("asset_rel_path", "")).strip()
-        row["image_url"] = url_for("web.media_file", rel_path=asset_rel_path) if row.get("found") and asset_rel_path else ""
+        found = bool(row.get("found") and asset_rel_path)
+        row["image_url"] = url_for("web.media_file", rel_path=asset_rel_path) if found else ""
+        row["thumb_url"] = build_media_thumb_url(asset_rel_path) if found else ""
         refs.append(row)
     result["reference_assets"] = refs
     result["editor_url"] = _item_editor_url(result)
@@ -122,7 +116,7 @@ def image_flow_submit():
                 raise StoryStoreError("anchor_id es obligatorio para guardar ancla.")
 
             base_slug = request.form.get("alt_slug", "").strip() or f"flow-{anchor_id}"
-            alternative, used_slug = _with_flow_slug_retry(
+            _alternative, used_slug = _with_flow_slug_retry(
                 base_slug=base_slug,
                 save_with_slug=lambda slug: add_anchor_alternative(
                     node_rel_path=anchor_node_rel_path,
@@ -131,13 +125,9 @@ def image_flow_submit():
                     mime_type=mime_type,
                     slug=slug,
                     notes=notes,
+                    activate=True,
                 ),
             )
-            set_anchor_active(
-                node_rel_path=anchor_node_rel_path,
-                anchor_id=anchor_id,
-                alternative_id=str(alternative.get("id", "")),
-            )
             if used_slug != base_slug:
                 flash(f"Colision de slug resuelta: {base_slug} -> {used_slug}", "warning")
             flash(f"Ancla actualizada: {anchor_id}", "success")
@@ -148,21 +138,20 @@ def image_flow_submit():
             if not story_rel_path:
                 raise StoryStoreError("story_rel_path es obligatorio para portada.")
 
+            def save_cover(slug: str) -> dict[str, object]:
+                # Alta + activacion en una sola transaccion: una lectura y una escritura del cuento.
+                with edit(story_rel_path) as story:
+                    alternative = story.add_cover_alternative(
+                        image_bytes=image_bytes or b"",
+                        mime_type=mime_type,
+                        slug=slug,
+                        notes=notes,
+                    )
+                    story.set_cover_active(alternative_id=alternative["id"])
+                return alternative
+
             base_slug = request.form.get("alt_slug", "").strip() or "cover-flow"
-            alternative, used_slug = _with_flow_slug_retry(
-                base_slug=base_slug,
-                save_with_slug=lambda slug: add_cover_alternative(
-                    story_rel_path=story_rel_path,
-                    image_bytes=image_bytes or b"",
-                    mime_type=mime_type,
-                    slug=slug,
-                    notes=notes,
-                ),
-            )
-            set_cover_active(
-                story_rel_path=story_rel_path,
-                alternative_id=str(alternative.get("id", "")),
-            )
+            _alternative, used_slug = _with_flow_slug_retry(base_slug=base_slug, save_with_slug=save_cover)
             if used_slug != base_slug:
                 flash(f"Colision de slug resuelta: {base_slug} -> {used_slug}", "warning")
             flash(f"Portada actualizada: {story_rel_path}", "success")
@@ -177,25 +166,25 @@ def image_flow_submit():
             if slot_name not in {"main", "secondary"}:
                 raise StoryStoreError("slot_name invalido para guardado rapido.")
 
+            def save_slot(slug: str) -> dict[str, object]:
+                with edit(story_rel_path) as story:
+                    alternative = story.add_slot_alternative(
+                        page_number=page_number,
+                        slot_name=slot_name,
+                        image_bytes=image_bytes or b"",
+                        mime_type=mime_type,
+                        slug=slug,
+                        notes=notes,
+                    )
+                    story.set_slot_active(
+                        page_number=page_number,
+                        slot_name=slot_name,
+                        alternative_id=alternative["id"],
+                    )
+                return alternative
+
             base_slug = request.form.get("alt_slug", "").strip() or f"p{page_number:02d}-{slot_name}-flow"
-            alternative, used_slug = _with_flow_slug_retry(
-                base_slug=base_slug,
-                save_with_slug=lambda slug: add_slot_alternative(
-                    story_rel_path=story_rel_path,
-                    page_number=page_number,
-                    slot_name=slot_name,
-                    image_bytes=image_bytes or b"",
-                    mime_type=mime_type,
-                    slug=slug,
-                    notes=notes,
-                ),
-            )
-            set_slot_active(
-                story_rel_path=story_rel_path,
-                page_number=page_number,
-                slot_name=slot_name,
-                alternative_id=str(alternative.get("id", "")),
-            )
+            _alternative, used_slug = _with_flow_slug_retry(base_slug=base_slug, save_with_slug=save_slot)
             if used_slug != base_slug:
                 flash(f"Colision de slug resuelta: {base_slug} -> {used_slug}", "warning")
             flash(f"Slot actualizado: {story_rel_path} pagina {page_number} ({slot_name})", "success")
@@ -38,6 +38,7 @@ def save_story_page(story_path: str):
             secondary_prompt=request.form.get("secondary_prompt", None),
             main_reference_ids=request.form.get("main_reference_ids", ""),
             secondary_reference_ids=request.form.get("secondary_reference_ids", ""),
+            expected_updated_at=request.form.get("expected_updated_at"),
         )
         flash("Pagina guardada en JSON.", "success")
     except StoryStoreError as exc:
@@ -109,6 +110,7 @@ def save_story_cover(story_path: str):
             story_rel_path=story_rel_path,
             prompt=request.form.get("cover_prompt", ""),
             reference_ids=request.form.get("cover_reference_ids", ""),
+            expected_updated_at=request.form.get("expected_updated_at"),
         )
         flash("Portada guardada.", "success")
     except StoryStoreError as exc:
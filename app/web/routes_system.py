@@ -1,11 +1,39 @@
 from __future__ import annotations
 
-from flask import abort, jsonify, send_file
+from pathlib import Path
 
-from ..config import LIBRARY_ROOT
+from flask import abort, jsonify, request, send_file
+
+from ..config import LIBRARY_ROOT, MEDIA_DERIVATIVE_WIDTHS, MEDIA_IMMUTABLE_MAX_AGE
+from ..media_derivatives import (
+    MediaDerivativeError,
+    get_media_derivative,
+    media_content_etag,
+    normalize_derivative_format,
+    normalize_derivative_width,
+)
 from ..story_store import StoryStoreError, resolve_media_rel_path
 from . import web_bp
 
+WRITE_ONCE_IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+
+def _is_write_once_image(target: Path) -> bool:
+    # Las imagenes de `images/` no se sobrescriben (`_assert_available_image_name`): la URL identifica el contenido.
+    try:
+        rel_parts = target.relative_to(LIBRARY_ROOT.resolve()).parts
+    except ValueError:
+        return False
+    return "images" in rel_parts[:-1] and target.suffix.lower() in WRITE_ONCE_IMAGE_SUFFIXES
+
+
+def _send_media(path: Path, *, etag: str, immutable: bool, mimetype: str | None = None):
+    max_age = MEDIA_IMMUTABLE_MAX_AGE if immutable else None
+    response = send_file(path, mimetype=mimetype, etag=etag, conditional=True, max_age=max_age)
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
 
 @web_bp.get("/media/<path:rel_path>")
 def media_file(rel_path: str):
@@ -16,7 +44,31 @@ def media_file(rel_path: str):
 
     if not target.exists() or not target.is_file():
         abort(404)
-    return send_file(target)
+
+    immutable = _is_write_once_image(target)
+    raw_width = request.args.get("w")
+    raw_format = request.args.get("fmt")
+    if raw_width is None and raw_format is None:
+        return _send_media(target, etag=media_content_etag(target), immutable=immutable)
+
+    try:
+        width = normalize_derivative_width(raw_width) if raw_width is not None else max(MEDIA_DERIVATIVE_WIDTHS)
+        fmt = normalize_derivative_format(raw_format)
+    except MediaDerivativeError:
+        abort(400)
+
+    try:
+        derivative = get_media_derivative(target, source_rel_path=rel_path, width=width, fmt=fmt)
+    except MediaDerivativeError:
+        # Sin Pillow o con una imagen no decodificable se sirve el original.
+        return _send_media(target, etag=media_content_etag(target), immutable=immutable)
+
+    return _send_media(
+        derivative["path"],
+        etag=derivative["etag"],
+        immutable=immutable,
+        mimetype=derivative["mime_type"],
+    )
 
 
 @web_bp.get("/health")
@@ -28,4 +80,3 @@ def healthcheck():
             "storage_mode": "json_fs",
         }
     )
-
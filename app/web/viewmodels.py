@@ -4,20 +4,21 @@ from typing import Any
 
 from flask import url_for
 
-from ..catalog_provider import get_story_summary
 from ..story_store import (
+    STORY_EXCLUDED_TOP_LEVEL_DIRS,
     StoryStoreError,
-    get_story_cover,
-    get_story_page,
     list_applicable_anchors,
     list_meta_hierarchy,
     list_node_levels,
-    list_page_slots,
-    list_story_pages,
     resolve_media_rel_path,
-    resolve_reference_assets,
 )
-from .common import build_breadcrumbs, normalize_rel_path
+from .common import (
+    build_breadcrumbs,
+    build_media_thumb_url,
+    get_request_reference_resolver,
+    get_request_story,
+    normalize_rel_path,
+)
 
 
 def _build_alternative_view(alternative: dict[str, Any], active_id: str) -> dict[str, Any]:
@@ -25,12 +26,14 @@ def _build_alternative_view(alternative: dict[str, Any], active_id: str) -> dict
 
     image_exists = False
     image_url = ""
+    thumb_url = ""
     if rel_path:
         try:
             target = resolve_media_rel_path(rel_path)
             image_exists = target.exists() and target.is_file()
             if image_exists:
                 image_url = url_for("web.media_file", rel_path=rel_path)
+                thumb_url = build_media_thumb_url(rel_path)
         except StoryStoreError:
             image_exists = False
 
@@ -46,18 +49,17 @@ def _build_alternative_view(alternative: dict[str, Any], active_id: str) -> dict
         "is_active": alt_id == active_id,
         "image_exists": image_exists,
         "image_url": image_url,
+        "thumb_url": thumb_url,
     }
 
 
 def _build_reference_views(book_rel_path: str, reference_ids: list[str]) -> list[dict[str, Any]]:
     rows: list[dict[str, Any]] = []
-    for ref in resolve_reference_assets(book_rel_path, reference_ids):
+    for ref in get_request_reference_resolver(book_rel_path).resolve(reference_ids):
         row = dict(ref)
-        row["image_url"] = (
-            url_for("web.media_file", rel_path=row["asset_rel_path"])
-            if row.get("found") and row.get("asset_rel_path")
-            else ""
-        )
+        found = bool(row.get("found") and row.get("asset_rel_path"))
+        row["image_url"] = url_for("web.media_file", rel_path=row["asset_rel_path"]) if found else ""
+        row["thumb_url"] = build_media_thumb_url(row["asset_rel_path"]) if found else ""
         rows.append(row)
     return rows
 
@@ -131,12 +133,17 @@ def build_story_view_model(
     editor_mode: bool,
 ) -> dict[str, Any] | None:
     normalized = normalize_rel_path(story_rel_path)
-    story = get_story_summary(normalized)
-    if not story:
+    if not normalized or normalized.split("/")[0] in STORY_EXCLUDED_TOP_LEVEL_DIRS:
+        return None
+
+    try:
+        story_handle = get_request_story(normalized)
+    except (FileNotFoundError, StoryStoreError):
         return None
 
+    story = story_handle.summary()
     book_rel_path = str(story.get("book_rel_path", ""))
-    pages = list_story_pages(normalized)
+    pages = story_handle.pages()
     page_numbers = [int(page["page_number"]) for page in pages]
     default_page_number = page_numbers[0] if page_numbers else 1
 
@@ -144,17 +151,17 @@ def build_story_view_model(
     if page_numbers and selected_page not in page_numbers:
         selected_page = default_page_number
 
-    page = get_story_page(normalized, selected_page) if page_numbers else None
+    page = story_handle.page(selected_page) if page_numbers else None
 
     slot_items: list[dict[str, Any]] = []
     if page:
-        for slot in list_page_slots(normalized, selected_page):
+        for slot in story_handle.page_slots(selected_page):
             slot_items.append(_build_slot_item(slot, book_rel_path))
 
     slot_map = {item["slot_name"]: item for item in slot_items}
     main_slot = slot_map.get("main")
     secondary_slot = slot_map.get("secondary")
-    cover_slot = _build_slot_item(get_story_cover(normalized), book_rel_path)
+    cover_slot = _build_slot_item(story_handle.cover(), book_rel_path)
 
     missing_pages: list[int] = []
     if page_numbers:
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import time
+from typing import Any
+
+from . import create_app
+
+WSGI_SERVERS = ("auto", "gunicorn", "waitress")
+
+
+class WsgiServerError(RuntimeError):
+    pass
+
+
+def warm_app_caches() -> dict[str, Any]:
+    # Primer escaneo de library/ antes de aceptar peticiones: ningun editor paga el arranque en frio.
+    from .catalog_provider import catalog_counts
+    from .web.image_flow import get_image_flow_nav_status
+
+    started = time.perf_counter()
+    counts = catalog_counts()
+    nav_status = get_image_flow_nav_status()
+    return {
+        "counts": counts,
+        "pending_count": int(nav_status.get("pending_count", 0)),
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def create_warm_app():
+    app = create_app()
+    warm_app_caches()
+    return app
+
+
+def resolve_wsgi_server(server: str) -> str:
+    value = server.strip().lower()
+    if value not in WSGI_SERVERS:
+        raise WsgiServerError(f"servidor WSGI invalido: {server}")
+    if value != "auto":
+        return value
+    # gunicorn (multi-proceso) solo existe en POSIX; en Windows se usa waitress (hilos).
+    if os.name != "nt":
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            pass
+        else:
+            return "gunicorn"
+    return "waitress"
+
+
+def run_gunicorn(
+    *,
+    host: str,
+    port: int,
+    workers: int,
+    threads: int,
+    timeout: int,
+    preload: bool,
+    pidfile: str | None,
+) -> None:
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError as exc:
+        raise WsgiServerError("Falta dependencia 'gunicorn'. Instala con: pipenv install gunicorn") from exc
+
+    options: dict[str, Any] = {
+        "bind": f"{host}:{port}",
+        "workers": max(1, int(workers)),
+        "threads": max(1, int(threads)),
+        "worker_class": "gthread" if threads > 1 else "sync",
+        "timeout": max(1, int(timeout)),
+        "graceful_timeout": max(1, int(timeout)),
+        # Con preload la app y la cache se construyen una vez en el maestro y se comparten por fork;
+        # sin preload cada worker calienta la suya en load() y SIGHUP recarga tambien el codigo.
+        "preload_app": bool(preload),
+        "accesslog": "-",
+    }
+    if pidfile:
+        options["pidfile"] = pidfile
+
+    class StoryApplication(BaseApplication):
+        def load_config(self) -> None:
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return create_warm_app()
+
+    StoryApplication().run()
+
+
+def run_waitress(*, host: str, port: int, threads: int) -> None:
+    try:
+        from waitress import serve
+    except ImportError as exc:
+        raise WsgiServerError("Falta dependencia 'waitress'. Instala con: pipenv install waitress") from exc
+
+    serve(create_warm_app(), host=host, port=port, threads=max(1, int(threads)))
+
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import argparse
+import os
 import sys
+import time
 
 from app.config import APP_TITLE
 
+PDF_BATCH_OK_STATUSES = {"ok", "valid", "skipped"}
+
 
 def cmd_runserver(host: str, port: int, debug: bool) -> None:
     from app import create_app
@@ -13,6 +17,42 @@ def cmd_runserver(host: str, port: int, debug: bool) -> None:
     app.run(host=host, port=port, debug=debug)
 
 
+def cmd_serve(
+    *,
+    host: str,
+    port: int,
+    server: str,
+    workers: int,
+    threads: int,
+    timeout: int,
+    preload: bool,
+    pidfile: str | None,
+) -> int:
+    from app.wsgi import WsgiServerError, resolve_wsgi_server, run_gunicorn, run_waitress
+
+    try:
+        resolved = resolve_wsgi_server(server)
+        print(f"serve: {resolved} en http://{host}:{port} (workers={workers}, threads={threads})")
+        if resolved == "gunicorn":
+            run_gunicorn(
+                host=host,
+                port=port,
+                workers=workers,
+                threads=threads,
+                timeout=timeout,
+                preload=preload,
+                pidfile=pidfile,
+            )
+        else:
+            if workers > 1:
+                print("serve: waitress usa un solo proceso; --workers se ignora (usa --threads).")
+            run_waitress(host=host, port=port, threads=threads)
+    except WsgiServerError as exc:
+        print(f"ERROR: {exc}")
+        return 1
+    return 0
+
+
 def _print_pdf_validation(validation: dict[str, object]) -> None:
     story_rel = str(validation.get("story_rel_path", ""))
     story_id = str(validation.get("story_id", ""))
@@ -50,12 +90,14 @@ def cmd_export_story_pdf(
     size_cm: float,
     dry_run: bool,
     overwrite: bool,
+    force: bool = False,
+    progress: bool = False,
 ) -> int:
     from app.pdf_export import PdfExportError, export_story_pdf, validate_story_for_pdf
     from app.story_store import StoryStoreError
 
     try:
-        validation = validate_story_for_pdf(story_rel_path=story)
+        validation = validate_story_for_pdf(story_rel_path=story, size_cm=size_cm)
     except (FileNotFoundError, StoryStoreError, PdfExportError) as exc:
         print(f"ERROR: {exc}")
         return 1
@@ -71,18 +113,31 @@ def cmd_export_story_pdf(
     # should be replaced on each export without forcing explicit --overwrite.
     effective_overwrite = overwrite or output is None
 
+    def report(event: dict[str, object]) -> None:
+        # "bytes" (escritos en disco) llega en chunk/skipped/saved; en cada pagina llega
+        # "embedded_image_bytes", el acumulado de JPEG incrustados hasta ese momento.
+        if "bytes" in event:
+            size = f"{int(event.get('bytes', 0) or 0) / 1024:.0f} KiB"
+        else:
+            size = f"{int(event.get('embedded_image_bytes', 0) or 0) / 1024:.0f} KiB de imagenes"
+        elapsed = float(event.get("elapsed", 0.0) or 0.0)
+        print(f"  [{event.get('stage')}] pagina {event.get('page')}/{event.get('page_count')} {size} {elapsed:.2f}s")
+
     try:
         result = export_story_pdf(
             story_rel_path=story,
             output_path=output,
             size_cm=size_cm,
             overwrite=effective_overwrite,
+            force=force,
+            on_progress=report if progress else None,
+            validation=validation,
         )
     except (FileNotFoundError, StoryStoreError, PdfExportError) as exc:
         print(f"ERROR: {exc}")
         return 1
 
-    print("export: OK")
+    print("export: OK (sin cambios)" if result.get("skipped") else "export: OK")
     print(f"output_path: {result['output_path']}")
     if "layout_mode" in result:
         print(f"layout_mode: {result['layout_mode']}")
@@ -94,6 +149,98 @@ def cmd_export_story_pdf(
     return 0
 
 
+def _print_pdf_batch_summary(rows: list[dict[str, object]], *, total_seconds: float) -> None:
+    headers = ("cuento", "estado", "segundos", "paginas", "detalle")
+    table = [
+        (
+            str(row.get("story_rel_path", "")),
+            str(row.get("status", "")),
+            f"{float(row.get('seconds', 0.0) or 0.0):.2f}",
+            str(row.get("page_count", 0) or ""),
+            str(row.get("message", "")).strip().splitlines()[0] if str(row.get("message", "")).strip() else "",
+        )
+        for row in rows
+    ]
+    widths = [max([len(header)] + [len(line[idx]) for line in table]) for idx, header in enumerate(headers[:-1])]
+
+    def format_line(values: tuple[str, ...]) -> str:
+        cells = [value.ljust(widths[idx]) for idx, value in enumerate(values[:-1])]
+        return "  ".join(cells + [values[-1]]).rstrip()
+
+    print(format_line(headers))
+    print(format_line(tuple("-" * width for width in widths) + ("-" * len(headers[-1]),)))
+    for line in table:
+        print(format_line(line))
+
+    failed = sum(1 for row in rows if row.get("status") not in PDF_BATCH_OK_STATUSES)
+    print(f"total: {len(rows)} cuentos, {failed} con error, {total_seconds:.2f}s")
+
+
+def cmd_export_pdf_batch(*, book: str, size_cm: float, jobs: int, dry_run: bool, force: bool) -> int:
+    from app.pdf_export import PdfExportError, export_stories_pdf, list_pdf_story_rel_paths
+    from app.story_store import StoryStoreError
+
+    story_rel_paths = list_pdf_story_rel_paths(book)
+    if not story_rel_paths:
+        print(f"ERROR: no hay cuentos en: {book or 'library'}")
+        return 1
+
+    def report(row: dict[str, object]) -> None:
+        print(f"[{row.get('status')}] {row.get('story_rel_path')} ({float(row.get('seconds', 0.0) or 0.0):.2f}s)")
+
+    started = time.perf_counter()
+    try:
+        rows = export_stories_pdf(
+            story_rel_paths=story_rel_paths,
+            size_cm=size_cm,
+            jobs=jobs,
+            dry_run=dry_run,
+            force=force,
+            on_result=report,
+        )
+    except (FileNotFoundError, StoryStoreError, PdfExportError) as exc:
+        print(f"ERROR: {exc}")
+        return 1
+
+    print("")
+    _print_pdf_batch_summary(rows, total_seconds=time.perf_counter() - started)
+    return 0 if all(row.get("status") in PDF_BATCH_OK_STATUSES for row in rows) else 1
+
+
+def cmd_canonicalize_stories(*, dry_run: bool) -> int:
+    from app.story_store import StoryStoreError, canonicalize_story_file, json_path_to_story_rel, list_story_json_files
+
+    rewritten = 0
+    failed = 0
+    story_files = list_story_json_files()
+    for story_file in story_files:
+        story_rel_path = json_path_to_story_rel(story_file)
+        try:
+            changed = canonicalize_story_file(story_rel_path, dry_run=dry_run)
+        except (FileNotFoundError, StoryStoreError) as exc:
+            print(f"ERROR: {story_rel_path}: {exc}")
+            failed += 1
+            continue
+        if changed:
+            rewritten += 1
+            print(f"[{'pendiente' if dry_run else 'sellado'}] {story_rel_path}")
+
+    print(f"total: {len(story_files)} cuentos, {rewritten} {'por sellar' if dry_run else 'sellados'}, {failed} con error")
+    return 0 if failed == 0 else 1
+
+
+def _add_pdf_batch_arguments(command: argparse.ArgumentParser) -> None:
+    command.add_argument("--size-cm", type=float, default=20.0, help="Tamano base en cm de cada pagina cuadrada")
+    command.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Procesos de exportacion en paralelo (por defecto: numero de CPUs)",
+    )
+    command.add_argument("--dry-run", action="store_true", help="Validar cuentos sin generar PDF")
+    command.add_argument("--force", action="store_true", help="Regenerar aunque el PDF este al dia")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description=APP_TITLE)
     sub = parser.add_subparsers(dest="command", required=True)
@@ -103,6 +250,25 @@ def main() -> None:
     run.add_argument("--port", type=int, default=5000, help="Puerto de escucha")
     run.add_argument("--debug", action="store_true", help="Activar modo depuracion")
 
+    serve = sub.add_parser("serve", help="Ejecutar la app con un servidor WSGI de produccion")
+    serve.add_argument("--host", default="127.0.0.1", help="Host de escucha")
+    serve.add_argument("--port", type=int, default=8000, help="Puerto de escucha")
+    serve.add_argument(
+        "--server",
+        default="auto",
+        choices=["auto", "gunicorn", "waitress"],
+        help="Servidor WSGI (auto: gunicorn en Linux/macOS, waitress en Windows)",
+    )
+    serve.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos worker (solo gunicorn)")
+    serve.add_argument("--threads", type=int, default=4, help="Hilos por worker")
+    serve.add_argument("--timeout", type=int, default=120, help="Segundos maximos por peticion (solo gunicorn)")
+    serve.add_argument(
+        "--preload",
+        action="store_true",
+        help="Cargar app y catalogo en el proceso maestro antes de crear workers (solo gunicorn)",
+    )
+    serve.add_argument("--pidfile", default=None, help="Archivo PID para recarga con SIGHUP (solo gunicorn)")
+
     export = sub.add_parser("export-story-pdf", help="Exportar cuento maquetado a PDF")
     export.add_argument("--story", required=True, help="Ruta de cuento, por ejemplo: los_juegos_del_hambre/01")
     export.add_argument(
@@ -117,11 +283,42 @@ def main() -> None:
         action="store_true",
         help="Permitir sobreescritura cuando se use --output explicito",
     )
+    export.add_argument("--force", action="store_true", help="Regenerar aunque el PDF este al dia")
+    export.add_argument("--progress", action="store_true", help="Mostrar progreso por pagina")
+
+    export_book = sub.add_parser(
+        "export-book-pdf",
+        help="Exportar a PDF todos los cuentos de un libro (library/<book_rel_path>/NN.pdf)",
+    )
+    export_book.add_argument("--book", required=True, help="Ruta de libro, por ejemplo: los_juegos_del_hambre")
+    _add_pdf_batch_arguments(export_book)
+
+    export_all = sub.add_parser("export-all-pdf", help="Exportar a PDF todos los cuentos de la biblioteca")
+    _add_pdf_batch_arguments(export_all)
+
+    canonicalize = sub.add_parser(
+        "canonicalize-stories",
+        help="Reescribir en forma canonica los NN.json antiguos o editados a mano (lectura sin coercion)",
+    )
+    canonicalize.add_argument("--dry-run", action="store_true", help="Listar los cuentos sin sellar sin reescribirlos")
 
     args = parser.parse_args()
 
     if args.command == "runserver":
         cmd_runserver(host=args.host, port=args.port, debug=args.debug)
+    elif args.command == "serve":
+        exit_code = cmd_serve(
+            host=args.host,
+            port=args.port,
+            server=args.server,
+            workers=args.workers,
+            threads=args.threads,
+            timeout=args.timeout,
+            preload=args.preload,
+            pidfile=args.pidfile,
+        )
+        if exit_code != 0:
+            sys.exit(exit_code)
     elif args.command == "export-story-pdf":
         exit_code = cmd_export_story_pdf(
             story=args.story,
@@ -129,9 +326,25 @@ def main() -> None:
             size_cm=args.size_cm,
             dry_run=args.dry_run,
             overwrite=args.overwrite,
+            force=args.force,
+            progress=args.progress,
         )
         if exit_code != 0:
             sys.exit(exit_code)
+    elif args.command in {"export-book-pdf", "export-all-pdf"}:
+        exit_code = cmd_export_pdf_batch(
+            book=args.book if args.command == "export-book-pdf" else "",
+            size_cm=args.size_cm,
+            jobs=args.jobs,
+            dry_run=args.dry_run,
+            force=args.force,
+        )
+        if exit_code != 0:
+            sys.exit(exit_code)
+    elif args.command == "canonicalize-stories":
+        exit_code = cmd_canonicalize_stories(dry_run=args.dry_run)
+        if exit_code != 0:
+            sys.exit(exit_code)
     else:
         print(f"ERROR: comando no soportado: {args.command}")
         sys.exit(2)
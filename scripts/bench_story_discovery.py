@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from app.story_store import STORY_EXCLUDED_TOP_LEVEL_DIRS, STORY_JSON_RE, iter_story_json_files  # noqa: E402
+
+# Cuentos por libro: los NN.json tienen dos digitos.
+STORIES_PER_BOOK = 80
+
+
+def _legacy_list_story_json_files(library_root: Path) -> list[Path]:
+    # Implementacion anterior (rglob + resolve por archivo), como referencia del benchmark.
+    matches: list[Path] = []
+    for entry in library_root.rglob("*.json"):
+        if not entry.is_file():
+            continue
+        rel_parts = entry.resolve().relative_to(library_root.resolve()).parts
+        if rel_parts and rel_parts[0] in STORY_EXCLUDED_TOP_LEVEL_DIRS:
+            continue
+        if not STORY_JSON_RE.fullmatch(entry.name):
+            continue
+        matches.append(entry)
+    matches.sort(key=lambda item: item.as_posix())
+    return matches
+
+
+def _write_book(book_dir: Path, story_count: int, images_per_story: int) -> None:
+    book_dir.mkdir(parents=True, exist_ok=True)
+    (book_dir / "meta.json").write_text("{}\n", encoding="utf-8")
+    for story_idx in range(1, story_count + 1):
+        story_id = f"{story_idx:02d}"
+        (book_dir / f"{story_id}.json").write_text("{}\n", encoding="utf-8")
+        image_dir = book_dir / "images" / story_id
+        image_dir.mkdir(parents=True, exist_ok=True)
+        for image_idx in range(images_per_story):
+            (image_dir / f"{story_id}_{image_idx:02d}_main-v1.png").write_bytes(b"")
+    (book_dir / "images" / "index.json").write_text("[]\n", encoding="utf-8")
+
+
+def build_synthetic_library(root: Path, *, stories: int, images_per_story: int, backup_ratio: float) -> None:
+    books = max(1, -(-stories // STORIES_PER_BOOK))
+    for book_idx in range(books):
+        count = min(STORIES_PER_BOOK, stories - book_idx * STORIES_PER_BOOK)
+        saga = f"saga_{book_idx // 10:02d}"
+        _write_book(root / saga / f"libro_{book_idx:03d}", count, images_per_story)
+
+    # Copias en _backups/_inbox: el listado las descarta, pero la version anterior las recorria.
+    backup_books = int(books * backup_ratio)
+    for book_idx in range(backup_books):
+        _write_book(root / "_backups" / f"libro_{book_idx:03d}-20260101T000000Z", STORIES_PER_BOOK, images_per_story)
+    _write_book(root / "_inbox" / "lote_001", 10, 0)
+
+
+def _best_of(runs: int, fn) -> tuple[float, list[Path]]:
+    best = float("inf")
+    result: list[Path] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark story discovery on a synthetic library")
+    parser.add_argument("--stories", type=int, default=10000, help="Stories in the synthetic library")
+    parser.add_argument("--images-per-story", type=int, default=8, help="Image files per story under images/")
+    parser.add_argument("--backup-ratio", type=float, default=0.2, help="Fraction of books duplicated in _backups/")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per implementation (best time is reported)")
+    parser.add_argument("--keep", default="", help="Build (or reuse) the library in this directory and keep it")
+    args = parser.parse_args()
+
+    if args.keep:
+        library_root = Path(args.keep).expanduser().resolve()
+        cleanup = None
+    else:
+        cleanup = tempfile.mkdtemp(prefix="story-discovery-")
+        library_root = Path(cleanup) / "library"
+
+    try:
+        if not library_root.exists():
+            started = time.perf_counter()
+            build_synthetic_library(
+                library_root,
+                stories=int(args.stories),
+                images_per_story=int(args.images_per_story),
+                backup_ratio=float(args.backup_ratio),
+            )
+            print(f"library: {library_root} (built in {time.perf_counter() - started:.1f}s)")
+        else:
+            print(f"library: {library_root} (reused)")
+
+        legacy_time, legacy_files = _best_of(args.runs, lambda: _legacy_list_story_json_files(library_root))
+        walker_time, walker_files = _best_of(args.runs, lambda: list(iter_story_json_files(library_root)))
+        first_started = time.perf_counter()
+        next(iter_story_json_files(library_root), None)
+        first_time = time.perf_counter() - first_started
+    finally:
+        if cleanup:
+            shutil.rmtree(cleanup, ignore_errors=True)
+
+    print(f"stories_found: {len(walker_files)}")
+    print(f"same_result: {legacy_files == walker_files}")
+    print(f"rglob_resolve: {legacy_time * 1000:.1f} ms")
+    print(f"scandir_walker: {walker_time * 1000:.1f} ms")
+    print(f"first_story: {first_time * 1000:.2f} ms")
+    print(f"speedup: {legacy_time / walker_time:.1f}x" if walker_time > 0 else "speedup: n/a")
+    return 0 if legacy_files == walker_files else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
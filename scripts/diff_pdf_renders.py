@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any
+
+from render_pdf_pages import render_pdf_pages
+
+# Diferencia por canal (0-255) a partir de la cual un pixel cuenta como cambiado.
+DEFAULT_PIXEL_TOLERANCE = 24
+# MAE maximo por pagina (0-255, todos los canales) antes de fallar.
+DEFAULT_MAE_THRESHOLD = 0.25
+# Las regiones cambiadas se agrupan en celdas de este lado para no etiquetar pixel a pixel.
+REGION_TILE_PX = 16
+# Ganancia aplicada a la diferencia al pintar el mapa de calor.
+HEATMAP_GAIN = 4.0
+
+
+def _require_numpy() -> Any:
+    try:
+        import numpy as np
+    except ImportError as exc:
+        raise RuntimeError("Missing dependency 'numpy'. Install with: pipenv install --dev numpy") from exc
+    return np
+
+
+def _load_rgb(path: Path, np: Any) -> Any:
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def _changed_regions(mask: Any, np: Any, *, tile: int = REGION_TILE_PX) -> list[list[int]]:
+    height, width = mask.shape
+    rows = -(-height // tile)
+    cols = -(-width // tile)
+    padded = np.zeros((rows * tile, cols * tile), dtype=bool)
+    padded[:height, :width] = mask
+    tiles = padded.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+
+    # Componentes conexas sobre la rejilla de celdas (pocos miles como maximo).
+    seen = np.zeros_like(tiles)
+    regions: list[list[int]] = []
+    for start_row, start_col in zip(*np.nonzero(tiles)):
+        if seen[start_row, start_col]:
+            continue
+        seen[start_row, start_col] = True
+        queue = deque([(int(start_row), int(start_col))])
+        row_min = row_max = int(start_row)
+        col_min = col_max = int(start_col)
+        while queue:
+            row, col = queue.popleft()
+            row_min, row_max = min(row_min, row), max(row_max, row)
+            col_min, col_max = min(col_min, col), max(col_max, col)
+            for next_row, next_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if 0 <= next_row < rows and 0 <= next_col < cols:
+                    if tiles[next_row, next_col] and not seen[next_row, next_col]:
+                        seen[next_row, next_col] = True
+                        queue.append((next_row, next_col))
+
+        # Recorte al pixel cambiado real dentro del grupo de celdas.
+        y0, y1 = row_min * tile, min(height, (row_max + 1) * tile)
+        x0, x1 = col_min * tile, min(width, (col_max + 1) * tile)
+        window = mask[y0:y1, x0:x1]
+        ys = np.flatnonzero(window.any(axis=1))
+        xs = np.flatnonzero(window.any(axis=0))
+        regions.append([x0 + int(xs[0]), y0 + int(ys[0]), x0 + int(xs[-1]) + 1, y0 + int(ys[-1]) + 1])
+    return regions
+
+
+def _write_heatmap(path: Path, *, candidate: Any, pixel_diff: Any, regions: list[list[int]], np: Any) -> None:
+    from PIL import Image, ImageDraw
+
+    # Fondo: candidato en gris atenuado; rojo proporcional a la diferencia.
+    gray = candidate.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    gray = 160.0 + gray * (95.0 / 255.0)
+    alpha = np.clip(pixel_diff.astype(np.float32) * (HEATMAP_GAIN / 255.0), 0.0, 1.0)
+    heat = np.empty(candidate.shape, dtype=np.uint8)
+    heat[..., 0] = gray + (255.0 - gray) * alpha
+    heat[..., 1] = gray * (1.0 - alpha)
+    heat[..., 2] = gray * (1.0 - alpha)
+
+    image = Image.fromarray(heat, mode="RGB")
+    draw = ImageDraw.Draw(image)
+    for x0, y0, x1, y1 in regions:
+        draw.rectangle([x0, y0, x1 - 1, y1 - 1], outline=(0, 120, 255), width=2)
+    image.save(path, format="PNG", compress_level=1)
+
+
+def compare_page(
+    baseline_path: Path,
+    candidate_path: Path,
+    *,
+    pixel_tolerance: int = DEFAULT_PIXEL_TOLERANCE,
+    heatmap_path: Path | None = None,
+) -> dict[str, Any]:
+    np = _require_numpy()
+    baseline = _load_rgb(baseline_path, np)
+    candidate = _load_rgb(candidate_path, np)
+    if baseline.shape != candidate.shape:
+        return {
+            "mae": 255.0,
+            "changed_ratio": 1.0,
+            "regions": [],
+            "size_mismatch": [list(baseline.shape[:2]), list(candidate.shape[:2])],
+        }
+
+    # Caso habitual al validar optimizaciones: paginas identicas, sin reservar buffers de diferencia.
+    if np.array_equal(baseline, candidate):
+        return {"mae": 0.0, "changed_ratio": 0.0, "regions": []}
+
+    # |a-b| en uint8 sin promocionar a int16; reducciones con acumulador entero y por canal.
+    diff = np.maximum(baseline, candidate)
+    diff -= np.minimum(baseline, candidate)
+    mae = float(diff.sum(dtype=np.uint64)) / diff.size
+    pixel_diff = np.maximum(np.maximum(diff[..., 0], diff[..., 1]), diff[..., 2])
+    mask = pixel_diff > pixel_tolerance
+    changed_pixels = int(np.count_nonzero(mask))
+
+    regions = _changed_regions(mask, np) if changed_pixels else []
+    if heatmap_path is not None and changed_pixels:
+        _write_heatmap(heatmap_path, candidate=candidate, pixel_diff=pixel_diff, regions=regions, np=np)
+    return {
+        "mae": round(mae, 4),
+        "changed_ratio": round(changed_pixels / mask.size, 6),
+        "regions": regions,
+    }
+
+
+def diff_pdf_renders(
+    *,
+    baseline_pdf: Path,
+    candidate_pdf: Path,
+    output_dir: Path,
+    dpi: int = 160,
+    max_pages: int = 0,
+    jobs: int = 1,
+    threshold: float = DEFAULT_MAE_THRESHOLD,
+    pixel_tolerance: int = DEFAULT_PIXEL_TOLERANCE,
+) -> dict[str, Any]:
+    _require_numpy()
+    started = time.perf_counter()
+
+    # PNG sin perdida y compresion minima: la diferencia debe venir del PDF, no del formato.
+    render_options = {"dpi": dpi, "max_pages": max_pages, "jobs": jobs, "image_format": "png", "compression": 1}
+    baseline_pages, baseline_total = render_pdf_pages(
+        input_pdf=baseline_pdf, output_dir=output_dir / "baseline", **render_options
+    )
+    candidate_pages, candidate_total = render_pdf_pages(
+        input_pdf=candidate_pdf, output_dir=output_dir / "candidate", **render_options
+    )
+    render_elapsed = time.perf_counter() - started
+
+    heatmap_dir = output_dir / "diff"
+    heatmap_dir.mkdir(parents=True, exist_ok=True)
+    for stale in heatmap_dir.glob("diff-*.png"):
+        stale.unlink()
+
+    pages: list[dict[str, Any]] = []
+    for idx, (baseline_path, candidate_path) in enumerate(zip(baseline_pages, candidate_pages)):
+        heatmap_path = heatmap_dir / f"diff-{idx + 1:03d}.png"
+        row = compare_page(
+            baseline_path,
+            candidate_path,
+            pixel_tolerance=pixel_tolerance,
+            heatmap_path=heatmap_path,
+        )
+        row["page"] = idx + 1
+        row["failed"] = bool(row.get("size_mismatch")) or row["mae"] > threshold
+        if heatmap_path.exists():
+            row["heatmap"] = str(heatmap_path)
+        pages.append(row)
+
+    page_count_mismatch = baseline_total != candidate_total
+    report = {
+        "baseline_pdf": str(baseline_pdf),
+        "candidate_pdf": str(candidate_pdf),
+        "dpi": dpi,
+        "threshold": threshold,
+        "pixel_tolerance": pixel_tolerance,
+        "baseline_pages": baseline_total,
+        "candidate_pages": candidate_total,
+        "compared_pages": len(pages),
+        "changed_pages": sum(1 for row in pages if row["changed_ratio"] > 0),
+        "failed_pages": [row["page"] for row in pages if row["failed"]],
+        "max_mae": max((row["mae"] for row in pages), default=0.0),
+        "page_count_mismatch": page_count_mismatch,
+        "render_elapsed": round(render_elapsed, 3),
+        "elapsed": round(time.perf_counter() - started, 3),
+        "pages": pages,
+    }
+    report["passed"] = not page_count_mismatch and not report["failed_pages"]
+    (output_dir / "report.json").write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare two PDFs page by page (render + pixel diff)")
+    parser.add_argument("--baseline", required=True, help="Reference PDF path")
+    parser.add_argument("--candidate", required=True, help="PDF path to compare against the reference")
+    parser.add_argument("--output-dir", required=True, help="Output directory for renders, heatmaps and report.json")
+    parser.add_argument("--dpi", type=int, default=160, help="Render DPI")
+    parser.add_argument("--max-pages", type=int, default=0, help="Max pages to compare (0=all)")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes used to render each PDF")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_MAE_THRESHOLD,
+        help=f"Max mean absolute error per page, 0-255 scale (default {DEFAULT_MAE_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--pixel-tolerance",
+        type=int,
+        default=DEFAULT_PIXEL_TOLERANCE,
+        help=f"Per-channel difference for a pixel to count as changed (default {DEFAULT_PIXEL_TOLERANCE})",
+    )
+    args = parser.parse_args()
+
+    baseline_pdf = Path(args.baseline).expanduser().resolve()
+    candidate_pdf = Path(args.candidate).expanduser().resolve()
+    output_dir = Path(args.output_dir).expanduser().resolve()
+
+    try:
+        report = diff_pdf_renders(
+            baseline_pdf=baseline_pdf,
+            candidate_pdf=candidate_pdf,
+            output_dir=output_dir,
+            dpi=int(args.dpi),
+            max_pages=int(args.max_pages),
+            jobs=int(args.jobs),
+            threshold=float(args.threshold),
+            pixel_tolerance=int(args.pixel_tolerance),
+        )
+    except Exception as exc:
+        print(f"ERROR: {exc}")
+        return 2
+
+    for row in report["pages"]:
+        if row["changed_ratio"] <= 0 and not row["failed"]:
+            continue
+        status = "FAIL" if row["failed"] else "changed"
+        detail = f"size {row['size_mismatch']}" if row.get("size_mismatch") else f"regions={row['regions'][:4]}"
+        print(f"page {row['page']:03d} {status}: mae={row['mae']} changed={row['changed_ratio']:.4%} {detail}")
+
+    print(f"baseline_pages: {report['baseline_pages']}")
+    print(f"candidate_pages: {report['candidate_pages']}")
+    print(f"compared_pages: {report['compared_pages']}")
+    print(f"changed_pages: {report['changed_pages']}")
+    print(f"failed_pages: {len(report['failed_pages'])}")
+    print(f"max_mae: {report['max_mae']}")
+    print(f"elapsed: {report['elapsed']}s (render {report['render_elapsed']}s)")
+    print(f"report: {output_dir / 'report.json'}")
+    print("result: " + ("PASS" if report["passed"] else "FAIL"))
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,22 @@
 from __future__ import annotations
 
 import argparse
+import json
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Any
 
+# formato -> (formato PIL, extension, opcion de compresion, valor por defecto)
+OUTPUT_FORMATS = {
+    "png": ("PNG", "png", "compress_level", 6),
+    "webp": ("WEBP", "webp", "quality", 80),
+    "jpeg": ("JPEG", "jpg", "quality", 90),
+}
+# Ajustes con los que se renderizaron las paginas de output_dir: --skip-existing solo reutiliza si coinciden.
+SETTINGS_SIDECAR_NAME = ".render_settings.json"
+
 
 def _require_pdfium() -> Any:
     try:
@@ -15,52 +28,194 @@ def _require_pdfium() -> Any:
     return pdfium
 
 
+def _normalize_output_format(image_format: str) -> str:
+    value = image_format.strip().lower()
+    if value == "jpg":
+        value = "jpeg"
+    if value not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {image_format} (use png, webp or jpeg)")
+    return value
+
+
+def _save_options(image_format: str, compression: int | None) -> dict[str, Any]:
+    pil_format, _extension, option_name, default_value = OUTPUT_FORMATS[image_format]
+    value = default_value if compression is None else int(compression)
+    if option_name == "compress_level" and not 0 <= value <= 9:
+        raise ValueError("PNG compression must be between 0 and 9")
+    if option_name == "quality" and not 1 <= value <= 100:
+        raise ValueError(f"{image_format.upper()} quality must be between 1 and 100")
+    return {"format": pil_format, option_name: value}
+
+
+def page_output_path(output_dir: Path, page_index: int, image_format: str = "png") -> Path:
+    extension = OUTPUT_FORMATS[_normalize_output_format(image_format)][1]
+    return output_dir / f"page-{page_index + 1:03d}.{extension}"
+
+
+def _render_settings(input_pdf: Path, dpi: int, image_format: str, compression: int | None) -> dict[str, Any]:
+    save_options = _save_options(image_format, compression)
+    input_stat = input_pdf.stat()
+    return {
+        "input_pdf": {"size": input_stat.st_size, "mtime_ns": input_stat.st_mtime_ns},
+        "dpi": int(dpi),
+        "format": image_format,
+        "save_options": save_options,
+    }
+
+
+def _read_settings_sidecar(output_dir: Path) -> dict[str, Any] | None:
+    try:
+        value = json.loads((output_dir / SETTINGS_SIDECAR_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _write_settings_sidecar(output_dir: Path, settings: dict[str, Any]) -> None:
+    sidecar = output_dir / SETTINGS_SIDECAR_NAME
+    temp_path = sidecar.with_name(f"{sidecar.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        temp_path.write_text(json.dumps(settings, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        temp_path.replace(sidecar)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def _render_page_range(
+    input_pdf: str,
+    output_dir: str,
+    dpi: int,
+    page_indexes: list[int],
+    image_format: str,
+    compression: int | None,
+    skip_existing: bool,
+) -> list[str]:
+    # Cada worker abre su propio documento: los handles de pdfium no se comparten entre procesos.
+    save_options = _save_options(image_format, compression)
+    target_dir = Path(output_dir)
+    scale = float(dpi) / 72.0
+
+    written: list[str] = []
+    document = None
+    try:
+        for idx in page_indexes:
+            output_path = page_output_path(target_dir, idx, image_format)
+            if skip_existing and output_path.exists():
+                written.append(str(output_path))
+                continue
+
+            if document is None:
+                document = _require_pdfium().PdfDocument(input_pdf)
+            page = document[idx]
+            bitmap = page.render(scale=scale)
+            pil_image = bitmap.to_pil()
+            if save_options["format"] == "JPEG" and pil_image.mode not in {"RGB", "L"}:
+                pil_image = pil_image.convert("RGB")
+            # Temporal + replace: una pagina a medio escribir nunca cuenta como existente.
+            temp_path = output_path.with_name(f"{output_path.name}.{uuid.uuid4().hex}.tmp")
+            try:
+                pil_image.save(temp_path, **save_options)
+                temp_path.replace(output_path)
+            finally:
+                if temp_path.exists():
+                    temp_path.unlink()
+            written.append(str(output_path))
+
+            pil_image.close()
+            if hasattr(bitmap, "close"):
+                bitmap.close()
+            if hasattr(page, "close"):
+                page.close()
+    finally:
+        if document is not None and hasattr(document, "close"):
+            document.close()
+    return written
+
+
+def _split_pages(page_indexes: list[int], jobs: int) -> list[list[int]]:
+    # Rangos contiguos: cada worker recorre paginas vecinas y reutiliza recursos compartidos.
+    chunk_count = max(1, min(jobs, len(page_indexes)))
+    size, extra = divmod(len(page_indexes), chunk_count)
+    chunks: list[list[int]] = []
+    start = 0
+    for chunk_idx in range(chunk_count):
+        end = start + size + (1 if chunk_idx < extra else 0)
+        chunks.append(page_indexes[start:end])
+        start = end
+    return [chunk for chunk in chunks if chunk]
+
+
 def render_pdf_pages(
     *,
     input_pdf: Path,
     output_dir: Path,
     dpi: int = 160,
     max_pages: int = 0,
+    jobs: int = 1,
+    image_format: str = "png",
+    compression: int | None = None,
+    skip_existing: bool = False,
 ) -> tuple[list[Path], int]:
     if not input_pdf.exists() or not input_pdf.is_file():
         raise FileNotFoundError(f"Input PDF not found: {input_pdf}")
     if dpi <= 0:
         raise ValueError("dpi must be > 0")
+    image_format = _normalize_output_format(image_format)
+    settings = _render_settings(input_pdf, dpi, image_format, compression)
 
     pdfium = _require_pdfium()
     output_dir.mkdir(parents=True, exist_ok=True)
+    # Paginas de otro PDF, DPI, formato o compresion no valen: se renderizan todas. El sidecar se borra
+    # antes de empezar para que una ejecucion interrumpida no deje paginas mezcladas dadas por buenas.
+    if skip_existing and _read_settings_sidecar(output_dir) != settings:
+        skip_existing = False
+    if not skip_existing:
+        (output_dir / SETTINGS_SIDECAR_NAME).unlink(missing_ok=True)
 
     document = pdfium.PdfDocument(str(input_pdf))
     total_pages = len(document)
-    target_pages = total_pages if max_pages <= 0 else min(max_pages, total_pages)
-    scale = float(dpi) / 72.0
-
-    written: list[Path] = []
-    for idx in range(target_pages):
-        page = document[idx]
-        bitmap = page.render(scale=scale)
-        pil_image = bitmap.to_pil()
-        output_path = output_dir / f"page-{idx + 1:03d}.png"
-        pil_image.save(output_path, format="PNG")
-        written.append(output_path)
-
-        pil_image.close()
-        if hasattr(bitmap, "close"):
-            bitmap.close()
-        if hasattr(page, "close"):
-            page.close()
-
     if hasattr(document, "close"):
         document.close()
+    target_pages = total_pages if max_pages <= 0 else min(max_pages, total_pages)
+    page_indexes = list(range(target_pages))
+
+    chunks = _split_pages(page_indexes, max(1, int(jobs)))
+    args = (str(input_pdf), str(output_dir), int(dpi))
+    tail = (image_format, compression, skip_existing)
+    if len(chunks) <= 1:
+        rendered = [_render_page_range(*args, page_indexes, *tail)]
+    else:
+        # spawn: un hijo con fork heredaria el estado de pdfium del proceso padre.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(chunks), mp_context=context) as executor:
+            futures = [executor.submit(_render_page_range, *args, chunk, *tail) for chunk in chunks]
+            rendered = [future.result() for future in futures]
+
+    _write_settings_sidecar(output_dir, settings)
+    written = [Path(path) for chunk_paths in rendered for path in chunk_paths]
     return written, total_pages
 
 
 def main() -> int:
-    parser = argparse.ArgumentParser(description="Render PDF pages to PNG using pypdfium2")
+    parser = argparse.ArgumentParser(description="Render PDF pages to images using pypdfium2")
     parser.add_argument("--input", required=True, help="Input PDF path")
-    parser.add_argument("--output-dir", required=True, help="Output directory for PNG pages")
+    parser.add_argument("--output-dir", required=True, help="Output directory for rendered pages")
     parser.add_argument("--dpi", type=int, default=160, help="Render DPI")
     parser.add_argument("--max-pages", type=int, default=0, help="Max pages to render (0=all)")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes (pages are split in contiguous ranges)")
+    parser.add_argument("--format", default="png", choices=["png", "webp", "jpeg", "jpg"], help="Output image format")
+    parser.add_argument(
+        "--compression",
+        type=int,
+        default=None,
+        help="PNG compress level 0-9 (default 6) or WebP/JPEG quality 1-100 (default 80/90)",
+    )
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="Do not re-render pages whose output exists and was rendered with the same input, DPI, format and compression",
+    )
     args = parser.parse_args()
 
     input_pdf = Path(args.input).expanduser().resolve()
@@ -72,6 +227,10 @@ def main() -> int:
             output_dir=output_dir,
             dpi=int(args.dpi),
             max_pages=int(args.max_pages),
+            jobs=int(args.jobs),
+            image_format=str(args.format),
+            compression=args.compression,
+            skip_existing=bool(args.skip_existing),
         )
     except Exception as exc:
         print(f"ERROR: {exc}")
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app import story_store
+
+
+def isolated_library(test: unittest.TestCase, *modules: object) -> Path:
+    # Biblioteca temporal: el store (y los modulos indicados que importan rutas de config) nunca
+    # tocan library/ del repositorio. Las caches y listeners del store arrancan vacios.
+    root = Path(tempfile.mkdtemp(prefix="story-store-"))
+    library_root = root / "library"
+    cache_root = library_root / "_cache"
+    library_root.mkdir()
+    patches = {
+        "ROOT_DIR": root,
+        "LIBRARY_ROOT": library_root,
+        "CACHE_ROOT": cache_root,
+        "STORE_LOCK_DIR": cache_root / "locks",
+        "STORE_CHANGE_MARKER": cache_root / "store.changed",
+    }
+    targets: list[tuple[object, str, object]] = [(story_store, name, value) for name, value in patches.items()]
+    for name in (
+        "_STORE_LISTENERS",
+        "_IMAGE_INDEXES",
+        "_REFERENCE_LEVELS",
+        "_REFERENCE_RESOLVERS",
+        "_NODE_METAS",
+        "_APPLICABLE_ANCHORS",
+        "_OWN_CHANGE_STAMPS",
+    ):
+        targets.append((story_store, name, type(getattr(story_store, name))()))
+    for module in modules:
+        for name, value in patches.items():
+            if hasattr(module, name):
+                targets.append((module, name, value))
+
+    for target, name, value in targets:
+        patcher = mock.patch.object(target, name, value)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    test.addCleanup(shutil.rmtree, root, ignore_errors=True)
+    return library_root
+
+
+def save_story(story_rel_path: str, *, title: str = "Cuento de prueba", pages: int = 1) -> dict:
+    book_rel_path, story_id = story_rel_path.rsplit("/", 1)
+    return story_store.save_story_payload(
+        story_rel_path=story_rel_path,
+        payload={
+            "story_id": story_id,
+            "title": title,
+            "book_rel_path": book_rel_path,
+            "pages": [{"page_number": number, "text": f"Texto {number}"} for number in range(1, pages + 1)],
+        },
+    )
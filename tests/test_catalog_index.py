@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from unittest import mock
+
+from app import catalog_provider, story_store
+
+from .support import isolated_library, save_story
+
+STORY_REL_PATH = "saga/libro/01"
+
+
+class CatalogIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.library_root = isolated_library(self, catalog_provider)
+        save_story(STORY_REL_PATH, title="Primero")
+        self.index = catalog_provider.CatalogIndex()
+        story_store.add_store_listener(self.index.on_store_change)
+        self.index.snapshot()
+
+    def _count_walks(self) -> mock.MagicMock:
+        walker = mock.patch.object(
+            catalog_provider, "list_story_json_files", wraps=catalog_provider.list_story_json_files
+        )
+        counted = walker.start()
+        self.addCleanup(walker.stop)
+        return counted
+
+    def _expire_rescan(self) -> None:
+        self.index._last_scan = time.monotonic() - catalog_provider.CATALOG_RESCAN_SECONDS - 1
+
+    def test_unchanged_library_is_not_walked(self) -> None:
+        walks = self._count_walks()
+        first = self.index.snapshot()
+        self.assertIs(self.index.snapshot(), first)
+        self.assertEqual(walks.call_count, 0)
+
+    def test_own_write_updates_story_without_walking(self) -> None:
+        walks = self._count_walks()
+        save_story(STORY_REL_PATH, title="Segundo")
+        save_story("saga/libro/02", title="Nuevo")
+
+        catalog = self.index.snapshot()
+        self.assertEqual(catalog["stories"][STORY_REL_PATH]["title"], "Segundo")
+        self.assertEqual(catalog["stories"]["saga/libro/02"]["title"], "Nuevo")
+        self.assertEqual(catalog["counts"]["stories"], 2)
+        self.assertEqual(walks.call_count, 0)
+
+    def test_marker_from_other_process_forces_walk(self) -> None:
+        walks = self._count_walks()
+        story_file = story_store.story_rel_to_json_path(STORY_REL_PATH)
+        story_file.write_text(story_file.read_text(encoding="utf-8").replace("Primero", "Externo"), encoding="utf-8")
+        # Otro worker: toca el marcador sin pasar por este proceso.
+        marker = story_store.STORE_CHANGE_MARKER
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+        stamp = time.time_ns() + 5_000_000_000
+        os.utime(marker, ns=(stamp, stamp))
+
+        catalog = self.index.snapshot()
+        self.assertEqual(walks.call_count, 1)
+        self.assertEqual(catalog["stories"][STORY_REL_PATH]["title"], "Externo")
+
+    def test_thumbnail_follows_images_on_disk(self) -> None:
+        alternative = story_store.add_slot_alternative(
+            story_rel_path=STORY_REL_PATH,
+            page_number=1,
+            slot_name="main",
+            image_bytes=b"\x89PNG prueba",
+            mime_type="image/png",
+            slug="prueba",
+            notes="",
+        )
+        summary = self.index.snapshot()["stories"][STORY_REL_PATH]
+        self.assertTrue(summary["thumb_exists"])
+        self.assertEqual(summary["thumb_rel_path"], alternative["asset_rel_path"])
+
+        # Imagen borrada fuera de la app: NN.json no cambia, lo recoge el re-escaneo periodico.
+        image_path = self.library_root.parent / alternative["asset_rel_path"]
+        image_bytes = image_path.read_bytes()
+        image_path.unlink()
+        self._expire_rescan()
+        self.assertFalse(self.index.snapshot()["stories"][STORY_REL_PATH]["thumb_exists"])
+
+        image_path.write_bytes(image_bytes)
+        self._expire_rescan()
+        self.assertTrue(self.index.snapshot()["stories"][STORY_REL_PATH]["thumb_exists"])
+
+    def test_rescan_skips_thumbnail_check_when_images_dir_unchanged(self) -> None:
+        story_store.add_slot_alternative(
+            story_rel_path=STORY_REL_PATH,
+            page_number=1,
+            slot_name="main",
+            image_bytes=b"\x89PNG prueba",
+            mime_type="image/png",
+            slug="prueba",
+            notes="",
+        )
+        self.assertTrue(self.index.snapshot()["stories"][STORY_REL_PATH]["thumb_exists"])
+
+        self._expire_rescan()
+        with mock.patch.object(catalog_provider, "_pick_thumbnail", wraps=catalog_provider._pick_thumbnail) as pick:
+            self.index.snapshot()
+        self.assertEqual(pick.call_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import unittest
+from unittest import mock
+
+from app import catalog_provider, create_app
+from app.web import routes_export
+
+from .support import isolated_library, save_story
+
+STORY_REL_PATH = "saga/libro/01"
+EXPORT_URL = f"/{STORY_REL_PATH}/_act/export"
+JOB_ID = "0123456789abcdef"
+
+
+class ExportStoryActionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        isolated_library(self, catalog_provider)
+        save_story(STORY_REL_PATH)
+        self.job = {
+            "id": JOB_ID,
+            "story_rel_path": STORY_REL_PATH,
+            "status": "queued",
+            "page": 0,
+            "page_count": 0,
+            "elapsed": 0.0,
+            "message": "",
+        }
+        # Sin cola real: las rutas solo necesitan encolar y leer el trabajo.
+        for name, value in (
+            ("submit_export_job", mock.Mock(return_value=JOB_ID)),
+            ("get_export_job", mock.Mock(side_effect=lambda job_id: dict(self.job) if job_id == JOB_ID else None)),
+        ):
+            patcher = mock.patch.object(routes_export, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = create_app().test_client()
+
+    def test_htmx_post_returns_polling_fragment(self) -> None:
+        response = self.client.post(EXPORT_URL, headers={"HX-Request": "true"})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.get_data(as_text=True)
+        self.assertIn('id="export-job"', body)
+        self.assertIn(f"/_jobs/{JOB_ID}", body)
+        self.assertNotIn("<html", body)
+        routes_export.submit_export_job.assert_called_once_with(STORY_REL_PATH)
+
+    def test_plain_post_redirects_to_job_page(self) -> None:
+        response = self.client.post(EXPORT_URL)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.headers["Location"].endswith(f"/_jobs/{JOB_ID}"))
+
+        page = self.client.get(response.headers["Location"])
+        body = page.get_data(as_text=True)
+        self.assertEqual(page.status_code, 200)
+        self.assertIn("<html", body)
+        self.assertIn("Exportacion PDF en cola.", body)
+        self.assertIn(f'hx-get="/_jobs/{JOB_ID}"', body)
+        self.assertIn(f'href="/{STORY_REL_PATH}"', body)
+
+    def test_finished_job_page_links_download(self) -> None:
+        self.job.update(status="done", elapsed=1.5)
+
+        body = self.client.get(f"/_jobs/{JOB_ID}").get_data(as_text=True)
+        self.assertIn(f"/_jobs/{JOB_ID}/download", body)
+        self.assertNotIn("hx-get", body)
+
+    def test_unknown_story_is_404(self) -> None:
+        response = self.client.post("/saga/libro/99/_act/export")
+        self.assertEqual(response.status_code, 404)
+        routes_export.submit_export_job.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
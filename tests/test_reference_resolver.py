@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import os
+import unittest
+from unittest import mock
+
+from app import story_store
+
+from .support import isolated_library, save_story
+
+BOOK_REL_PATH = "saga/libro"
+STORY_REL_PATH = f"{BOOK_REL_PATH}/01"
+
+
+class ReferenceResolverTest(unittest.TestCase):
+    def setUp(self) -> None:
+        library_root = isolated_library(self)
+        save_story(STORY_REL_PATH)
+        self.images_dir = library_root / BOOK_REL_PATH / "images"
+        self.images_dir.mkdir(parents=True)
+        (self.images_dir / "ref.png").write_bytes(b"\x89PNG ref")
+
+    def _found(self, resolver: story_store.ReferenceResolver, name: str) -> bool:
+        return resolver.resolve([name])[0]["found"]
+
+    def test_resolve_does_not_touch_disk(self) -> None:
+        resolver = story_store.get_reference_resolver(BOOK_REL_PATH)
+        with mock.patch("os.stat", wraps=os.stat) as stat, mock.patch("os.scandir", wraps=os.scandir) as scandir:
+            for _round in range(20):
+                self.assertTrue(self._found(resolver, "ref.png"))
+                self.assertFalse(self._found(resolver, "otra.png"))
+        self.assertEqual(stat.call_count, 0)
+        self.assertEqual(scandir.call_count, 0)
+
+    def test_external_file_is_seen_on_next_validation(self) -> None:
+        resolver = story_store.get_reference_resolver(BOOK_REL_PATH)
+        (self.images_dir / "nueva.png").write_bytes(b"\x89PNG nueva")
+        future_ns = os.stat(self.images_dir).st_mtime_ns + 1_000_000_000
+        os.utime(self.images_dir, ns=(future_ns, future_ns))
+
+        # El resolutor ya obtenido no revalida; pedirlo de nuevo si.
+        self.assertFalse(self._found(resolver, "nueva.png"))
+        fresh = story_store.get_reference_resolver(BOOK_REL_PATH)
+        self.assertIsNot(fresh, resolver)
+        self.assertTrue(self._found(fresh, "nueva.png"))
+
+    def test_own_write_invalidates_resolver(self) -> None:
+        resolver = story_store.get_reference_resolver(BOOK_REL_PATH)
+        root_resolver = story_store.get_reference_resolver("")
+        alternative = story_store.add_slot_alternative(
+            story_rel_path=STORY_REL_PATH,
+            page_number=1,
+            slot_name="main",
+            image_bytes=b"\x89PNG prueba",
+            mime_type="image/png",
+            slug="prueba",
+            notes="",
+        )
+
+        self.assertTrue(resolver.invalidated)
+        self.assertFalse(root_resolver.invalidated)
+        fresh = story_store.get_reference_resolver(BOOK_REL_PATH)
+        self.assertTrue(self._found(fresh, alternative["id"]))
+
+    def test_meta_write_invalidates_descendant_resolvers(self) -> None:
+        resolver = story_store.get_reference_resolver(BOOK_REL_PATH)
+        story_store.save_node_meta("saga", {"collection": {"title": "Saga"}, "anchors": []})
+        self.assertTrue(resolver.invalidated)
+        self.assertNotEqual(
+            story_store.get_reference_resolver(BOOK_REL_PATH).version_stamps(), resolver.version_stamps()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
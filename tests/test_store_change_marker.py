@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+import unittest
+from unittest import mock
+
+from app import story_store
+from app.web import image_flow
+
+from .support import isolated_library, save_story
+
+STORY_REL_PATH = "saga/libro/01"
+
+
+def _touch_marker_as_other_process() -> None:
+    future_ns = (story_store.store_change_stamp() or 0) + 1_000_000_000
+    os.utime(story_store.STORE_CHANGE_MARKER, ns=(future_ns, future_ns))
+
+
+class OwnStoreChangeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        isolated_library(self, image_flow)
+        save_story(STORY_REL_PATH)
+
+    def test_own_writes_are_recognized(self) -> None:
+        known = story_store.store_change_stamp()
+        self.assertIsNotNone(known)
+
+        for title in ("Uno", "Dos", "Tres"):
+            save_story(STORY_REL_PATH, title=title)
+        story_store.save_node_meta("saga", {"collection": {"title": "Saga"}, "anchors": []})
+
+        self.assertTrue(story_store.is_own_store_change(known, story_store.store_change_stamp()))
+
+    def test_foreign_touch_is_not_own(self) -> None:
+        known = story_store.store_change_stamp()
+        save_story(STORY_REL_PATH, title="Propio")
+        _touch_marker_as_other_process()
+
+        self.assertFalse(story_store.is_own_store_change(known, story_store.store_change_stamp()))
+
+
+class ImageFlowMarkerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        isolated_library(self, image_flow)
+        save_story(STORY_REL_PATH)
+        self.index = image_flow.ImageFlowIndex()
+        story_store.add_store_listener(self.index.on_store_change)
+        self.index.snapshot()
+
+    def _count_scans(self) -> mock.MagicMock:
+        patcher = mock.patch.object(self.index, "_scan", wraps=self.index._scan)
+        counted = patcher.start()
+        self.addCleanup(patcher.stop)
+        return counted
+
+    def test_own_write_does_not_rescan(self) -> None:
+        scans = self._count_scans()
+        save_story(STORY_REL_PATH, title="Otro titulo")
+
+        snapshot = self.index.snapshot()
+        self.assertEqual(scans.call_count, 0)
+        # Cuento sin prompts: sus slots salen en "sin prompt" con el titulo del cuento.
+        self.assertIn("Otro titulo", {item["display_title"] for item in snapshot["excluded_no_prompt"]})
+
+    def test_foreign_marker_forces_rescan(self) -> None:
+        scans = self._count_scans()
+        _touch_marker_as_other_process()
+
+        self.index.snapshot()
+        self.assertEqual(scans.call_count, 1)
+        self.index.snapshot()
+        self.assertEqual(scans.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import unittest
+from unittest import mock
+
+from app import story_store
+
+from .support import isolated_library, save_story
+
+BOOK_REL_PATH = "saga/libro"
+STORY_REL_PATH = f"{BOOK_REL_PATH}/01"
+
+
+class StoryEditCommitTest(unittest.TestCase):
+    def setUp(self) -> None:
+        library_root = isolated_library(self)
+        save_story(STORY_REL_PATH)
+        self.images_dir = library_root / BOOK_REL_PATH / "images"
+        self.index_path = self.images_dir / "index.json"
+
+    def _add_alternative(self) -> dict:
+        return story_store.add_slot_alternative(
+            story_rel_path=STORY_REL_PATH,
+            page_number=1,
+            slot_name="main",
+            image_bytes=b"\x89PNG prueba",
+            mime_type="image/png",
+            slug="prueba",
+            notes="",
+        )
+
+    def _index_filenames(self) -> list[str]:
+        if not self.index_path.exists():
+            return []
+        return [item["filename"] for item in json.loads(self.index_path.read_text(encoding="utf-8"))]
+
+    def test_commit_writes_story_image_and_index(self) -> None:
+        alternative = self._add_alternative()
+
+        self.assertTrue((self.images_dir / alternative["id"]).is_file())
+        self.assertEqual(self._index_filenames(), [alternative["id"]])
+        story = story_store.load_story(STORY_REL_PATH)
+        self.assertEqual(story["pages"][0]["images"]["main"]["active_id"], alternative["id"])
+
+    def test_failed_story_write_leaves_no_image_nor_index_entry(self) -> None:
+        story_before = story_store.load_story(STORY_REL_PATH)
+        with mock.patch.object(
+            story_store,
+            "_write_story_file",
+            side_effect=story_store.StoryStoreError("fallo simulado"),
+        ):
+            with self.assertRaises(story_store.StoryStoreError):
+                self._add_alternative()
+
+        images_on_disk = [
+            path.name for path in self.images_dir.rglob("*") if path.is_file() and path.name != "index.json"
+        ]
+        self.assertEqual(images_on_disk, [])
+        self.assertEqual(self._index_filenames(), [])
+        self.assertEqual(story_store.load_story(STORY_REL_PATH), story_before)
+
+
+if __name__ == "__main__":
+    unittest.main()
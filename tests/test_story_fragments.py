@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+import unittest
+from unittest import mock
+
+from app import catalog_provider, create_app, story_store
+
+from .support import isolated_library
+
+BOOK_REL_PATH = "saga/libro"
+STORY_REL_PATH = f"{BOOK_REL_PATH}/01"
+ADVANCED_URL = f"/{STORY_REL_PATH}/_fr/advanced?p=1"
+
+
+class StoryFragmentEtagTest(unittest.TestCase):
+    def setUp(self) -> None:
+        library_root = isolated_library(self, catalog_provider)
+        story_store.save_story_payload(
+            story_rel_path=STORY_REL_PATH,
+            payload={
+                "story_id": "01",
+                "title": "Cuento de prueba",
+                "book_rel_path": BOOK_REL_PATH,
+                "pages": [
+                    {
+                        "page_number": 1,
+                        "text": "Texto 1",
+                        "images": {"main": {"prompt": "Un bosque", "reference_ids": ["ref.png"]}},
+                    }
+                ],
+            },
+        )
+        self.images_dir = library_root / BOOK_REL_PATH / "images"
+        self.images_dir.mkdir(parents=True, exist_ok=True)
+        self.client = create_app().test_client()
+
+    def _touch_images_dir(self) -> None:
+        future_ns = os.stat(self.images_dir).st_mtime_ns + 1_000_000_000
+        os.utime(self.images_dir, ns=(future_ns, future_ns))
+
+    def test_unchanged_fragment_answers_304(self) -> None:
+        first = self.client.get(ADVANCED_URL)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.headers.get("ETag"))
+
+        again = self.client.get(ADVANCED_URL, headers={"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_reference_image_on_disk_changes_etag(self) -> None:
+        first = self.client.get(ADVANCED_URL)
+        (self.images_dir / "ref.png").write_bytes(b"\x89PNG ref")
+        self._touch_images_dir()
+
+        second = self.client.get(ADVANCED_URL, headers={"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.headers["ETag"], first.headers["ETag"])
+
+    def test_request_validates_references_once(self) -> None:
+        (self.images_dir / "ref.png").write_bytes(b"\x89PNG ref")
+        self.client.get(ADVANCED_URL)
+        with mock.patch.object(
+            story_store._LevelReferenceAssets, "is_current", autospec=True, return_value=True
+        ) as is_current:
+            response = self.client.get(ADVANCED_URL)
+        self.assertEqual(response.status_code, 200)
+        # Una validacion por nivel (raiz, saga, libro) para toda la peticion: ETag y render comparten resolutor.
+        self.assertEqual(is_current.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import unittest
+from unittest import mock
+
+from app import story_store
+
+from .support import isolated_library, save_story
+
+STORY_REL_PATH = "saga/libro/01"
+
+
+class StorySealTest(unittest.TestCase):
+    def setUp(self) -> None:
+        library_root = isolated_library(self)
+        self.saved = save_story(STORY_REL_PATH, title="Original", pages=2)
+        self.story_file = library_root / f"{STORY_REL_PATH}.json"
+
+    def _count_coercions(self) -> mock.MagicMock:
+        patcher = mock.patch.object(
+            story_store, "_coerce_story_payload", wraps=story_store._coerce_story_payload
+        )
+        counted = patcher.start()
+        self.addCleanup(patcher.stop)
+        return counted
+
+    def _rewrite_unsealed(self, title: str) -> None:
+        # Como un NN.json anterior al sello: mismo contenido sin schema_version ni payload_sha256.
+        raw = json.loads(self.story_file.read_text(encoding="utf-8"))
+        raw.pop("schema_version")
+        raw.pop("payload_sha256")
+        raw["title"] = title
+        self.story_file.write_text(json.dumps(raw, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    def test_written_story_is_sealed_and_read_without_coercion(self) -> None:
+        self.assertTrue(self.story_file.read_bytes().startswith(story_store._CANONICAL_HEADER_PREFIX))
+
+        coercions = self._count_coercions()
+        loaded = story_store.load_story(STORY_REL_PATH)
+
+        self.assertEqual(coercions.call_count, 0)
+        self.assertEqual(loaded, self.saved)
+        self.assertNotIn("payload_sha256", loaded)
+        self.assertNotIn("schema_version", loaded)
+
+    def test_hand_edit_falls_back_to_coercion(self) -> None:
+        # Se conserva la cabecera con el hash antiguo: el cuerpo ya no coincide.
+        raw = self.story_file.read_bytes()
+        self.story_file.write_bytes(raw.replace(b'"Original"', b'"Editado a mano"'))
+
+        coercions = self._count_coercions()
+        loaded = story_store.load_story(STORY_REL_PATH)
+
+        self.assertEqual(coercions.call_count, 1)
+        self.assertEqual(loaded["title"], "Editado a mano")
+        self.assertEqual(len(loaded["pages"]), 2)
+
+    def test_canonicalize_reseals_edited_file(self) -> None:
+        self._rewrite_unsealed("Sin sello")
+        self.assertFalse(self.story_file.read_bytes().startswith(story_store._CANONICAL_HEADER_PREFIX))
+
+        self.assertTrue(story_store.canonicalize_story_file(STORY_REL_PATH, dry_run=True))
+        self.assertFalse(self.story_file.read_bytes().startswith(story_store._CANONICAL_HEADER_PREFIX))
+        self.assertTrue(story_store.canonicalize_story_file(STORY_REL_PATH))
+        self.assertFalse(story_store.canonicalize_story_file(STORY_REL_PATH))
+
+        coercions = self._count_coercions()
+        loaded = story_store.load_story(STORY_REL_PATH)
+        self.assertEqual(coercions.call_count, 0)
+        self.assertEqual(loaded["title"], "Sin sello")
+        self.assertEqual(loaded["updated_at"], self.saved["updated_at"])
+
+
+class StoryCacheInvalidationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        isolated_library(self)
+        save_story(STORY_REL_PATH, title="Original")
+
+    def test_story_handle_goes_stale_after_write(self) -> None:
+        handle = story_store.open_story(STORY_REL_PATH)
+        self.assertTrue(handle.is_current())
+
+        save_story(STORY_REL_PATH, title="Nuevo")
+
+        self.assertFalse(handle.is_current())
+        self.assertEqual(story_store.open_story(STORY_REL_PATH).payload["title"], "Nuevo")
+
+    def test_node_meta_cache_follows_writes(self) -> None:
+        story_store.save_node_meta("saga", {"collection": {"title": "Primera"}, "anchors": []})
+        self.assertEqual(story_store.get_node_meta("saga")["collection"]["title"], "Primera")
+
+        story_store.save_node_meta("saga", {"collection": {"title": "Segunda"}, "anchors": []})
+        self.assertEqual(story_store.get_node_meta("saga")["collection"]["title"], "Segunda")
+
+
+if __name__ == "__main__":
+    unittest.main()